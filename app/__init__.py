@@ -1,10 +1,16 @@
-import os, uuid, threading, json
-from flask import Flask, request, jsonify, render_template, make_response, send_file
-from pathlib import Path
-import shutil
+import os, uuid, json
+import time
+from flask import Flask, Response, g, request, jsonify, render_template, make_response, send_file
 from werkzeug.utils import secure_filename
 
-from .pipeline import run_pipeline, new_session_dir, write_json_atomic, progress_path, ffprobe_ok, make_preview
+from .pipeline import new_session_dir, progress_path, ffprobe_ok
+from . import digests, janitor, jobs, metrics, progress_bus
+from .uploads import start_session
+import settings
+
+MULTIPART_OVERHEAD = 16 * 1024  # boundaries, part headers and form fields around the file
+
+
 def create_app():
     """Create and configure the Flask application.
 
@@ -26,8 +32,45 @@ def create_app():
 
     app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
     app.config["UPLOAD_FOLDER"] = "/tmp/peakpilot"
-    app.config["MAX_CONTENT_LENGTH"] = 512 * 1024 * 1024
+    # hard cap for bodies without Content-Length; /start checks the declared size first
+    app.config["MAX_CONTENT_LENGTH"] = settings.MAX_FILE_MB * 1024 * 1024 + MULTIPART_OVERHEAD
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    janitor_started = False
+
+    # gauges are evaluated only when /metrics is scraped
+    metrics.gauge("peakpilot_jobs_queued", "Jobs waiting for a worker.").fn = lambda: jobs.scheduler().stats()["queued"]
+    metrics.gauge("peakpilot_jobs_running", "Jobs being processed.").fn = lambda: jobs.scheduler().stats()["running"]
+    metrics.gauge("peakpilot_session_disk_bytes", "Bytes used by session directories (last janitor sweep).").fn = (
+        lambda: janitor.janitor(app.config["UPLOAD_FOLDER"]).usage()
+    )
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.before_request
+    def _start_janitor():
+        # started by the serving process, not on import; never under tests
+        nonlocal janitor_started
+        if not janitor_started and settings.JANITOR and not app.testing:
+            janitor_started = True
+            janitor.janitor(app.config["UPLOAD_FOLDER"]).start()
+
+    @app.after_request
+    def _record_latency(resp):
+        started = g.pop("request_started", None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            metrics.HTTP_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+            metrics.HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=resp.status_code)
+        return resp
+
+    @app.errorhandler(jobs.QueueFull)
+    def _busy(exc):
+        resp = jsonify({"error": "Server busy, try again shortly.", "retry_after": exc.retry_after})
+        resp.status_code = 429
+        resp.headers["Retry-After"] = str(exc.retry_after)
+        return resp
 
     @app.get("/")
     def index():
@@ -37,100 +80,50 @@ def create_app():
     def healthz():
         return jsonify({"status": "ok", "ffmpeg": ffprobe_ok("ffmpeg"), "ffprobe": ffprobe_ok("ffprobe")})
 
+    @app.get("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), content_type=metrics.CONTENT_TYPE, headers={"Cache-Control": "no-store"})
+
+    @app.get("/stats/storage")
+    def storage_stats():
+        resp = jsonify(janitor.janitor(app.config["UPLOAD_FOLDER"]).stats())
+        resp.headers["Cache-Control"] = "no-store"
+        return resp
+
     @app.post("/start")
     def start():
-        f = request.files.get("audio")
-        if not f:
-            return jsonify({"error": "No audio file provided (form field must be 'audio')."}), 400
-
-        orig_name = f.filename or "upload"
-        stem = Path(orig_name).stem
-        import re
-        safe_stem = re.sub(r"[^A-Za-z0-9_\-]+", "_", stem).strip("_")
-        if not safe_stem:
-            safe_stem = "track"
-
-        session = uuid.uuid4().hex[:12]
-        sess_dir = new_session_dir(app.config["UPLOAD_FOLDER"], session)
-        src_path = os.path.join(sess_dir, "upload")
-        f.save(src_path)
-
-        try:
-            make_preview(Path(src_path), Path(sess_dir) / "input_preview.wav", sr=48000, stereo=True)
-        except Exception:
-            shutil.copyfile(src_path, os.path.join(sess_dir, "input_preview.wav"))
-
-        seed = {
-            "pct": 0,
-            "status": "starting",
-            "percent": 0,
-            "phase": "starting",
-            "message": "Starting…",
-            "done": False,
-            "error": None,
-            "downloads": {"club": None, "streaming": None, "unlimited": None, "custom": None, "zip": None, "session_json": None},
-            "metrics": {
-                "input": {},
-                "club": {},
-                "streaming": {},
-                "unlimited": {},
-                "custom": {},
-                "advisor": {
-                    "recommended_preset": "",
-                    "input_I": None,
-                    "input_TP": None,
-                    "input_LRA": None,
-                    "analysis": {},
-                    "ai_adjustments": {},
-                },
-            },
-            "timeline": {"sec": [], "short_term": [], "tp_flags": []},
-            "masters": {
-                "club": {"state": "queued", "pct": 0, "message": ""},
-                "streaming": {"state": "queued", "pct": 0, "message": ""},
-                "unlimited": {"state": "queued", "pct": 0, "message": ""},
-                "custom": {"state": "queued", "pct": 0, "message": ""},
-            },
-            "original_stem": safe_stem,
-        }
-        write_json_atomic(progress_path(sess_dir), seed)
-
-        params = request.form.to_dict(flat=True)
-        stems = {}
-        gains = {}
-        t = threading.Thread(
-            target=run_pipeline,
-            args=(session, sess_dir, src_path, params, stems, gains, orig_name, safe_stem),
-            daemon=True,
-        )
-        t.start()
-
-        return jsonify({"session": session, "progress_url": f"/progress/{session}"})
+        # reject before the multipart body is parsed (and spooled to disk)
+        max_bytes = settings.MAX_FILE_MB * 1024 * 1024
+        if request.content_length is not None and request.content_length > max_bytes:
+            return jsonify({"error": f"File too large (limit {settings.MAX_FILE_MB} MB)."}), 413
+        # the slot is held while the body is received, so an accepted upload is never refused
+        with jobs.scheduler().reserve() as slot:
+            f = request.files.get("audio")
+            if not f:
+                return jsonify({"error": "No audio file provided (form field must be 'audio')."}), 400
+
+            orig_name = f.filename or "upload"
+            session = uuid.uuid4().hex[:12]
+            sess_dir = new_session_dir(app.config["UPLOAD_FOLDER"], session)
+            src_path = os.path.join(sess_dir, "upload")
+            # hashed while it is written; decode, advisor and manifest reuse the digest
+            upload_digests = digests.save_stream(f.stream, src_path)
+
+            return jsonify(start_session(session, sess_dir, src_path, orig_name,
+                                         request.form.to_dict(flat=True), upload_digests, reservation=slot))
 
     @app.get("/progress/<session>")
     def progress(session):
-        p = progress_path(os.path.join(app.config["UPLOAD_FOLDER"], session))
-        if not os.path.exists(p):
-            resp = make_response(
-                json.dumps(
-                    {
-                        "pct": 0,
-                        "status": "starting",
-                        "percent": 0,
-                        "phase": "starting",
-                        "message": "Starting…",
-                        "done": False,
-                        "error": None,
-                        "masters": {
-                            "club": {"state": "queued", "pct": 0, "message": ""},
-                            "streaming": {"state": "queued", "pct": 0, "message": ""},
-                            "unlimited": {"state": "queued", "pct": 0, "message": ""},
-                            "custom": {"state": "queued", "pct": 0, "message": ""},
-                        },
-                    }
-                ),
-                200,
-            )
+        sess_dir = os.path.join(app.config["UPLOAD_FOLDER"], secure_filename(session))
+        state = progress_bus.peek(sess_dir)
+        p = progress_path(sess_dir)
+        if state is not None:
+            # job runs in this process: serve the live document, no disk read
+            resp = make_response(state.to_json(), 200)
+        elif not os.path.exists(p):
+            pj = progress_bus.default_progress()
+            pj["message"] = "Starting…"
+            resp = make_response(json.dumps({k: pj[k] for k in ("pct", "status", "percent", "phase", "message", "done", "error", "masters")}), 200)
         else:
             with open(p, "r", encoding="utf-8") as fh:
                 resp = make_response(fh.read(), 200)
@@ -138,27 +131,41 @@ def create_app():
         resp.headers["Cache-Control"] = "no-store, max-age=0"
         return resp
 
-    from .util_fs import session_root
+    from .util_fs import manifest_index, session_root
+    from .routes.caching import validators
+    from .routes.stream import send_zip
 
     @app.get("/download/<session>/<key>")
     def download(session, key):
         sess_dir = session_root(app.config["UPLOAD_FOLDER"], secure_filename(session))
-        man_path = sess_dir / "manifest.json"
-        if not man_path.exists():
+        entry = manifest_index.get(sess_dir)
+        if entry is None:
             return ("No manifest", 404)
-        man = json.loads(man_path.read_text())
-        meta = man.get(key)
-        if not meta:
-            meta = next((v for v in man.values() if v.get("filename") == key), None)
+        meta = entry.lookup(key)
         if not meta:
             return ("Unknown file key", 404)
+        janitor.touch(sess_dir)
+        if meta.get("members"):
+            return send_zip(sess_dir, entry, meta)
         p = sess_dir / meta["filename"]
         if not p.exists():
             return ("File missing", 404)
-        return send_file(p, mimetype="application/octet-stream", as_attachment=True, download_name=meta["filename"])
+        valid = validators(p, meta)
+        resp = send_file(
+            p, mimetype="application/octet-stream", as_attachment=True, download_name=meta["filename"],
+            etag=valid.etag or False, last_modified=valid.last_modified, conditional=valid.cacheable,
+        )
+        resp.headers["Cache-Control"] = valid.headers()["Cache-Control"]
+        return resp
 
     from .routes.stream import bp as stream_bp
     app.register_blueprint(stream_bp)
+    from .routes.events import bp as events_bp
+    app.register_blueprint(events_bp)
+    from .routes.peaks import bp as peaks_bp
+    app.register_blueprint(peaks_bp)
+    from .routes.uploads import bp as uploads_bp
+    app.register_blueprint(uploads_bp)
 
     return app
 
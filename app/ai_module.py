@@ -4,57 +4,93 @@ from typing import Dict, Any
 
 import numpy as np
 import soundfile as sf
-from scipy.signal import resample_poly, stft
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import get_window, resample_poly
 from sklearn.linear_model import SGDRegressor
 from sklearn.multioutput import MultiOutputRegressor
-import joblib
+
+import settings
+from .digests import sha256_of
+from .feature_store import FeatureStore
+from .model_registry import model_registry
 
 def checksum_sha256(path: Path) -> str:
-    import hashlib
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1<<20), b""):
-            h.update(chunk)
-    return h.hexdigest()
+    return sha256_of(path)
 
 # feature extraction
 
-def _extract_features(path: Path, timeline: Dict[str, Any]) -> tuple[np.ndarray, Dict[str, float]]:
-    data, sr = sf.read(str(path))
-    if data.ndim > 1:
-        data = data.mean(axis=1)
+NPERSEG = 4096
+HOP = 2048
+
+
+def _stft(data: np.ndarray, sr: int):
+    """Hann STFT matching ``scipy.signal.stft(..., padded=False)``.
+
+    Frames are strided views and go through a single batched ``rfft`` that
+    keeps the input precision (complex64 for float32 input).  Unlike scipy the
+    result is ``(frames, bins)``.
+    """
+    half = NPERSEG // 2
+    x = np.concatenate((np.zeros(half, data.dtype), data, np.zeros(half, data.dtype)))
+    if len(x) < NPERSEG:
+        x = np.pad(x, (0, NPERSEG - len(x)))
+    win = get_window("hann", NPERSEG).astype(data.dtype)
+    frames = sliding_window_view(x, NPERSEG)[::HOP]
+    Z = rfft(frames * win, axis=1, workers=-1)
+    Z *= 1.0 / win.sum()
+    return rfftfreq(NPERSEG, 1.0 / sr), Z
+
+
+def _zero_crossing_rates(data: np.ndarray, n_frames: int) -> np.ndarray:
+    """ZCR of ``data[i*HOP : i*HOP + NPERSEG]`` for every frame with > 1 sample."""
+    starts = np.arange(n_frames) * HOP
+    lengths = np.minimum(NPERSEG, len(data) - starts)
+    keep = lengths > 1
+    starts, lengths = starts[keep], lengths[keep]
+    crossings = np.concatenate(([0], np.cumsum((data[:-1] * data[1:]) < 0)))
+    return (crossings[starts + lengths - 1] - crossings[starts]) / lengths
+
+
+def _extract_features(path: Path, timeline: Dict[str, Any], audio=None,
+                      dtype=np.float64) -> tuple[np.ndarray, Dict[str, float]]:
+    """Spectral/dynamic feature vector for the advisor.
+
+    All per-frame features are matrix operations over the STFT magnitude.
+    ``dtype=np.float32`` halves memory and FFT cost at ~1e-6 relative error.
+    """
+    if audio is not None:
+        data, sr = audio.mono(), audio.sr
+    else:
+        data, sr = sf.read(str(path), dtype="float32" if dtype == np.float32 else "float64")
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+    data = np.asarray(data, dtype=dtype)
     if sr != 48000:
-        data = resample_poly(data, 48000, sr)
+        data = resample_poly(data, 48000, sr).astype(dtype, copy=False)
         sr = 48000
-    # STFT
-    f, t, Z = stft(data, fs=sr, nperseg=4096, noverlap=4096-2048, padded=False)
-    mag = np.abs(Z) + 1e-9
-    rms = np.sqrt(np.mean(data**2))
-    peak = np.max(np.abs(data))
+    # frames are rows: every per-frame reduction runs along contiguous memory
+    f, Z = _stft(data, sr)
+    f = f.astype(dtype)
+    mag = np.abs(Z) + dtype(1e-9)
+    rms = np.sqrt(np.mean(np.square(data, dtype=np.float64)))
+    peak = float(np.max(np.abs(data)))
     crest = peak / (rms + 1e-9)
-    centroid = (f[:, None] * mag).sum(axis=0) / mag.sum(axis=0)
-    rolloff = []
-    flat = []
-    bw = []
-    zcr = []
-    for i in range(mag.shape[1]):
-        spec = mag[:, i]
-        energy = spec**2
-        cumsum = np.cumsum(energy)
-        idx = np.searchsorted(cumsum, 0.95*cumsum[-1])
-        rolloff.append(f[min(idx, len(f)-1)])
-        c = centroid[i]
-        bw.append(np.sqrt(((f-c)**2 * energy).sum()/energy.sum()))
-        geo = np.exp(np.mean(np.log(spec)))
-        flat.append(geo/np.mean(spec))
-        start = i*2048
-        frame = data[start:start+4096]
-        if len(frame)>1:
-            zcr.append(((frame[:-1]*frame[1:])<0).sum()/len(frame))
-    band_means = []
-    edges = np.linspace(0, mag.shape[0], 33, dtype=int)
-    for b in range(32):
-        band_means.append(float(mag[edges[b]:edges[b+1], :].mean()))
+    mag_sum = mag.sum(axis=1)
+    centroid = (mag @ f) / mag_sum
+    energy = np.square(mag)
+    cum = np.cumsum(energy, axis=1)
+    total = cum[:, -1]
+    idx = np.argmax(cum >= 0.95 * total[:, None], axis=1)
+    rolloff = f[np.minimum(idx, len(f) - 1)]
+    # sum((f - c)^2 * e) expanded into three matrix-vector products
+    var = (energy @ np.square(f) - 2 * centroid * (energy @ f)) / total + np.square(centroid)
+    bw = np.sqrt(np.maximum(var, 0))
+    flat = np.exp(np.mean(np.log(mag), axis=1)) / (mag_sum / mag.shape[1])
+    zcr = _zero_crossing_rates(data, mag.shape[0])
+    edges = np.linspace(0, mag.shape[1], 33, dtype=int)
+    band_sums = np.add.reduceat(mag, edges[:-1], axis=1).sum(axis=0, dtype=np.float64)
+    band_means = (band_sums / (np.diff(edges) * mag.shape[0])).tolist()
     tl = timeline.get("short_term") or [0.0]
     tl_arr = np.array(tl)
     tl_stats = [float(np.mean(tl_arr)), float(np.percentile(tl_arr,5)),
@@ -62,7 +98,7 @@ def _extract_features(path: Path, timeline: Dict[str, Any]) -> tuple[np.ndarray,
     feats = np.array([rms, peak, crest,
                       float(np.mean(centroid)), float(np.mean(rolloff)),
                       float(np.mean(flat)), float(np.mean(bw)), float(np.mean(zcr)),
-                      np.mean(np.abs(np.diff(np.sqrt((Z**2).mean(axis=0)))))
+                      np.mean(np.abs(np.diff(np.sqrt((Z**2).mean(axis=1)))))
                       ] + tl_stats + band_means, dtype=float)
     analysis = {
         "centroid_mean": float(np.mean(centroid)),
@@ -72,26 +108,43 @@ def _extract_features(path: Path, timeline: Dict[str, Any]) -> tuple[np.ndarray,
     return feats, analysis
 
 
-def _model_path(base_dir: Path, fingerprint: str) -> Path:
-    model_dir = base_dir / "models"
-    model_dir.mkdir(parents=True, exist_ok=True)
-    return model_dir / f"{fingerprint}.joblib"
+def feature_store(base_dir: Path) -> FeatureStore:
+    return FeatureStore(Path(base_dir) / "features", settings.FEATURE_CACHE_MB * 1024 * 1024)
 
 
-def analyze_track(path: Path, timeline: Dict[str, Any]):
+def analyze_track(path: Path, timeline: Dict[str, Any], audio=None, checksum: str | None = None,
+                  inputs: Dict[str, Any] | None = None, peaks: bytes | None = None):
+    """Run the advisor on ``path``.
+
+    ``audio`` is an optional :class:`~app.engine.decoded.DecodedAudio` for the
+    same file; when given, its samples and checksum are reused instead of
+    reading and hashing the upload again.  Features of previously seen content
+    come from the feature store before any samples are touched.  ``inputs``
+    and ``peaks`` (the pipeline's input analysis) are stored alongside.
+    """
     base = Path(path).parent.parent
-    checksum = checksum_sha256(path)
+    if checksum is None:
+        checksum = audio.sha256 if audio is not None else checksum_sha256(path)
     dur = len(timeline.get("sec", []))
     fingerprint = f"{checksum}-{dur}"
-    features, analysis = _extract_features(path, timeline)
-    model_file = _model_path(base, fingerprint)
-    if model_file.exists():
-        model = joblib.load(model_file)
+    store = feature_store(base)
+    cached = store.load(checksum)
+    if cached is not None:
+        features, analysis = cached["features"], cached["analysis"]
+        if inputs is not None and cached["inputs"] is None:
+            store.put(checksum, features, analysis, inputs=inputs, peaks=peaks)
     else:
-        base = SGDRegressor(max_iter=1, learning_rate="constant", eta0=0.01)
-        model = MultiOutputRegressor(base)
-        model.partial_fit([features], np.zeros((1,6)))
-        joblib.dump(model, model_file)
+        features, analysis = _extract_features(path, timeline, audio=audio)
+        store.put(checksum, features, analysis, inputs=inputs, peaks=peaks)
+    registry = model_registry(base / "models")
+    model_file = registry.path(fingerprint)
+
+    def new_model():
+        m = MultiOutputRegressor(SGDRegressor(max_iter=1, learning_rate="constant", eta0=0.01))
+        m.partial_fit([features], np.zeros((1, 6)))
+        return m
+
+    model = registry.get(fingerprint, new_model)
     pred = model.predict([features])[0]
     ai_adj = {
         "club": {
@@ -120,4 +173,4 @@ def update_model(model: MultiOutputRegressor, model_file: Path, fingerprint: str
         str_targets["LRA"] - str_measured.get("input_lra", str_targets["LRA"]),
     ]
     model.partial_fit([features], [err])
-    joblib.dump(model, model_file)
+    model_registry(Path(model_file).parent).mark_dirty(fingerprint, model)
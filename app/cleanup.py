@@ -0,0 +1,29 @@
+"""One-off session sweep: ``python -m app.cleanup [--dry-run]``.
+
+Applies the same rules as the in-app janitor (see :mod:`app.janitor`) and
+prints what was removed as JSON, for cron jobs or hosts running with
+``JANITOR=false``.
+"""
+import argparse
+import json
+import sys
+
+import settings
+from .janitor import Janitor
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.cleanup", description="Expire and evict PeakPilot sessions.")
+    ap.add_argument("--root", default="/tmp/peakpilot")
+    ap.add_argument("--max-age-hours", type=float, default=settings.CLEAN_JOBS_AFTER_HOURS)
+    ap.add_argument("--quota-mb", type=int, default=settings.SESSION_QUOTA_MB)
+    ap.add_argument("--dry-run", action="store_true", help="report what would be removed")
+    args = ap.parse_args(argv)
+    j = Janitor(args.root, args.max_age_hours * 3600, args.quota_mb * 1024 * 1024)
+    json.dump(j.sweep(dry_run=args.dry_run), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""sha256/CRC-32/size of session files, computed at most once per file.
+
+Bytes that pass through Python on their way to disk (uploads) are hashed as
+they are written with :class:`HashingWriter`.  Files produced by ffmpeg or
+soundfile are hashed on first request.  Either way the result is memoized by
+file identity ``(st_dev, st_ino)`` and validated against ``st_size`` and
+``st_mtime_ns``, so renames and the render cache's hardlinks keep their
+digests while a rewritten file is hashed again.
+"""
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class Hasher:
+    """Incremental sha256 + CRC-32 + byte count."""
+
+    def __init__(self):
+        self._sha = hashlib.sha256()
+        self._crc = 0
+        self.size = 0
+
+    def update(self, chunk: bytes):
+        self._sha.update(chunk)
+        self._crc = zlib.crc32(chunk, self._crc)
+        self.size += len(chunk)
+
+    def result(self) -> Dict[str, Any]:
+        return {"sha256": self._sha.hexdigest(), "crc32": self._crc & 0xFFFFFFFF, "bytes": self.size}
+
+
+class HashingWriter:
+    """File-like tee: writes to ``fh`` and hashes the same bytes."""
+
+    def __init__(self, fh: BinaryIO):
+        self.fh = fh
+        self.hasher = Hasher()
+
+    def write(self, chunk: bytes) -> int:
+        self.hasher.update(chunk)
+        return self.fh.write(chunk)
+
+
+class DigestMemo:
+    """LRU of digests keyed by file identity and checked against stat data."""
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = max(1, int(capacity))
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, st: os.stat_result) -> Dict[str, Any] | None:
+        with self._lock:
+            hit = self._entries.get((st.st_dev, st.st_ino))
+            if hit is None or hit[0] != (st.st_size, st.st_mtime_ns):
+                return None
+            self._entries.move_to_end((st.st_dev, st.st_ino))
+            return dict(hit[1])
+
+    def put(self, st: os.stat_result, digests: Dict[str, Any]):
+        with self._lock:
+            self._entries[(st.st_dev, st.st_ino)] = ((st.st_size, st.st_mtime_ns), dict(digests))
+            self._entries.move_to_end((st.st_dev, st.st_ino))
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+memo = DigestMemo()
+
+
+def remember(path: str | Path, digests: Dict[str, Any]):
+    """Record digests computed while ``path`` was being written."""
+    st = os.stat(path)
+    if st.st_size == digests["bytes"]:
+        memo.put(st, digests)
+
+
+def file_digests(path: str | Path) -> Dict[str, Any]:
+    """``{"sha256", "crc32", "bytes"}`` for ``path``; reads the file only on a miss."""
+    st = os.stat(path)
+    hit = memo.get(st)
+    if hit is not None:
+        return hit
+    h = Hasher()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    digests = h.result()
+    if os.stat(path).st_mtime_ns == st.st_mtime_ns:
+        memo.put(st, digests)
+    return digests
+
+
+def sha256_of(path: str | Path) -> str:
+    return file_digests(path)["sha256"]
+
+
+def save_stream(stream: BinaryIO, dst: str | Path, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Copy ``stream`` to ``dst`` while hashing it; returns and memoizes the digests."""
+    with open(dst, "wb") as fh:
+        out = HashingWriter(fh)
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            out.write(chunk)
+    digests = out.hasher.result()
+    remember(dst, digests)
+    return digests
+
+
+__all__ = [
+    "Hasher",
+    "HashingWriter",
+    "DigestMemo",
+    "memo",
+    "remember",
+    "file_digests",
+    "sha256_of",
+    "save_stream",
+]
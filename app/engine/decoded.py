@@ -0,0 +1,161 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from .. import metrics
+from ..digests import sha256_of
+
+BLOCK_FRAMES = 1 << 16
+
+
+class DecodedAudio:
+    """Decoded float32 PCM shared by every analysis stage of a job.
+
+    ``data`` is a ``(frames, channels)`` float32 array.  Buffers produced by
+    :func:`decode_audio` are memory-mapped from a raw file in the session
+    directory so the pages are shared and can be evicted by the kernel instead
+    of living on the Python heap.
+    """
+
+    def __init__(self, source: str | Path, data: np.ndarray, sr: int, sha256: str | None = None,
+                 backing: Path | None = None):
+        self.source = Path(source)
+        self.data = data
+        self.sr = int(sr)
+        self._sha256 = sha256
+        self._backing = backing
+        self._mono = None
+        self._mono_path = None
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "DecodedAudio":
+        """Decode ``path`` into memory; used when no session buffer exists."""
+        data, sr = sf.read(str(path), dtype="float32", always_2d=True)
+        return cls(path, data, sr)
+
+    @property
+    def frames(self) -> int:
+        return int(self.data.shape[0])
+
+    @property
+    def channels(self) -> int:
+        return int(self.data.shape[1])
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sr if self.sr else 0.0
+
+    @property
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            self._sha256 = sha256_of(self.source)
+        return self._sha256
+
+    def info(self) -> dict:
+        return {"duration": self.duration, "sr": self.sr, "channels": self.channels}
+
+    def mono(self) -> np.ndarray:
+        """Return the channel average as float32, computed once per buffer."""
+        if self._mono is not None:
+            return self._mono
+        if self.channels == 1:
+            self._mono = self.data[:, 0]
+            return self._mono
+        if self._backing is not None and self.frames:
+            self._mono_path = self._backing.with_suffix(".mono.f32")
+            out = np.memmap(self._mono_path, dtype=np.float32, mode="w+", shape=(self.frames,))
+        else:
+            out = np.empty(self.frames, dtype=np.float32)
+        for i in range(0, self.frames, BLOCK_FRAMES):
+            np.mean(self.data[i : i + BLOCK_FRAMES], axis=1, out=out[i : i + BLOCK_FRAMES])
+        self._mono = out
+        return out
+
+    def release(self):
+        """Drop references to the buffers and delete any backing files."""
+        self.data = np.zeros((0, self.channels), dtype=np.float32)
+        self._mono = None
+        for p in (self._backing, self._mono_path):
+            if p is not None:
+                try:
+                    os.unlink(p)
+                except FileNotFoundError:
+                    pass
+
+
+def _ffprobe_stream(path: str | Path) -> tuple[int, int]:
+    metrics.FFMPEG_LAUNCHES.inc(tool="ffprobe")
+    out = subprocess.check_output(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "a:0",
+            "-show_entries", "stream=sample_rate,channels", "-of", "json", str(path),
+        ]
+    )
+    st = (json.loads(out).get("streams") or [{}])[0]
+    sr, ch = int(st.get("sample_rate") or 0), int(st.get("channels") or 0)
+    if not sr or not ch:
+        raise ValueError("No audio stream found.")
+    return sr, ch
+
+
+def _decode_soundfile(src: Path, raw: Path) -> tuple[np.memmap, int]:
+    with sf.SoundFile(str(src)) as f:
+        sr, ch, frames = f.samplerate, f.channels, f.frames
+        if frames <= 0:
+            raise ValueError("Audio contains no frames.")
+        buf = np.memmap(raw, dtype=np.float32, mode="w+", shape=(frames, ch))
+        pos = 0
+        while pos < frames:
+            n = f.read(min(BLOCK_FRAMES, frames - pos), dtype="float32", always_2d=True, out=buf[pos : pos + BLOCK_FRAMES])
+            if len(n) == 0:
+                break
+            pos += len(n)
+        buf.flush()
+    if pos < frames:
+        # Some compressed formats over-report their length; trim to what decoded.
+        del buf
+        buf = np.memmap(raw, dtype=np.float32, mode="r+", shape=(pos, ch))
+    return buf, sr
+
+
+def _decode_ffmpeg(src: Path, raw: Path) -> tuple[np.memmap, int]:
+    sr, ch = _ffprobe_stream(src)
+    metrics.FFMPEG_LAUNCHES.inc(tool="ffmpeg")
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-hide_banner", "-y", "-v", "error",
+            "-i", str(src), "-map", "0:a:0", "-c:a", "pcm_f32le", "-f", "f32le", str(raw),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    frames = os.path.getsize(raw) // (4 * ch)
+    if frames <= 0:
+        raise ValueError("Audio contains no frames.")
+    return np.memmap(raw, dtype=np.float32, mode="r+", shape=(frames, ch)), sr
+
+
+def decode_audio(src: str | Path, sess_dir: str | Path, sha256: str | None = None) -> DecodedAudio:
+    """Decode ``src`` once into ``<sess_dir>/decoded.f32`` and map it.
+
+    ``soundfile`` handles the common PCM containers; anything it rejects
+    (MP3/AAC/…) is decoded by ffmpeg into the same raw float32 layout.
+    """
+    src = Path(src)
+    raw = Path(sess_dir) / "decoded.f32"
+    try:
+        buf, sr = _decode_soundfile(src, raw)
+    except Exception as sf_err:
+        try:
+            buf, sr = _decode_ffmpeg(src, raw)
+        except Exception:
+            raw.unlink(missing_ok=True)
+            raise sf_err
+    return DecodedAudio(src, buf, sr, sha256=sha256 or sha256_of(src), backing=raw)
+
+
+__all__ = ["DecodedAudio", "decode_audio"]
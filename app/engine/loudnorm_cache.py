@@ -0,0 +1,103 @@
+"""Cache of ffmpeg ``loudnorm`` pass-1 measurements.
+
+The analysis pass reports statistics of the *input* (``input_i``,
+``input_lra``, ``input_tp``, ``input_thresh``); the I/TP targets only affect
+pass 2.  Entries are therefore keyed by the source sha256 plus the analysis
+parameters that can change the measurement, and shared by every target of a
+job – and, through the shared directory, by later uploads of the same file.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ANALYSIS_VERSION = 1
+SESSION_FILE = "loudnorm_cache.json"
+
+_locks: Dict[str, List] = {}  # key -> [lock, holders + waiters]
+_locks_guard = threading.Lock()
+_session_write = threading.Lock()
+
+
+def cache_key(sha256: str, LRA) -> str:
+    return f"{sha256}-ln{ANALYSIS_VERSION}-lra{float(LRA):g}"
+
+
+@contextmanager
+def _key_lock(key: str):
+    """Hold the lock for ``key``; it is dropped once nobody holds or awaits it."""
+    with _locks_guard:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _locks[key]
+
+
+def _write_atomic(path: Path, obj):
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(obj))
+    os.replace(tmp, path)
+
+
+class MeasurementCache:
+    """Pass-1 results stored in the session and optionally in ``shared_dir``."""
+
+    def __init__(self, sess_dir: str | Path, shared_dir: str | Path | None = None):
+        self.session_file = Path(sess_dir) / SESSION_FILE
+        self.shared_dir = Path(shared_dir) if shared_dir else None
+
+    def _session_entries(self) -> dict:
+        try:
+            return json.loads(self.session_file.read_text())
+        except Exception:
+            return {}
+
+    def get(self, key: str) -> dict | None:
+        hit = self._session_entries().get(key)
+        if hit is None and self.shared_dir is not None:
+            try:
+                hit = json.loads((self.shared_dir / f"{key}.json").read_text())
+            except Exception:
+                hit = None
+            if hit is not None:
+                self._put_session(key, hit)
+        return hit
+
+    def _put_session(self, key: str, value: dict):
+        with _session_write:
+            entries = self._session_entries()
+            entries[key] = value
+            _write_atomic(self.session_file, entries)
+
+    def put(self, key: str, value: dict):
+        self._put_session(key, value)
+        if self.shared_dir is not None:
+            try:
+                self.shared_dir.mkdir(parents=True, exist_ok=True)
+                _write_atomic(self.shared_dir / f"{key}.json", value)
+            except OSError:
+                pass
+
+    def get_or_measure(self, key: str, measure: Callable[[], dict]) -> dict:
+        """Return the cached entry for ``key`` or compute it exactly once.
+
+        Concurrent renders of the same source wait for the first measurement
+        instead of running their own analysis pass.
+        """
+        with _key_lock(key):
+            hit = self.get(key)
+            if hit is None:
+                hit = measure()
+                self.put(key, hit)
+            return hit
+
+
+__all__ = ["MeasurementCache", "cache_key"]
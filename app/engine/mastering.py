@@ -6,6 +6,7 @@ from typing import Callable, List
 
 import soundfile as sf
 
+from .. import metrics
 from ..pipeline import update_progress
 
 
@@ -19,6 +20,7 @@ def run_ffmpeg_with_progress(args: List[str], duration_s: float, update: Callabl
     """Run ffmpeg with ``-progress`` and forward percentage to ``update``."""
     args = list(args)
     args[-1:-1] = ["-progress", "pipe:1", "-nostats"]
+    metrics.ffmpeg_launched(args)
     proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd, text=True, bufsize=1)
     last_pct = -1
     try:
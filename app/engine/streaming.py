@@ -0,0 +1,121 @@
+"""Bounded-memory render helpers used when ffmpeg is unavailable.
+
+Everything here works on fixed-size blocks read with ``SoundFile.blocks`` and
+written with ``SoundFile.write``, so memory per job stays constant no matter
+how long the track is.
+"""
+import os
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import firwin
+
+from . import meter
+
+BLOCK_FRAMES = 1 << 16
+
+
+class StreamResampler:
+    """Polyphase rational resampler that can be fed arbitrary chunks.
+
+    Uses the same Kaiser-windowed FIR as ``scipy.signal.resample_poly`` and
+    compensates its group delay, so the concatenated output of all chunks
+    lines up with the input and has ``ceil(n * up / down)`` frames.
+    """
+
+    HALF_LEN = 10
+
+    def __init__(self, sr_in: int, sr_out: int, channels: int):
+        g = gcd(int(sr_in), int(sr_out))
+        self.up, self.down = int(sr_out) // g, int(sr_in) // g
+        self.channels = channels
+        L, M = self.up, self.down
+        n_taps = 2 * self.HALF_LEN * max(L, M) + 1
+        h = firwin(n_taps, 1.0 / max(L, M), window=("kaiser", 5.0)) * L
+        self.Q = -(-n_taps // L)
+        h = np.concatenate((h, np.zeros(self.Q * L - n_taps)))
+        # phases[p, q] = h[p + q * L]
+        self._phases = h.reshape(self.Q, L).T.copy()
+        self._delay = (n_taps - 1) // 2
+        self._buf = np.zeros((self.Q, channels))  # leading zeros = history before t=0
+        self._buf0 = -self.Q  # global input index of _buf[0]
+        self._n_in = 0
+        self._next_out = 0
+
+    def _emit(self, limit: int) -> np.ndarray:
+        """Produce outputs ``_next_out`` .. ``limit - 1`` from the buffer."""
+        if limit <= self._next_out:
+            return np.zeros((0, self.channels))
+        m = np.arange(self._next_out, limit)
+        n = m * self.down + self._delay
+        base = n // self.up - self._buf0
+        taps = base[:, None] - np.arange(self.Q)[None, :]
+        x = self._buf[taps]  # (outputs, Q, channels)
+        y = np.einsum("oqc,oq->oc", x, self._phases[n % self.up])
+        self._next_out = limit
+        keep_from = (self._next_out * self.down + self._delay) // self.up - self.Q + 1 - self._buf0
+        if keep_from > 0:
+            self._buf = self._buf[keep_from:]
+            self._buf0 += keep_from
+        return y
+
+    def _ready(self, n_avail: int) -> int:
+        """Number of outputs whose newest input sample is below ``n_avail``."""
+        return max(self._next_out, (n_avail * self.up - self._delay - 1) // self.down + 1)
+
+    def feed(self, x: np.ndarray) -> np.ndarray:
+        x = meter._as_2d(np.asarray(x, dtype=np.float64))
+        self._buf = np.concatenate((self._buf, x))
+        self._n_in += len(x)
+        return self._emit(self._ready(self._n_in))
+
+    def flush(self) -> np.ndarray:
+        total = -(-self._n_in * self.up // self.down)
+        pad = self.Q + self._delay // self.up + 1
+        self._buf = np.concatenate((self._buf, np.zeros((pad, self.channels))))
+        return self._emit(total)
+
+
+def _layout(block: np.ndarray, stereo: bool) -> np.ndarray:
+    if stereo and block.shape[1] == 1:
+        return np.repeat(block, 2, axis=1)
+    if not stereo and block.shape[1] > 1:
+        return block.mean(axis=1, keepdims=True)
+    return block
+
+
+def measure_file(src: str, stereo: bool = True, block: int = BLOCK_FRAMES) -> meter.Meter:
+    """Meter ``src`` as it will be laid out in the output (mono duplicated)."""
+    with sf.SoundFile(str(src)) as f:
+        m = meter.Meter(f.samplerate, 2 if stereo else 1)
+        for b in f.blocks(blocksize=block, dtype="float64", always_2d=True):
+            m.feed(_layout(b, stereo))
+    return m.finish()
+
+
+def render_gain(src: str, dst: str, gain: float, sr: int | None = None, bits: int = 24, stereo: bool = True,
+                block: int = BLOCK_FRAMES) -> str:
+    """Stream ``src`` to ``dst`` with a linear ``gain``, clipping and resampling.
+
+    The result is written to ``dst + '.part'`` first and renamed on success.
+    """
+    subtype = "PCM_24" if bits == 24 else "PCM_16"
+    part = dst + ".part"
+    with sf.SoundFile(str(src)) as f:
+        sr_out = sr or f.samplerate
+        channels = 2 if stereo else 1
+        rs = StreamResampler(f.samplerate, sr_out, channels) if sr_out != f.samplerate else None
+        with sf.SoundFile(part, "w", samplerate=sr_out, channels=channels, subtype=subtype, format="WAV") as out:
+            for b in f.blocks(blocksize=block, dtype="float64", always_2d=True):
+                y = _layout(b, stereo) * gain
+                if rs is not None:
+                    y = rs.feed(y)
+                out.write(np.clip(y, -1.0, 1.0))
+            if rs is not None:
+                out.write(np.clip(rs.flush(), -1.0, 1.0))
+    os.replace(part, dst)
+    return dst
+
+
+__all__ = ["StreamResampler", "measure_file", "render_gain"]
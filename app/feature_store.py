@@ -0,0 +1,97 @@
+"""Content-addressed store for advisor feature vectors and input analysis.
+
+Each entry is a small uncompressed ``.npz`` holding the feature vector and the
+``analysis`` dict (as UTF-8 JSON bytes), named after the source sha256, the
+store format and :data:`meter.VERSION` (features embed the loudness timeline).
+The pipeline also stores the input measurements (probe info, loudness, the
+timeline, sample peak) and the input waveform peaks, so a repeat upload is
+analysed without decoding a single sample.  The directory is capped by total
+size; reads refresh an entry's mtime so eviction removes the least recently
+used files first.
+"""
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from .engine import meter
+
+FEATURE_VERSION = 2
+
+
+def _json_bytes(obj) -> np.ndarray:
+    return np.frombuffer(json.dumps(obj).encode("utf-8"), dtype=np.uint8)
+
+
+class FeatureStore:
+    def __init__(self, root: str | Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+
+    def _path(self, checksum: str) -> Path:
+        return self.root / f"{checksum}-v{FEATURE_VERSION}-m{meter.VERSION}.npz"
+
+    def load(self, checksum: str) -> Dict[str, Any] | None:
+        """The whole entry: ``features``, ``analysis``, ``inputs`` and ``peaks``
+        (the last two ``None`` when only features were stored)."""
+        p = self._path(checksum)
+        try:
+            with np.load(p, allow_pickle=False) as z:
+                entry = {
+                    "features": z["features"].astype(float),
+                    "analysis": json.loads(z["analysis"].tobytes().decode("utf-8")),
+                    "inputs": json.loads(z["inputs"].tobytes().decode("utf-8")) if "inputs" in z.files else None,
+                    "peaks": z["peaks"].tobytes() if "peaks" in z.files else None,
+                }
+        except (OSError, KeyError, ValueError):
+            return None
+        try:
+            os.utime(p)
+        except OSError:
+            pass
+        return entry
+
+    def get(self, checksum: str) -> Tuple[np.ndarray, Dict[str, Any]] | None:
+        entry = self.load(checksum)
+        return None if entry is None else (entry["features"], entry["analysis"])
+
+    def put(self, checksum: str, features: np.ndarray, analysis: Dict[str, Any],
+            inputs: Dict[str, Any] | None = None, peaks: bytes | None = None):
+        self.root.mkdir(parents=True, exist_ok=True)
+        arrays = {"features": np.asarray(features, dtype=np.float64), "analysis": _json_bytes(analysis)}
+        if inputs is not None:
+            arrays["inputs"] = _json_bytes(inputs)
+        if peaks:
+            arrays["peaks"] = np.frombuffer(peaks, dtype=np.uint8)
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        p = self._path(checksum)
+        tmp = p.with_name(f"{p.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(buf.getvalue())
+        os.replace(tmp, p)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the store fits ``max_bytes``."""
+        with self._lock:
+            entries = []
+            for p in self.root.glob("*.npz"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            total = sum(size for _, size, _ in entries)
+            for _, size, p in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+
+
+__all__ = ["FeatureStore", "FEATURE_VERSION"]
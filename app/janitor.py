@@ -0,0 +1,200 @@
+"""Session reaper: age-based expiry plus a byte quota with LRU eviction.
+
+Every directory under the upload root except the shared stores (``cache``,
+``features``, ``models`` – each capped by its own owner) is a session.  A
+session's last access is the newest mtime of the directory itself (bumped by
+:func:`touch` whenever a file is served), its ``progress.json`` and any
+partial upload.  A sweep deletes sessions idle for longer than
+``CLEAN_JOBS_AFTER_HOURS`` and then, oldest access first, more sessions until
+the total fits ``SESSION_QUOTA_MB``.
+
+Sessions with a job in flight are never removed: the job is known to this
+process (:func:`progress_bus.peek`), or its progress/upload on disk is
+unfinished and was written recently (another worker, or the CLI).  Run
+``python -m app.cleanup`` for a one-off sweep.  Usage figures are those of the
+last sweep, so reporting them never walks the upload tree.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import settings
+from . import progress_bus, uploads
+from .model_registry import model_registry
+
+SHARED_DIRS = frozenset({"cache", "features", "models"})
+GRACE_S = 15 * 60  # sessions touched this recently are never evicted
+
+
+def touch(sess_dir: str | Path):
+    """Record an access to ``sess_dir`` (its mtime is the LRU clock)."""
+    try:
+        os.utime(sess_dir)
+    except OSError:
+        pass
+
+
+def _dir_bytes(path: Path) -> int:
+    """Bytes that deleting ``path`` would free.
+
+    Files with other hard links (masters shared with the render cache) are
+    left out: their data stays on disk, counted against the cache.
+    """
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        for fn in files:
+            try:
+                st = os.lstat(os.path.join(dirpath, fn))
+            except OSError:
+                continue
+            if st.st_nlink <= 1:
+                total += st.st_size
+    return total
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+class Session:
+    def __init__(self, path: Path):
+        self.path = path
+        progress = path / progress_bus.PROGRESS_FILE
+        part = path / uploads.PART
+        self.last_access = max(_mtime(path), _mtime(progress), _mtime(part))
+        self.bytes = _dir_bytes(path)
+        self.unfinished = part.exists() or (path / uploads.META).exists() or self._progress_unfinished(progress)
+
+    @staticmethod
+    def _progress_unfinished(progress: Path) -> bool:
+        try:
+            with progress.open("r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError):
+            return True  # being replaced right now
+        return not data.get("done")
+
+
+class Janitor:
+    def __init__(self, root: str | Path, max_age_s: float, quota_bytes: int, interval: float = 600.0):
+        self.root = Path(root)
+        self.max_age_s = max_age_s
+        self.quota_bytes = int(quota_bytes)
+        self.interval = interval
+        self.reclaimed_bytes = 0
+        self.removed_sessions = 0
+        self.runs = 0
+        self.last_run = None
+        self.usage_bytes = None  # as of the last sweep
+        self.session_count = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def sessions(self) -> List[Session]:
+        try:
+            entries = [p for p in self.root.iterdir() if p.is_dir() and p.name not in SHARED_DIRS]
+        except OSError:
+            return []
+        return [Session(p) for p in entries]
+
+    def in_flight(self, s: Session, now: float) -> bool:
+        if progress_bus.peek(str(s.path)) is not None or now - s.last_access < GRACE_S:
+            return True
+        # unfinished work nobody has touched for max_age_s is abandoned
+        return s.unfinished and now - s.last_access < self.max_age_s
+
+    def sweep(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Expire and evict sessions; returns what was (or would be) removed."""
+        with self._lock:
+            now = time.time()
+            sessions = sorted(self.sessions(), key=lambda s: s.last_access)
+            usage = sum(s.bytes for s in sessions)
+            removed = []
+            for s in sessions:
+                if self.in_flight(s, now):
+                    continue
+                if now - s.last_access > self.max_age_s or usage > self.quota_bytes:
+                    if not dry_run:
+                        shutil.rmtree(s.path, ignore_errors=True)
+                    usage -= s.bytes
+                    removed.append(s)
+            reclaimed = sum(s.bytes for s in removed)
+            if not dry_run:
+                self.reclaimed_bytes += reclaimed
+                self.removed_sessions += len(removed)
+                self.runs += 1
+                self.last_run = now
+                self.usage_bytes = usage
+                self.session_count = len(sessions) - len(removed)
+                try:
+                    model_registry(self.root / "models").gc()
+                except Exception:
+                    pass
+            return {
+                "removed": [s.path.name for s in removed],
+                "reclaimed_bytes": reclaimed,
+                "usage_bytes": usage,
+                "sessions": len(sessions) - len(removed),
+            }
+
+    def usage(self) -> int | None:
+        """Session bytes as of the last sweep (``None`` before the first one)."""
+        return self.usage_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "usage_bytes": self.usage_bytes,
+            "sessions": self.session_count,
+            "quota_bytes": self.quota_bytes,
+            "max_age_hours": self.max_age_s / 3600,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "removed_sessions": self.removed_sessions,
+            "runs": self.runs,
+            "last_run": self.last_run,
+        }
+
+    def start(self):
+        """Sweep every ``interval`` seconds on a daemon thread (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="janitor", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception:
+                pass
+            time.sleep(self.interval)
+
+
+_janitors: Dict[Path, Janitor] = {}
+_janitors_lock = threading.Lock()
+
+
+def janitor(root: str | Path) -> Janitor:
+    """Return the process-wide janitor for ``root``."""
+    key = Path(root).resolve()
+    with _janitors_lock:
+        j = _janitors.get(key)
+        if j is None:
+            j = _janitors[key] = Janitor(
+                key,
+                max_age_s=settings.CLEAN_JOBS_AFTER_HOURS * 3600,
+                quota_bytes=settings.SESSION_QUOTA_MB * 1024 * 1024,
+                interval=settings.JANITOR_INTERVAL_SECONDS,
+            )
+        return j
+
+
+__all__ = ["Janitor", "janitor", "touch"]
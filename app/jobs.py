@@ -0,0 +1,184 @@
+"""Bounded job scheduler for mastering runs.
+
+A fixed pool of worker threads drains a FIFO queue with a hard cap.  Jobs that
+cannot run yet are reported as ``status: "queued"`` with their position and
+an ETA derived from recent job durations; submissions beyond the cap raise
+:class:`QueueFull` so ``/start`` can answer 429 with ``Retry-After``.  A slot
+can be reserved up front (:meth:`JobScheduler.reserve`) by callers that do
+slow work, such as committing an upload, before they submit.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict
+
+import settings
+
+DEFAULT_JOB_SECONDS = 60.0
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("job queue is full")
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(self, job_id: str, fn: Callable, args: tuple, notify: Callable[[int, int], None] | None):
+        self.id = job_id
+        self.fn = fn
+        self.args = args
+        self.notify = notify
+
+
+class Reservation:
+    """A queue slot held until :meth:`JobScheduler.submit` uses it or it is released."""
+
+    def __init__(self, scheduler: "JobScheduler"):
+        self.scheduler = scheduler
+        self.active = True
+
+    def release(self):
+        self.scheduler._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class JobScheduler:
+    def __init__(self, workers: int = 2, max_queue: int = 16):
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self._queue: Deque[Job] = deque()
+        self._running: Dict[str, float] = {}
+        self._reserved = 0
+        self._durations: Deque[float] = deque(maxlen=20)
+        self._cond = threading.Condition()
+        self._threads = []
+
+    # -- stats --------------------------------------------------------------
+    def avg_job_seconds(self) -> float:
+        with self._cond:
+            return sum(self._durations) / len(self._durations) if self._durations else DEFAULT_JOB_SECONDS
+
+    def eta_seconds(self, position: int) -> int:
+        """Rough wait for the job at 1-based queue ``position``."""
+        return int(math.ceil(position / self.workers) * self.avg_job_seconds())
+
+    def retry_after(self) -> int:
+        return max(1, int(math.ceil(self.avg_job_seconds() / self.workers)))
+
+    def full(self) -> bool:
+        with self._cond:
+            return self._full()
+
+    def _full(self) -> bool:
+        return self._waiting_position(len(self._queue) + self._reserved + 1) > self.max_queue
+
+    def _waiting_position(self, index: int) -> int:
+        # queued jobs that an idle worker is about to pick up are not waiting
+        return max(0, index - (self.workers - len(self._running)))
+
+    def position(self, job_id: str) -> int:
+        """1-based queue position, 0 once running or unknown."""
+        with self._cond:
+            for i, job in enumerate(self._queue, 1):
+                if job.id == job_id:
+                    return self._waiting_position(i)
+        return 0
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"workers": self.workers, "running": len(self._running), "queued": len(self._queue),
+                    "reserved": self._reserved, "max_queue": self.max_queue}
+
+    # -- scheduling ---------------------------------------------------------
+    def reserve(self) -> Reservation:
+        """Hold a queue slot (raises :class:`QueueFull` if there is none)."""
+        with self._cond:
+            if self._full():
+                raise QueueFull(self.retry_after())
+            self._reserved += 1
+        return Reservation(self)
+
+    def _release(self, reservation: Reservation):
+        with self._cond:
+            if reservation.active:
+                reservation.active = False
+                self._reserved -= 1
+
+    def submit(self, job_id: str, fn: Callable, *args, notify: Callable[[int, int], None] | None = None,
+               reservation: Reservation | None = None) -> int:
+        """Queue ``fn(*args)``; returns the queue position (0 = starts now).
+
+        ``notify(position, eta_s)`` is called whenever the job's position
+        changes while it waits.  With an active ``reservation`` the job takes
+        the reserved slot and cannot be refused.
+        """
+        with self._cond:
+            if reservation is not None and reservation.active:
+                reservation.active = False
+                self._reserved -= 1
+            elif self._full():
+                raise QueueFull(self.retry_after())
+            self._queue.append(Job(job_id, fn, args, notify))
+            self._ensure_workers()
+            position = self._waiting_position(len(self._queue))
+            self._cond.notify()
+        if position and notify:
+            notify(position, self.eta_seconds(position))
+        return position
+
+    def _ensure_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                job = self._queue.popleft()
+                self._running[job.id] = time.monotonic()
+                waiting = [(self._waiting_position(i), j) for i, j in enumerate(self._queue, 1)]
+            self._announce(waiting)
+            try:
+                job.fn(*job.args)
+            except Exception:
+                pass  # the job records its own failure in progress.json
+            finally:
+                with self._cond:
+                    started = self._running.pop(job.id, None)
+                    if started is not None:
+                        self._durations.append(time.monotonic() - started)
+
+    def _announce(self, waiting):
+        for position, job in waiting:
+            if position and job.notify:
+                try:
+                    job.notify(position, self.eta_seconds(position))
+                except Exception:
+                    pass
+
+
+_scheduler: JobScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def scheduler() -> JobScheduler:
+    """The process-wide scheduler, sized from ``settings``."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(settings.JOB_WORKERS, settings.JOB_QUEUE_MAX)
+        return _scheduler
+
+
+__all__ = ["JobScheduler", "QueueFull", "Reservation", "scheduler"]
@@ -0,0 +1,158 @@
+"""Process-wide registry of advisor models.
+
+Hot models stay in memory behind an LRU cap; new or updated models are marked
+dirty and written by a background flush thread, so ``joblib`` I/O never runs
+on the request path.  The same thread garbage-collects model files that are
+too old or exceed the configured count; a file's mtime is its last use, as
+:meth:`ModelRegistry.get` refreshes it on every load or cache hit.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import joblib
+
+import settings
+
+
+class ModelRegistry:
+    def __init__(self, model_dir: str | Path, capacity: int = 32, flush_interval: float = 5.0,
+                 max_files: int = 500, max_age_s: float = 7 * 24 * 3600):
+        self.model_dir = Path(model_dir)
+        self.capacity = max(1, int(capacity))
+        self.flush_interval = flush_interval
+        self.max_files = max_files
+        self.max_age_s = max_age_s
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._dirty: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def path(self, fingerprint: str) -> Path:
+        return self.model_dir / f"{fingerprint}.joblib"
+
+    def _touch(self, fingerprint: str):
+        try:
+            os.utime(self.path(fingerprint))
+        except OSError:
+            pass  # not flushed yet
+
+    def get(self, fingerprint: str, factory: Callable[[], Any]):
+        """Return the model for ``fingerprint``, loading or creating it once."""
+        with self._lock:
+            model = self._models.get(fingerprint)
+            if model is not None:
+                self._models.move_to_end(fingerprint)
+        if model is not None:
+            self._touch(fingerprint)
+            return model
+        with self._lock:
+            model = self._dirty.get(fingerprint)
+        if model is None:
+            p = self.path(fingerprint)
+            if p.exists():
+                self._touch(fingerprint)
+                try:
+                    model = joblib.load(p)
+                except Exception:
+                    model = None
+            if model is None:
+                model = factory()
+                self.mark_dirty(fingerprint, model)
+        with self._lock:
+            model = self._models.setdefault(fingerprint, model)
+            self._models.move_to_end(fingerprint)
+            while len(self._models) > self.capacity:
+                self._models.popitem(last=False)
+        return model
+
+    def mark_dirty(self, fingerprint: str, model):
+        """Schedule ``model`` to be persisted by the flush thread."""
+        with self._lock:
+            self._dirty[fingerprint] = model
+            if fingerprint in self._models:
+                self._models[fingerprint] = model
+            self._ensure_thread()
+        self._wake.set()
+
+    def flush(self):
+        """Write every dirty model to disk (atomically) now."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        for fingerprint, model in dirty.items():
+            p = self.path(fingerprint)
+            tmp = p.with_name(p.name + ".tmp")
+            try:
+                joblib.dump(model, tmp)
+                os.replace(tmp, p)
+            except Exception:
+                tmp.unlink(missing_ok=True)
+
+    def gc(self):
+        """Delete model files unused for ``max_age_s`` and beyond ``max_files``."""
+        try:
+            files = [(p.stat().st_mtime, p) for p in self.model_dir.glob("*.joblib")]
+        except OSError:
+            return
+        now = time.time()
+        files.sort(reverse=True)
+        with self._lock:
+            in_use = set(self._dirty) | set(self._models)
+        for i, (mtime, p) in enumerate(files):
+            if p.stem in in_use:
+                continue
+            if i >= self.max_files or now - mtime > self.max_age_s:
+                p.unlink(missing_ok=True)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="model-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            self.gc()
+
+
+_registries: Dict[Path, ModelRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def model_registry(model_dir: str | Path) -> ModelRegistry:
+    """Return the process-wide registry for ``model_dir``."""
+    key = Path(model_dir).resolve()
+    with _registries_lock:
+        reg = _registries.get(key)
+        if reg is None:
+            reg = ModelRegistry(
+                key,
+                capacity=settings.MODEL_CACHE_SIZE,
+                flush_interval=settings.MODEL_FLUSH_SECONDS,
+                max_files=settings.MODEL_MAX_FILES,
+                max_age_s=settings.MODEL_MAX_AGE_HOURS * 3600,
+            )
+            _registries[key] = reg
+        return reg
+
+
+@atexit.register
+def flush_all():
+    with _registries_lock:
+        regs = list(_registries.values())
+    for reg in regs:
+        reg.flush()
+
+
+__all__ = ["ModelRegistry", "model_registry", "flush_all"]
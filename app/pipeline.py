@@ -2,18 +2,29 @@ import os
 import json
 import hashlib
 import shlex
+import shutil
 import subprocess
 import signal
+import threading
+from contextlib import contextmanager
 from typing import Dict, Any, Tuple
 from pathlib import Path
 from datetime import datetime
 import time
-import zipfile
-from .ai_module import analyze_track
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .ai_module import analyze_track, feature_store
+from . import digests, metrics, progress_bus
+from .engine.decoded import DecodedAudio, decode_audio
+from .engine import meter, peaks, streaming
+from .engine.loudnorm_cache import MeasurementCache, cache_key
+from .render_cache import RenderCache, render_key
+from .util_fs import write_manifest
+from .zipstream import plan_from_manifest
 
-import numpy as np
 import soundfile as sf
 
+import settings
+
 
 
 def ffprobe_ok(tool: str) -> bool:
@@ -36,6 +47,7 @@ def ffprobe_ok(tool: str) -> bool:
 def run(cmd, timeout=1200):
     if isinstance(cmd, str):
         cmd = shlex.split(cmd)
+    metrics.ffmpeg_launched(cmd)
     try:
         return subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=timeout)
     except subprocess.TimeoutExpired as e:
@@ -54,7 +66,7 @@ def new_session_dir(root: str, session: str) -> str:
 
 
 def progress_path(sess_dir: str) -> str:
-    return os.path.join(sess_dir, "progress.json")
+    return os.path.join(sess_dir, progress_bus.PROGRESS_FILE)
 
 
 def write_json_atomic(path: str, obj: Dict[str, Any]):
@@ -64,6 +76,32 @@ def write_json_atomic(path: str, obj: Dict[str, Any]):
     os.replace(tmp, path)
 
 
+_render_log = threading.local()
+
+
+def _fallback(stage: str):
+    """Count a Python fallback and note it for the render running on this thread."""
+    metrics.FALLBACKS.inc(stage=stage)
+    log = getattr(_render_log, "fallbacks", None)
+    if log is not None:
+        log.append(stage)
+
+
+@contextmanager
+def track_fallbacks():
+    """``with track_fallbacks() as used:`` – collect fallbacks hit on this thread."""
+    _render_log.fallbacks = used = []
+    try:
+        yield used
+    finally:
+        _render_log.fallbacks = None
+
+
+def render_backend() -> str:
+    """Renderer the masters are expected to come from (part of the cache key)."""
+    return "ffmpeg" if shutil.which("ffmpeg") else "python"
+
+
 def make_preview(src: Path, dst: Path, sr: int | None = None, stereo: bool = True):
     """Write a browser-friendly 16-bit WAV preview of ``src`` to ``dst``."""
     dst.parent.mkdir(parents=True, exist_ok=True)
@@ -80,11 +118,12 @@ def make_preview(src: Path, dst: Path, sr: int | None = None, stereo: bool = Tru
         cmd += ["-ac", "2"]
     cmd += [str(tmp)]
     try:
+        metrics.ffmpeg_launched(cmd)
         subprocess.run(cmd, check=True)
         os.replace(tmp, dst)
     except Exception:
+        _fallback("preview")
         try:
-            import shutil
             if tmp.exists():
                 tmp.unlink(missing_ok=True)
             shutil.copyfile(src, dst)
@@ -92,99 +131,71 @@ def make_preview(src: Path, dst: Path, sr: int | None = None, stereo: bool = Tru
             pass
 
 
+PREVIEW_FORMATS = {
+    "opus": {"ext": ".webm", "mime": "audio/webm", "args": ["-c:a", "libopus", "-b:a", "128k", "-ar", "48000", "-f", "webm"]},
+    "aac": {"ext": ".m4a", "mime": "audio/mp4", "args": ["-c:a", "aac", "-b:a", "192k", "-movflags", "+faststart", "-f", "mp4"]},
+}
+
+
+def preview_codecs() -> list[str]:
+    """Compressed preview codecs enabled by ``settings.PREVIEW_CODEC``."""
+    return [c.strip() for c in settings.PREVIEW_CODEC.split(",") if c.strip() in PREVIEW_FORMATS]
+
+
+def compressed_preview_path(wav: Path, codec: str) -> Path:
+    return Path(wav).with_suffix(PREVIEW_FORMATS[codec]["ext"])
+
+
+def encode_preview(wav: Path, codecs: list[str] | None = None) -> list[Path]:
+    """Encode compressed siblings of the WAV preview ``wav``; the WAV stays as fallback.
+
+    Existing siblings are kept, failures are ignored (playback falls back to
+    the WAV).  Returns the siblings that exist afterwards.
+    """
+    done = []
+    for codec in preview_codecs() if codecs is None else codecs:
+        dst = compressed_preview_path(wav, codec)
+        if not dst.exists():
+            tmp = dst.with_name(dst.stem + ".tmp" + dst.suffix)
+            try:
+                run(["ffmpeg", "-nostdin", "-hide_banner", "-y", "-i", str(wav), "-vn",
+                     *PREVIEW_FORMATS[codec]["args"], str(tmp)])
+                os.replace(tmp, dst)
+            except Exception:
+                tmp.unlink(missing_ok=True)
+                continue
+        done.append(dst)
+    return done
+
+
 def read_json(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as fh:
         return json.load(fh)
 
 
 def update_progress(sess_dir: str, **fields):
-    p = progress_path(sess_dir)
-    data = {
-        "pct": 0,
-        "status": "starting",
-        "percent": 0,
-        "phase": "starting",
-        "message": "",
-        "done": False,
-        "error": None,
-        "downloads": {"club": None, "streaming": None, "unlimited": None, "custom": None, "zip": None, "session_json": None},
-        "metrics": {
-            "input": {},
-            "club": {},
-            "streaming": {},
-            "unlimited": {},
-            "custom": {},
-            "advisor": {
-                "recommended_preset": "",
-                "input_I": None,
-                "input_TP": None,
-                "input_LRA": None,
-                "analysis": {},
-                "ai_adjustments": {},
-            },
-        },
-        "timeline": {"sec": [], "short_term": [], "tp_flags": []},
-        "masters": {
-            "club": {"state": "queued", "pct": 0, "message": ""},
-            "streaming": {"state": "queued", "pct": 0, "message": ""},
-            "unlimited": {"state": "queued", "pct": 0, "message": ""},
-            "custom": {"state": "queued", "pct": 0, "message": ""},
-        },
-    }
-    if os.path.exists(p):
-        try:
-            data = read_json(p)
-        except Exception:
-            pass
-    masters = fields.pop("masters", None)
-    data.update({k: v for k, v in fields.items() if v is not None})
-    # keep legacy aliases for callers still expecting percent/phase
-    if "pct" in data:
-        data["percent"] = data["pct"]
-    if "status" in data:
-        data["phase"] = data["status"]
-    if masters:
-        data.setdefault("masters", {})
-        for key, val in masters.items():
-            base = data["masters"].get(key, {"state": "queued", "pct": 0, "message": ""})
-            for k, v in val.items():
-                if v is not None:
-                    base[k] = v
-            data["masters"][key] = base
-    write_json_atomic(p, data)
+    """Merge ``fields`` into the job's in-memory progress (flushed at a bounded rate)."""
+    progress_bus.get(sess_dir).update(**fields)
+
+
+def set_metrics(sess_dir: str, key: str, value: Dict[str, Any]):
+    """Replace ``metrics[key]`` in the job's progress without racing other writers."""
+    progress_bus.get(sess_dir).set_metrics(key, value)
 
 
 def checksum_sha256(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as fh:
-        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+    return digests.sha256_of(path)
 
 
 def sha256_file(path: str | Path) -> str:
-    """Return the sha256 hex digest for ``path``."""
-    h = hashlib.sha256()
-    with open(path, "rb") as fh:
-        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
-            if not chunk:
-                break
-            h.update(chunk)
-    return h.hexdigest()
+    """Return the sha256 hex digest for ``path`` (memoized, see :mod:`app.digests`)."""
+    return digests.sha256_of(path)
 
 
 def sha256_and_size(path: str | Path) -> Tuple[str, int]:
     """Return ``(sha256, size)`` for ``path``."""
-    h = hashlib.sha256()
-    size = 0
-    with open(path, "rb") as fh:
-        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
-            chunk_len = len(chunk)
-            if not chunk_len:
-                break
-            size += chunk_len
-            h.update(chunk)
-    return h.hexdigest(), size
+    d = digests.file_digests(path)
+    return d["sha256"], d["bytes"]
 
 
 def add_output(manifest: dict, key: str, filename_path: str | Path) -> Tuple[str, int]:
@@ -208,6 +219,7 @@ def rename_previews(sess: Path):
         ("club_master_preview.tmp.wav", "club_master_preview.wav"),
         ("stream_master_preview.tmp.wav", "stream_master_preview.wav"),
         ("premaster_unlimited_preview.tmp.wav", "premaster_unlimited_preview.wav"),
+        ("custom_master_preview.tmp.wav", "custom_master_preview.wav"),
     ]
     for a, b in pairs:
         src, dst = sess / a, sess / b
@@ -215,14 +227,29 @@ def rename_previews(sess: Path):
             src.replace(dst)
 
 
-def write_manifest_keyed_by_filename(sess: Path, filenames: list[str]):
+def manifest_entries(sess: Path, filenames: list[str]) -> dict:
     man = {}
     for fn in filenames:
         p = sess / fn
         if not p.exists():
             continue
-        man[fn] = {"filename": fn, "sha256": sha256_file(p), "bytes": p.stat().st_size}
-    (sess / "manifest.json").write_text(json.dumps(man, indent=2))
+        man[fn] = {"filename": fn, **digests.file_digests(p)}
+    return man
+
+
+def add_zip_bundle(sess: Path, man: dict, zip_name: str, members: list[str], ts: int):
+    """Describe a ZIP of ``members`` that is streamed on download, never written.
+
+    The entry records everything needed to rebuild the identical byte layout
+    (member order, timestamp, total size) and a strong ETag derived from the
+    members' hashes.
+    """
+    members = [fn for fn in members if fn in man]
+    plan = plan_from_manifest(sess, members, man, ts)
+    etag = hashlib.sha256(
+        json.dumps([ts, [(fn, man[fn]["sha256"]) for fn in members]]).encode("utf-8")
+    ).hexdigest()
+    man[zip_name] = {"filename": zip_name, "bytes": plan.size, "members": members, "ts": ts, "etag": etag}
 
 
 def sanitize(s: str) -> str:
@@ -238,17 +265,20 @@ def build_final_filenames(stem: str) -> dict:
             "club": f"{stem}__club_master.wav",
             "streaming": f"{stem}__stream_master.wav",
             "unlimited": f"{stem}__premaster_unlimited.wav",
+            "custom": f"{stem}__custom_master.wav",
         },
         "info": {
             "club": f"{stem}__ClubMaster_24b_48k_INFO.txt",
             "streaming": f"{stem}__StreamingMaster_24b_44k1_INFO.txt",
             "unlimited": f"{stem}__UnlimitedPremaster_24b_48k_INFO.txt",
+            "custom": f"{stem}__CustomMaster_24b_INFO.txt",
         },
         "preview": {
             "original": "input_preview.wav",
             "club": "club_master_preview.wav",
             "streaming": "stream_master_preview.wav",
             "unlimited": "premaster_unlimited_preview.wav",
+            "custom": "custom_master_preview.wav",
         },
         "zip": f"{stem}__Masters_AND_INFO.zip",
     }
@@ -262,6 +292,7 @@ def probe_source_info(wav_path: Path) -> dict:
             "-show_entries format=duration -of json "
             f"{shlex.quote(str(wav_path))}"
         )
+        metrics.ffmpeg_launched(cmd)
         out = subprocess.check_output(cmd, shell=True).decode("utf-8", "ignore")
         data = json.loads(out)
         st = (data.get("streams") or [{}])[0]
@@ -350,11 +381,16 @@ def finalize_session(sess_dir: str, metrics: dict, original_name: str, original_
     rename_previews(sess)
 
     names = build_final_filenames(original_stem)
+    variants = []
+    for fn in names["preview"].values():
+        if (sess / fn).exists():
+            variants += [p.name for p in encode_preview(sess / fn)]
 
     moves = {
         "club_master.wav": names["wav"]["club"],
         "stream_master.wav": names["wav"]["streaming"],
         "premaster_unlimited.wav": names["wav"]["unlimited"],
+        "custom_master.wav": names["wav"]["custom"],
     }
     for src, dst in moves.items():
         a, b = sess / src, sess / dst
@@ -367,6 +403,8 @@ def finalize_session(sess_dir: str, metrics: dict, original_name: str, original_
         ("Streaming (44.1k/24, target −9.5 LUFS, −1.0 dBTP)", "streaming"),
         ("Unlimited Premaster (48k/24, peak −6 dBFS)", "unlimited"),
     ]
+    if (sess / names["wav"]["custom"]).exists():
+        info_args.append(("Custom (24-bit)", "custom"))
     for title, key in info_args:
         info_path = sess / names["info"][key]
         write_info_file(
@@ -379,147 +417,165 @@ def finalize_session(sess_dir: str, metrics: dict, original_name: str, original_
             srcinfo,
         )
 
-    zip_path = sess / names["zip"]
-    with zipfile.ZipFile(zip_path, "w") as zf:
-        for fn in names["wav"].values():
-            p = sess / fn
-            if p.exists():
-                zf.write(p, fn)
-        for fn in names["info"].values():
-            p = sess / fn
-            if p.exists():
-                zf.write(p, fn)
-
     man_files = [
         names["wav"]["club"],
         names["wav"]["streaming"],
         names["wav"]["unlimited"],
+        names["wav"]["custom"],
         names["preview"]["original"],
         names["preview"]["club"],
         names["preview"]["streaming"],
         names["preview"]["unlimited"],
+        names["preview"]["custom"],
         names["info"]["club"],
         names["info"]["streaming"],
         names["info"]["unlimited"],
-        names["zip"],
+        names["info"]["custom"],
+        *variants,
     ]
-    write_manifest_keyed_by_filename(sess, man_files)
+    man = manifest_entries(sess, man_files)
+    # the ZIP is streamed from the masters on download instead of being copied to disk
+    add_zip_bundle(sess, man, names["zip"], [*names["wav"].values(), *names["info"].values()], int(time.time()))
+    write_manifest(sess, man)
 
-    pj_path = sess / "progress.json"
-    pj = {}
-    if pj_path.exists():
-        try:
-            pj = json.loads(pj_path.read_text())
-        except Exception:
-            pj = {}
-    pj.update(
-        {
-            "filenames": names,
-            "downloads_ready": True,
-            "done": True,
-            "percent": 100,
-            "stage": "done",
-            "masters": {
-                "club": {"state": "done", "pct": 100, "message": "Ready"},
-                "streaming": {"state": "done", "pct": 100, "message": "Ready"},
-                "unlimited": {"state": "done", "pct": 100, "message": "Ready"},
-            },
-            "metrics": {
-                "input": metrics.get("input", {}),
-                "club": metrics.get("club", {}),
-                "streaming": metrics.get("streaming", {}),
-                "unlimited": metrics.get("unlimited", {}),
-            },
-            "ts": int(time.time()),
-        }
-    )
-    pj_path.write_text(json.dumps(pj, indent=2))
+    with progress_bus.get(sess_dir).edit() as pj:
+        pj.update(
+            {
+                "filenames": names,
+                "downloads_ready": True,
+                "done": True,
+                "percent": 100,
+                "stage": "done",
+                "masters": {
+                    "club": {"state": "done", "pct": 100, "message": "Ready"},
+                    "streaming": {"state": "done", "pct": 100, "message": "Ready"},
+                    "unlimited": {"state": "done", "pct": 100, "message": "Ready"},
+                },
+                "metrics": {
+                    "input": metrics.get("input", {}),
+                    "club": metrics.get("club", {}),
+                    "streaming": metrics.get("streaming", {}),
+                    "unlimited": metrics.get("unlimited", {}),
+                },
+                "ts": int(time.time()),
+            }
+        )
+        if (sess / names["wav"]["custom"]).exists():
+            pj["masters"]["custom"] = {"state": "done", "pct": 100, "message": "Ready"}
+            pj["metrics"]["custom"] = metrics.get("custom", {})
 
 
-def _read_mono(path: str):
-    data, sr = sf.read(path)
-    if data.ndim > 1:
-        data = data.mean(axis=1)
-    return data.astype(np.float64), sr
+def ffprobe_info(src) -> Dict[str, Any]:
+    if isinstance(src, DecodedAudio):
+        return src.info()
+    with sf.SoundFile(src) as f:
+        return {"duration": f.frames / f.samplerate, "sr": f.samplerate, "channels": f.channels}
 
 
-def ffprobe_info(path: str) -> Dict[str, Any]:
-    with sf.SoundFile(path) as f:
-        return {"duration": f.frames / f.samplerate, "sr": f.samplerate, "channels": f.channels}
+MAX_DURATION_S = 20 * 60
+SUPPORTED_CHANNELS = (1, 2)
 
 
 def validate_upload(info: Dict[str, Any]):
-    if info["duration"] <= 0 or info["duration"] > 20 * 60:
+    if info["duration"] <= 0 or info["duration"] > MAX_DURATION_S:
         raise ValueError("Audio must be 0–20 minutes.")
-    if info["channels"] not in (1, 2):
+    if info["channels"] not in SUPPORTED_CHANNELS:
         raise ValueError("Only mono or stereo supported.")
 
 
-def measure_loudnorm_json(path: str) -> Dict[str, float]:
-    data, sr = _read_mono(path)
-    rms = np.sqrt(np.mean(data ** 2)) + 1e-9
-    I = 20 * np.log10(rms)
-    peak = np.max(np.abs(data)) + 1e-9
-    TP = 20 * np.log10(peak)
-    LRA = float(
-        np.percentile(20 * np.log10(np.abs(data) + 1e-9), 95)
-        - np.percentile(20 * np.log10(np.abs(data) + 1e-9), 10)
-    )
-    return {"input_i": I, "input_tp": TP, "input_lra": LRA, "input_thresh": -60.0}
+def meter_audio(src, observers=()) -> meter.Meter:
+    """Run the BS.1770 meter over ``src`` in a single blockwise pass.
 
+    ``src`` may be a :class:`DecodedAudio` (metered from its shared buffer) or
+    a path, which is streamed from disk without loading it whole; in that case
+    ``observers`` are fed the same blocks (see :func:`meter.measure_file`).
+    """
+    if isinstance(src, DecodedAudio):
+        return meter.measure(src.data, src.sr)
+    return meter.measure_file(str(src), observers=observers)
 
-def measure_peak_dbfs(path: str) -> float:
-    data, _ = _read_mono(path)
-    peak = np.max(np.abs(data)) + 1e-9
-    return 20 * np.log10(peak)
 
+def peaks_path(sess_dir: str, key: str) -> Path:
+    return Path(sess_dir) / "peaks" / f"{key}.peaks"
+
+
+def write_peaks(sess_dir: str, key: str, result) -> None:
+    """Save a waveform pyramid; a failure here never fails the job."""
+    try:
+        result().save(peaks_path(sess_dir, key))
+    except Exception:
+        pass
+
+
+def measure_loudnorm_json(src) -> Dict[str, float]:
+    """Gated integrated loudness, true peak, LRA and gate threshold of ``src``."""
+    m = src if isinstance(src, meter.Meter) else meter_audio(src)
+    return m.loudnorm_json()
 
-def ebur128_timeline(path: str) -> Dict[str, list]:
-    data, sr = _read_mono(path)
-    win = sr // 10
-    sec, st, tp = [], [], []
-    for i in range(0, len(data), win):
-        seg = data[i : i + win]
-        if len(seg) == 0:
-            continue
-        rms = np.sqrt(np.mean(seg ** 2)) + 1e-9
-        st.append(20 * np.log10(rms))
-        sec.append(i / sr)
-        tp.append(1 if np.max(np.abs(seg)) > 0.99 else 0)
-    return {"sec": sec, "short_term": st, "tp_flags": tp}
+
+def measure_peak_dbfs(src) -> float:
+    m = src if isinstance(src, meter.Meter) else meter_audio(src)
+    return m.sample_peak_db
+
+
+def ebur128_timeline(src) -> Dict[str, list]:
+    """K-weighted 10 Hz short-term/momentary loudness timeline of ``src``."""
+    m = src if isinstance(src, meter.Meter) else meter_audio(src)
+    return m.timeline()
 
 
 def _loudnorm_two_pass_py(src, dst, I, TP, LRA=11, sr=None, bits=24, smart_limiter=False, stereo=True):
-    data, _ = _read_mono(src)
-    target = 10 ** (I / 20)
-    rms = np.sqrt(np.mean(data ** 2)) + 1e-9
-    gain = target / rms
-    out = np.clip(data * gain, -1.0, 1.0)
-    if stereo:
-        out = np.column_stack((out, out))
-    sr = sr or 48000
-    subtype = "PCM_24" if bits == 24 else "PCM_16"
-    sf.write(dst, out, sr, subtype=subtype)
-    return dst
+    """Streaming fallback: meter the source (pass 1), then apply gain (pass 2).
+
+    Works block by block, so memory stays bounded however long the file is.
+    """
+    m = streaming.measure_file(src, stereo=stereo)
+    gain = 10 ** ((I - m.integrated) / 20)
+    return streaming.render_gain(src, dst, gain, sr=sr or 48000, bits=bits, stereo=stereo)
+
+
+def loudnorm_measure(src, I, TP, LRA=11) -> Dict[str, Any]:
+    """Run the ffmpeg ``loudnorm`` analysis pass and return its JSON stats."""
+    cmd1 = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-y",
+        "-i", src,
+        "-af", f"loudnorm=I={I}:LRA={LRA}:TP={TP}:print_format=json",
+        "-f", "null", "-",
+    ]
+    r1 = run(cmd1)
+    import re
+    m = re.search(r"\{.*\}", r1.stdout or r1.stderr, re.S)
+    lj = json.loads(m.group(0)) if m else {}
+    if lj.get("input_i") is None:
+        raise RuntimeError("loudnorm analysis produced no measurements")
+    return {k: lj.get(k) for k in ("input_i", "input_lra", "input_tp", "input_thresh")}
 
 
-def loudnorm_two_pass(src, dst, I, TP, LRA=11, sr=None, bits=24, smart_limiter=False, stereo=True):
+def cached_loudnorm_measure(src, sess_dir: str, sha256: str, I, TP, LRA=11) -> Dict[str, Any] | None:
+    """Pass-1 measurements for ``src`` via the session/shared measurement cache.
+
+    Returns ``None`` when ffmpeg cannot analyze the file so callers fall back.
+    """
+    shared = None
+    if settings.MEASURE_CACHE:
+        shared = settings.MEASURE_CACHE_DIR or os.path.join(os.path.dirname(os.path.abspath(sess_dir)), "cache", "loudnorm")
+    cache = MeasurementCache(sess_dir, shared)
+    try:
+        return cache.get_or_measure(cache_key(sha256, LRA), lambda: loudnorm_measure(src, I, TP, LRA))
+    except Exception:
+        return None
+
+
+def loudnorm_two_pass(src, dst, I, TP, LRA=11, sr=None, bits=24, smart_limiter=False, stereo=True, measured=None):
     """Two-pass loudness normalization using ffmpeg with safe resampling.
 
-    Falls back to a simple Python implementation when ffmpeg is unavailable."""
+    ``measured`` holds pass-1 stats (see :func:`cached_loudnorm_measure`);
+    when given, only the render pass runs.  Falls back to a simple Python
+    implementation when ffmpeg is unavailable."""
     sr = sr or 48000
     try:
         # Pass 1: analyze
-        cmd1 = [
-            "ffmpeg", "-nostdin", "-hide_banner", "-y",
-            "-i", src,
-            "-af", f"loudnorm=I={I}:LRA={LRA}:TP={TP}:print_format=json",
-            "-f", "null", "-",
-        ]
-        r1 = run(cmd1)
-        import json, re
-        m = re.search(r"\{.*\}", r1.stdout or r1.stderr, re.S)
-        lj = json.loads(m.group(0)) if m else {}
+        lj = measured or loudnorm_measure(src, I, TP, LRA)
         meas_I = lj.get("input_i")
         meas_LRA = lj.get("input_lra")
         meas_TP = lj.get("input_tp")
@@ -561,11 +617,12 @@ def loudnorm_two_pass(src, dst, I, TP, LRA=11, sr=None, bits=24, smart_limiter=F
         return dst
     except Exception:
         # fallback
+        _fallback("loudnorm")
         return _loudnorm_two_pass_py(src, dst, I, TP, LRA=LRA, sr=sr, bits=bits, smart_limiter=smart_limiter, stereo=stereo)
 
 
-def normalize_peak_to(src, dst, peak_dbfs=-6.0, sr=48000, bits=24, stereo=True):
-    in_peak = measure_peak_dbfs(src)
+def normalize_peak_to(src, dst, peak_dbfs=-6.0, sr=48000, bits=24, stereo=True, in_peak_dbfs=None):
+    in_peak = measure_peak_dbfs(src) if in_peak_dbfs is None else in_peak_dbfs
     gain_db = peak_dbfs - in_peak
     part = dst + ".part"
     cmd = [
@@ -593,48 +650,244 @@ def normalize_peak_to(src, dst, peak_dbfs=-6.0, sr=48000, bits=24, stereo=True):
         os.replace(part, dst)
         return dst
     except Exception:
-        # simple pure-python fallback
-        data, sr_in = sf.read(src, dtype='float32')
-        peak = np.max(np.abs(data)) or 1.0
-        target = 10 ** (peak_dbfs / 20.0)
-        gain = target / peak
-        data = data * gain
-        if stereo and data.ndim == 1:
-            data = np.column_stack((data, data))
-        subtype = 'PCM_24' if bits == 24 else 'PCM_16'
-        sf.write(dst, data, sr if sr else sr_in, subtype=subtype)
-        return dst
+        # streaming pure-python fallback; the gain is already known from the peak
+        _fallback("peak")
+        return streaming.render_gain(src, dst, 10 ** (gain_db / 20.0), sr=sr, bits=bits, stereo=stereo)
+
 
+def post_verify(path: str, target_I: float, target_TP: float, measured: meter.Meter | None = None) -> Tuple[bool, float, float]:
+    """Verify integrated loudness and true peak of ``path`` against the targets.
 
-def post_verify(path: str, target_I: float, target_TP: float) -> Tuple[bool, float, float]:
-    """Verify loudness and true peak of path using ffmpeg ebur128."""
+    Pass ``measured`` to reuse a meter pass that already covered ``path``.
+    """
     try:
-        cmd = [
-            "ffmpeg", "-nostdin", "-hide_banner", "-y",
-            "-i", path,
-            "-filter_complex", "ebur128=peak=true",
-            "-f", "null", "-",
-        ]
-        r = run(cmd)
-        out = r.stderr
+        m = measured or meter_audio(path)
+        I, TP = m.integrated, m.true_peak_db
         with open(path + ".check.txt", "w", encoding="utf-8") as fh:
-            fh.write(out)
-        I = TP = None
-        import re
-        mI = re.search(r"Integrated loudness: *(-?\d+\.?\d*) LUFS", out)
-        mTP = re.search(r"True peak: *(-?\d+\.?\d*) dBTP", out)
-        if mI:
-            I = float(mI.group(1))
-        if mTP:
-            TP = float(mTP.group(1))
-        if I is None or TP is None:
-            return True, I or 0.0, TP or 0.0
+            fh.write(
+                f"Integrated loudness: {I:.1f} LUFS\n"
+                f"Loudness range: {m.lra:.1f} LU\n"
+                f"True peak: {TP:.1f} dBTP\n"
+                f"Sample peak: {m.sample_peak_db:.1f} dBFS\n"
+            )
         ok = not (TP > target_TP + 0.2 or abs(I - target_I) > 0.3)
         return ok, I, TP
     except Exception:
         return True, 0.0, 0.0
 
 
+def master_targets(ai_adj: Dict[str, Any], params: Dict[str, Any] | None = None) -> list[dict]:
+    """Return the render specs for this job in display order.
+
+    The ``custom`` slot is only rendered when the form carries ``custom_I``.
+    """
+    params = params or {}
+    targets = [
+        {
+            "key": "club", "wav": "club_master.wav", "preview": "club_master_preview.wav",
+            "mode": "loudnorm", "I": -7.2 + ai_adj["club"]["dI"], "TP": -1.0 + ai_adj["club"]["dTP"],
+            "LRA": 11, "sr": 48000, "pct": 45, "message": "Rendering Club…",
+        },
+        {
+            "key": "streaming", "wav": "stream_master.wav", "preview": "stream_master_preview.wav",
+            "mode": "loudnorm", "I": -9.5 + ai_adj["streaming"]["dI"], "TP": -1.5 + ai_adj["streaming"]["dTP"],
+            "LRA": 11, "sr": 44100, "pct": 70, "message": "Rendering Streaming…",
+        },
+        {
+            "key": "unlimited", "wav": "premaster_unlimited.wav", "preview": "premaster_unlimited_preview.wav",
+            "mode": "peak", "peak": -6.0, "sr": 48000, "pct": 85, "message": "Preparing Unlimited Premaster…",
+        },
+    ]
+    if str(params.get("custom_I") or "").strip():
+        targets.append(
+            {
+                "key": "custom", "wav": "custom_master.wav", "preview": "custom_master_preview.wav",
+                "mode": "loudnorm", "I": float(params["custom_I"]), "TP": float(params.get("custom_TP") or -1.0),
+                "LRA": 11, "sr": int(params.get("custom_sr") or 48000), "pct": 90, "message": "Rendering Custom…",
+            }
+        )
+    return targets
+
+
+def render_cache(sess_dir: str) -> RenderCache | None:
+    """The shared render cache for sessions under ``sess_dir``'s root."""
+    if not settings.RENDER_CACHE:
+        return None
+    root = settings.RENDER_CACHE_DIR or os.path.join(os.path.dirname(os.path.abspath(sess_dir)), "cache", "renders")
+    return RenderCache(root, settings.RENDER_CACHE_MB * 1024 * 1024)
+
+
+def render_workers(n_targets: int) -> int:
+    """Number of masters to render concurrently (1 means serial)."""
+    if not settings.PARALLEL_RENDER:
+        return 1
+    limit = settings.RENDER_WORKERS or (os.cpu_count() or 1)
+    return max(1, min(n_targets, limit))
+
+
+def render_target(target: dict, src_path: str, sess_dir: str, peak_in: float, src_sha256: str | None = None) -> dict:
+    """Render, verify and preview one master; returns its metrics.
+
+    Safe to run concurrently for different targets of the same session; the
+    loudnorm analysis pass is shared between them through the measurement
+    cache when ``src_sha256`` is known.
+    """
+    key = target["key"]
+    update_progress(sess_dir, masters={key: {"state": "rendering", "pct": 0, "message": "Rendering..."}})
+    out_wav = os.path.join(sess_dir, target["wav"])
+    with metrics.stage("render", target=key):
+        if target["mode"] == "peak":
+            normalize_peak_to(src_path, out_wav, peak_dbfs=target["peak"], sr=target["sr"], bits=24, in_peak_dbfs=peak_in)
+        else:
+            measured = None
+            if src_sha256:
+                measured = cached_loudnorm_measure(src_path, sess_dir, src_sha256, target["I"], target["TP"], target["LRA"])
+            loudnorm_two_pass(
+                src_path, out_wav, I=target["I"], TP=target["TP"], LRA=target["LRA"], sr=target["sr"], bits=24,
+                measured=measured,
+            )
+    return finish_target(target, sess_dir)
+
+
+def finish_target(target: dict, sess_dir: str) -> dict:
+    """Verify a rendered master, write its preview (unless one exists) and metrics."""
+    key = target["key"]
+    out_wav = os.path.join(sess_dir, target["wav"])
+    update_progress(sess_dir, masters={key: {"state": "finalizing", "pct": 99, "message": "Finalizing..."}})
+    with metrics.stage("verify", target=key):
+        pb = peaks.PeakBuilder()
+        m_out = meter_audio(out_wav, observers=[pb])
+        write_peaks(sess_dir, key, lambda: pb.finish(m_out.sr))
+        ln_out = measure_loudnorm_json(m_out)
+        if target["mode"] == "peak":
+            peak_out = measure_peak_dbfs(m_out)
+            ok = abs(peak_out - target["peak"]) <= 0.3
+        else:
+            peak_out = None
+            ok, _, _ = post_verify(out_wav, target["I"], target["TP"], measured=m_out)
+    if not ok:
+        metrics.VERIFY_FAILURES.inc(target=key)
+    with metrics.stage("preview", target=key):
+        preview = Path(sess_dir) / target["preview"]
+        if not preview.exists():
+            make_preview(Path(out_wav), preview, sr=target["sr"], stereo=True)
+        encode_preview(preview)
+    info_out = ffprobe_info(out_wav)
+    result = {
+        "lufs_integrated": ln_out["input_i"],
+        "true_peak_db": ln_out["input_tp"],
+        "lra": ln_out["input_lra"],
+        "peak_dbfs": peak_out,
+        "duration_sec": info_out["duration"],
+        "sr": info_out["sr"],
+        "bits": 24,
+        "sha256": sha256_file(out_wav),
+    }
+    set_metrics(sess_dir, key, result)
+    if ok:
+        update_progress(sess_dir, masters={key: {"state": "done", "pct": 100, "message": "Ready"}})
+    else:
+        update_progress(sess_dir, masters={key: {"state": "error", "pct": 100, "message": "Verify failed"}})
+    return result
+
+
+MASTER_TAGS = [
+    "-metadata", "encoded_by=PeakPilot",
+    "-metadata", "software=PeakPilot",
+    "-metadata", "comment=Mastered by PeakPilot",
+    "-metadata", "IENG=PeakPilot",
+    "-metadata", "ICMT=Mastered by PeakPilot",
+]
+
+
+def fused_render_cmd(targets: list[dict], src_path: str, sess_dir: str, peak_in: float,
+                     measured: Dict[str, Dict[str, Any]]) -> list[str]:
+    """Build one ffmpeg invocation that renders every master and its preview.
+
+    The source is decoded once and ``asplit`` into a chain per target (the
+    same loudnorm/volume/resample filters the separate renders use); each
+    chain is split again into the 24-bit master and the 16-bit preview.
+    """
+    chains = [f"[0:a]asplit={len(targets)}" + "".join(f"[in{i}]" for i in range(len(targets)))]
+    outputs = []
+    for i, t in enumerate(targets):
+        if t["mode"] == "peak":
+            chain = f"volume={t['peak'] - peak_in:.2f}dB"
+        else:
+            lj = measured[t["key"]]
+            chain = (
+                f"loudnorm=I={t['I']}:LRA={t['LRA']}:TP={t['TP']}:"
+                f"measured_I={lj.get('input_i')}:measured_LRA={lj.get('input_lra')}:"
+                f"measured_TP={lj.get('input_tp')}:measured_thresh={lj.get('input_thresh')}:"
+                "linear=true:print_format=json"
+            )
+        if t["sr"] == 44100 and t["mode"] != "peak":
+            chain += ",aresample=44100:resampler=soxr:dither_method=triangular:precision=28"
+        else:
+            chain += f",aresample={t['sr']}"
+        chains.append(f"[in{i}]{chain},asplit=2[m{i}][p{i}]")
+        master_part = os.path.join(sess_dir, t["wav"] + ".part")
+        preview_tmp = os.path.join(sess_dir, Path(t["preview"]).stem + ".tmp.wav")
+        outputs += ["-map", f"[m{i}]", "-ac", "2", "-c:a", "pcm_s24le", *MASTER_TAGS, "-f", "wav", master_part]
+        outputs += ["-map", f"[p{i}]", "-ac", "2", "-c:a", "pcm_s16le", "-f", "wav", preview_tmp]
+    return [
+        "ffmpeg", "-nostdin", "-hide_banner", "-y",
+        "-i", src_path,
+        "-filter_complex", ";".join(chains),
+        *outputs,
+    ]
+
+
+def fused_render(targets: list[dict], src_path: str, sess_dir: str, peak_in: float, src_sha256: str,
+                 duration_s: float | None = None) -> bool:
+    """Render all ``targets`` with a single ffmpeg process.
+
+    ffmpeg's ``-progress`` output is mapped onto the job (15 → 95 %) and onto
+    every target's ``masters`` entry while it runs.  Returns ``False``
+    (leaving nothing behind) if the fused graph cannot be run, in which case
+    the caller renders each target separately.
+    """
+    from .engine import mastering
+    measured = {}
+    for t in targets:
+        if t["mode"] != "peak":
+            lj = cached_loudnorm_measure(src_path, sess_dir, src_sha256, t["I"], t["TP"], t["LRA"])
+            if lj is None:
+                return False
+            measured[t["key"]] = lj
+    update_progress(
+        sess_dir, masters={t["key"]: {"state": "rendering", "pct": 0, "message": "Rendering..."} for t in targets}
+    )
+    sess = Path(sess_dir)
+    parts = [(sess / (t["wav"] + ".part"), sess / t["wav"]) for t in targets]
+    parts += [(sess / (Path(t["preview"]).stem + ".tmp.wav"), sess / t["preview"]) for t in targets]
+    if duration_s is None:
+        try:
+            duration_s = ffprobe_info(src_path)["duration"]
+        except Exception:
+            duration_s = 0.0
+
+    def on_progress(pct: int):
+        update_progress(sess_dir, pct=15 + int(80 * pct / 100), masters={t["key"]: {"pct": pct} for t in targets})
+
+    try:
+        started = time.perf_counter()
+        mastering.run_ffmpeg_with_progress(
+            fused_render_cmd(targets, src_path, sess_dir, peak_in, measured), duration_s, on_progress
+        )
+        # every master was rendered by this one process: each gets its wall time
+        elapsed = time.perf_counter() - started
+        for t in targets:
+            metrics.STAGE_SECONDS.observe(elapsed, stage="render", target=t["key"])
+        if any(not a.exists() or a.stat().st_size == 0 for a, _ in parts):
+            raise RuntimeError("ffmpeg fused render failed")
+    except Exception:
+        for a, _ in parts:
+            a.unlink(missing_ok=True)
+        return False
+    for a, b in parts:
+        os.replace(a, b)
+    return True
 
 
 def run_pipeline(
@@ -648,178 +901,141 @@ def run_pipeline(
     original_stem: str,
 ):
     current_target = None
+    audio = None
+    started = time.perf_counter()
+    outcome = "error"
     try:
-        update_progress(sess_dir, pct=5, status="analyzing", message="Analyzing input…")
-        info = ffprobe_info(src_path)
-        validate_upload(info)
-        ln_in = measure_loudnorm_json(src_path)
-        tl = ebur128_timeline(src_path)
-        peak_in = measure_peak_dbfs(src_path)
-        _, ai_adj, _, _, fingerprint, analysis = analyze_track(Path(src_path), tl)
-
-        data = read_json(progress_path(sess_dir))
-        data["metrics"]["advisor"].update(
-            {
-                "input_I": ln_in.get("input_i"),
-                "input_TP": ln_in.get("input_tp"),
-                "input_LRA": ln_in.get("input_lra"),
-                "analysis": analysis,
-                "ai_adjustments": ai_adj,
+        update_progress(sess_dir, pct=5, status="analyzing", message="Analyzing input…", queue_position=0, eta_s=0)
+        # hashed while uploading; a file seen before is analysed from the store
+        sha = digests.sha256_of(src_path)
+        stored = feature_store(Path(sess_dir).parent).load(sha)
+        inputs = peaks_in = None
+        with metrics.stage("analysis"):
+            if stored is not None and stored["inputs"] is not None:
+                info, ln_in, tl, peak_in = (stored["inputs"][k] for k in ("info", "loudnorm", "timeline", "peak_dbfs"))
+                validate_upload(info)
+                if stored["peaks"]:
+                    write_peaks(sess_dir, "input", lambda: peaks.Peaks.from_bytes(stored["peaks"]))
+            else:
+                # decode once; every measurement and the AI advisor share this buffer
+                audio = decode_audio(src_path, sess_dir, sha256=sha)
+                info = ffprobe_info(audio)
+                validate_upload(info)
+                m_in = meter_audio(audio)
+                write_peaks(sess_dir, "input", lambda: peaks.from_array(audio.mono(), audio.sr))
+                ln_in = measure_loudnorm_json(m_in)
+                tl = ebur128_timeline(m_in)
+                peak_in = measure_peak_dbfs(m_in)
+                inputs = {"info": info, "loudnorm": ln_in, "timeline": tl, "peak_dbfs": peak_in}
+                try:
+                    peaks_in = peaks_path(sess_dir, "input").read_bytes()
+                except OSError:
+                    pass
+        with metrics.stage("advisor"):
+            _, ai_adj, _, _, fingerprint, analysis = analyze_track(
+                Path(src_path), tl, audio=audio, checksum=sha, inputs=inputs, peaks=peaks_in
+            )
+
+        with progress_bus.get(sess_dir).edit() as data:
+            data["metrics"].setdefault("advisor", {}).update(
+                {
+                    "input_I": ln_in.get("input_i"),
+                    "input_TP": ln_in.get("input_tp"),
+                    "input_LRA": ln_in.get("input_lra"),
+                    "analysis": analysis,
+                    "ai_adjustments": ai_adj,
+                }
+            )
+            data["metrics"]["input"] = {
+                "lufs_integrated": ln_in["input_i"],
+                "true_peak_db": ln_in["input_tp"],
+                "lra": ln_in["input_lra"],
+                "peak_dbfs": peak_in,
+                "duration_sec": info["duration"],
             }
-        )
-        data["metrics"]["input"] = {
-            "lufs_integrated": ln_in["input_i"],
-            "true_peak_db": ln_in["input_tp"],
-            "lra": ln_in["input_lra"],
-            "peak_dbfs": peak_in,
-            "duration_sec": info["duration"],
-        }
-        data["timeline"] = tl
-        write_json_atomic(progress_path(sess_dir), data)
+            data["timeline"] = tl
 
         update_progress(sess_dir, pct=15, status="mastering", message="Dialing in reference curve…")
 
-        # --- club master ----------------------------------------------------
-        current_target = "club"
-        update_progress(
-            sess_dir,
-            pct=45,
-            status="mastering",
-            message="Rendering Club…",
-            masters={"club": {"state": "rendering", "pct": 0, "message": "Rendering..."}},
-        )
-        club_wav = os.path.join(sess_dir, "club_master.wav")
-        loudnorm_two_pass(
-            src_path,
-            club_wav,
-            I=-7.2 + ai_adj["club"]["dI"],
-            TP=-1.0 + ai_adj["club"]["dTP"],
-            LRA=11,
-            sr=48000,
-            bits=24,
-        )
-        update_progress(sess_dir, masters={"club": {"state": "finalizing", "pct": 99, "message": "Finalizing..."}})
-        ok_club, _, _ = post_verify(
-            club_wav, -7.2 + ai_adj["club"]["dI"], -1.0 + ai_adj["club"]["dTP"]
-        )
-        make_preview(
-            Path(sess_dir) / "club_master.wav",
-            Path(sess_dir) / "club_master_preview.wav",
-            sr=48000,
-            stereo=True,
-        )
-        club_metrics = measure_loudnorm_json(club_wav)
-        info_out = ffprobe_info(club_wav)
-        sha = sha256_file(club_wav)
-        d = read_json(progress_path(sess_dir))
-        d["metrics"]["club"] = {
-            "lufs_integrated": club_metrics["input_i"],
-            "true_peak_db": club_metrics["input_tp"],
-            "lra": club_metrics["input_lra"],
-            "peak_dbfs": None,
-            "duration_sec": info_out["duration"],
-            "sr": info_out["sr"],
-            "bits": 24,
-            "sha256": sha,
-        }
-        write_json_atomic(progress_path(sess_dir), d)
-        if ok_club:
-            update_progress(sess_dir, masters={"club": {"state": "done", "pct": 100, "message": "Ready"}})
-        else:
-            update_progress(sess_dir, masters={"club": {"state": "error", "pct": 100, "message": "Verify failed"}})
-
-        # --- streaming master ----------------------------------------------
-        current_target = "stream"
-        update_progress(
-            sess_dir,
-            pct=70,
-            status="mastering",
-            message="Rendering Streaming…",
-            masters={"streaming": {"state": "rendering", "pct": 0, "message": "Rendering..."}},
-        )
-        streaming_wav = os.path.join(sess_dir, "stream_master.wav")
-        loudnorm_two_pass(
-            src_path,
-            streaming_wav,
-            I=-9.5 + ai_adj["streaming"]["dI"],
-            TP=-1.5 + ai_adj["streaming"]["dTP"],
-            LRA=11,
-            sr=44100,
-            bits=24,
-        )
-        update_progress(sess_dir, masters={"streaming": {"state": "finalizing", "pct": 99, "message": "Finalizing..."}})
-        ok_stream, _, _ = post_verify(
-            streaming_wav, -9.5 + ai_adj["streaming"]["dI"], -1.5 + ai_adj["streaming"]["dTP"]
-        )
-        make_preview(
-            Path(sess_dir) / "stream_master.wav",
-            Path(sess_dir) / "stream_master_preview.wav",
-            sr=44100,
-            stereo=True,
-        )
-        str_metrics = measure_loudnorm_json(streaming_wav)
-        info_out = ffprobe_info(streaming_wav)
-        sha = sha256_file(streaming_wav)
-        d = read_json(progress_path(sess_dir))
-        d["metrics"]["streaming"] = {
-            "lufs_integrated": str_metrics["input_i"],
-            "true_peak_db": str_metrics["input_tp"],
-            "lra": str_metrics["input_lra"],
-            "peak_dbfs": None,
-            "duration_sec": info_out["duration"],
-            "sr": info_out["sr"],
-            "bits": 24,
-            "sha256": sha,
-        }
-        write_json_atomic(progress_path(sess_dir), d)
-        if ok_stream:
-            update_progress(sess_dir, masters={"streaming": {"state": "done", "pct": 100, "message": "Ready"}})
-        else:
-            update_progress(sess_dir, masters={"streaming": {"state": "error", "pct": 100, "message": "Verify failed"}})
-
-        # --- premaster ------------------------------------------------------
-        current_target = "unlimited"
-        update_progress(
-            sess_dir,
-            pct=85,
-            status="mastering",
-            message="Preparing Unlimited Premaster…",
-            masters={"unlimited": {"state": "rendering", "pct": 0, "message": "Rendering..."}},
-        )
-        premaster_wav = os.path.join(sess_dir, "premaster_unlimited.wav")
-        normalize_peak_to(src_path, premaster_wav, peak_dbfs=-6.0, sr=48000, bits=24)
-        update_progress(sess_dir, masters={"unlimited": {"state": "finalizing", "pct": 99, "message": "Finalizing..."}})
-        peak_out = measure_peak_dbfs(premaster_wav)
-        make_preview(
-            Path(sess_dir) / "premaster_unlimited.wav",
-            Path(sess_dir) / "premaster_unlimited_preview.wav",
-            sr=48000,
-            stereo=True,
+        targets = master_targets(ai_adj, params)
+        rcache = render_cache(sess_dir)
+        backend = render_backend()
+        rkey = render_key(sha, targets, backend)
+        variants = [compressed_preview_path(Path(t["preview"]), c).name for t in targets for c in PREVIEW_FORMATS]
+        cached = rcache.get(rkey, sess_dir, targets, optional=variants) if rcache else None
+        if cached is not None:
+            # identical source and targets rendered before: reuse the masters as-is
+            for t in targets:
+                set_metrics(sess_dir, t["key"], cached[t["key"]])
+            update_progress(
+                sess_dir, pct=95, status="mastering", message="Reusing previous render…",
+                masters={t["key"]: {"state": "done", "pct": 100, "message": "Ready"} for t in targets},
+            )
+        pending = [] if cached is not None else targets
+        workers = render_workers(len(pending))
+        # without ffmpeg the fused graph (and every pass-1 analysis) could only fail
+        fused = bool(pending) and settings.RENDER_MODE == "fused" and backend == "ffmpeg" and fused_render(
+            pending, src_path, sess_dir, peak_in, sha, duration_s=info["duration"]
         )
-        info_out = ffprobe_info(premaster_wav)
-        sha = sha256_file(premaster_wav)
-        d = read_json(progress_path(sess_dir))
-        d["metrics"]["unlimited"] = {
-            "lufs_integrated": None,
-            "true_peak_db": None,
-            "lra": None,
-            "peak_dbfs": peak_out,
-            "duration_sec": info_out["duration"],
-            "sr": info_out["sr"],
-            "bits": 24,
-            "sha256": sha,
-        }
-        write_json_atomic(progress_path(sess_dir), d)
-        if abs(peak_out - (-6.0)) <= 0.3:
-            update_progress(sess_dir, masters={"unlimited": {"state": "done", "pct": 100, "message": "Ready"}})
-        else:
-            update_progress(sess_dir, masters={"unlimited": {"state": "error", "pct": 100, "message": "Verify failed"}})
 
-        metrics_final = read_json(progress_path(sess_dir)).get("metrics", {})
-        finalize_session(sess_dir, metrics_final, original_name, original_stem)
+        degraded = []
+
+        def job(t):
+            with track_fallbacks() as used:
+                # after a fused render only verification/metrics remain per target
+                if fused:
+                    finish_target(t, sess_dir)
+                else:
+                    render_target(t, src_path, sess_dir, peak_in, sha if backend == "ffmpeg" else None)
+            if used:
+                degraded.append(t["key"])
+
+        if workers > 1:
+            update_progress(sess_dir, pct=45, status="mastering", message="Rendering masters…")
+        errors = []
+        done_count = 0
+
+        def _on_done(key, exc):
+            nonlocal done_count, current_target
+            done_count += 1
+            if exc is not None:
+                current_target = key
+                errors.append(exc)
+            update_progress(sess_dir, pct=15 + int(80 * done_count / len(pending)))
+
+        if workers > 1:
+            # fan out: every target is its own ffmpeg/numpy job; fan in before finalize
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"render-{session}") as pool:
+                futures = {pool.submit(job, t): t["key"] for t in pending}
+                for fut in as_completed(futures):
+                    _on_done(futures[fut], fut.exception())
+        else:
+            for t in pending:
+                current_target = t["key"]
+                update_progress(sess_dir, pct=t["pct"], status="mastering", message=t["message"])
+                job(t)
+                _on_done(t["key"], None)
+        if errors:
+            raise errors[0]
+        current_target = None
+
+        snap = progress_bus.get(sess_dir).snapshot()
+        metrics_final = snap.get("metrics", {})
+        # a fallback render under the ffmpeg key would be served even once ffmpeg works again
+        cacheable = backend == "python" or not degraded
+        if rcache and pending and cacheable and all(snap["masters"][t["key"]]["state"] == "done" for t in pending):
+            rcache.put(rkey, sess_dir, targets, metrics_final, optional=variants)
+        with metrics.stage("finalize"):
+            finalize_session(sess_dir, metrics_final, original_name, original_stem)
+        outcome = "done"
     except Exception as e:
         masters_err = {current_target: {"state": "error", "message": str(e)}} if current_target else None
         update_progress(sess_dir, status="error", message="Processing failed", error=str(e), done=True, masters=masters_err)
+    finally:
+        if audio is not None:
+            audio.release()
+        metrics.JOBS.inc(outcome=outcome)
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="job")
 
 
 __all__ = [
@@ -830,17 +1046,31 @@ __all__ = [
     "write_json_atomic",
     "read_json",
     "update_progress",
+    "set_metrics",
     "checksum_sha256",
     "sha256_file",
     "ffprobe_info",
     "validate_upload",
+    "meter_audio",
+    "peaks_path",
     "measure_loudnorm_json",
     "measure_peak_dbfs",
     "ebur128_timeline",
+    "loudnorm_measure",
+    "cached_loudnorm_measure",
     "loudnorm_two_pass",
     "normalize_peak_to",
     "make_preview",
+    "encode_preview",
+    "PREVIEW_FORMATS",
     "finalize_session",
+    "master_targets",
+    "render_target",
+    "finish_target",
+    "fused_render",
+    "render_cache",
+    "render_backend",
+    "track_fallbacks",
     "run_pipeline",
 ]
 
@@ -0,0 +1,293 @@
+"""In-memory job progress with throttled ``progress.json`` flushes.
+
+Every running job owns a :class:`ProgressState`.  Updates are plain dict
+merges under a lock; the document is written to disk at most once per
+``settings.PROGRESS_FLUSH_SECONDS`` (a timer writes the trailing update) and
+immediately when the job reaches a terminal state.  The file remains the
+source of truth for other processes (e.g. a second gunicorn worker) and for
+jobs that are no longer in memory.
+
+Each edit also records the patch of :data:`LIVE_FIELDS` it produced in a small
+ring buffer keyed by version, so an event stream that reconnects can be sent
+exactly what changed since its last event id.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Tuple
+
+import settings
+
+PROGRESS_FILE = "progress.json"
+LIVE_FIELDS = ("status", "pct", "message", "error", "done", "queue_position", "eta_s", "masters", "metrics")
+NESTED_FIELDS = ("masters", "metrics")
+PATCH_HISTORY = 64
+
+
+def default_masters() -> Dict[str, Dict[str, Any]]:
+    return {
+        "club": {"state": "queued", "pct": 0, "message": ""},
+        "streaming": {"state": "queued", "pct": 0, "message": ""},
+        "unlimited": {"state": "queued", "pct": 0, "message": ""},
+        "custom": {"state": "queued", "pct": 0, "message": ""},
+    }
+
+
+def default_progress() -> Dict[str, Any]:
+    """A fresh progress document with every key the UI reads."""
+    return {
+        "pct": 0,
+        "status": "starting",
+        "percent": 0,
+        "phase": "starting",
+        "message": "",
+        "done": False,
+        "error": None,
+        "downloads": {"club": None, "streaming": None, "unlimited": None, "custom": None, "zip": None, "session_json": None},
+        "metrics": {
+            "input": {},
+            "club": {},
+            "streaming": {},
+            "unlimited": {},
+            "custom": {},
+            "advisor": {
+                "recommended_preset": "",
+                "input_I": None,
+                "input_TP": None,
+                "input_LRA": None,
+                "analysis": {},
+                "ai_adjustments": {},
+            },
+        },
+        "timeline": {"sec": [], "short_term": [], "tp_flags": []},
+        "masters": default_masters(),
+    }
+
+
+def merge_fields(data: Dict[str, Any], fields: Dict[str, Any]):
+    """Apply ``update_progress``-style fields to ``data`` in place.
+
+    ``None`` values are ignored, ``masters`` entries are merged per target and
+    the legacy ``percent``/``phase`` aliases are kept in sync.
+    """
+    fields = dict(fields)
+    masters = fields.pop("masters", None)
+    data.update({k: v for k, v in fields.items() if v is not None})
+    if "pct" in data:
+        data["percent"] = data["pct"]
+    if "status" in data:
+        data["phase"] = data["status"]
+    if masters:
+        data.setdefault("masters", {})
+        for key, val in masters.items():
+            base = data["masters"].get(key, {"state": "queued", "pct": 0, "message": ""})
+            for k, v in val.items():
+                if v is not None:
+                    base[k] = v
+            data["masters"][key] = base
+
+
+def diff_fields(prev: dict, cur: dict) -> dict:
+    """Fields of ``cur`` that differ from ``prev``; nested dicts per entry."""
+    patch = {}
+    for k, v in cur.items():
+        old = prev.get(k)
+        if k in NESTED_FIELDS and isinstance(v, dict) and isinstance(old, dict):
+            changed = {sub: val for sub, val in v.items() if old.get(sub) != val}
+            if changed:
+                patch[k] = changed
+        elif k not in prev or old != v:
+            patch[k] = v
+    return patch
+
+
+def merge_patch(into: dict, patch: dict):
+    """Fold a later :func:`diff_fields` patch into ``into`` (without mutating ``patch``)."""
+    for k, v in patch.items():
+        if k in NESTED_FIELDS and isinstance(v, dict) and isinstance(into.get(k), dict):
+            into[k] = {**into[k], **v}
+        else:
+            into[k] = v
+
+
+class ProgressState:
+    def __init__(self, sess_dir: str, data: Dict[str, Any], min_interval: float | None = None):
+        self.path = os.path.join(sess_dir, PROGRESS_FILE)
+        self.data = data
+        self.version = 0
+        self.min_interval = settings.PROGRESS_FLUSH_SECONDS if min_interval is None else min_interval
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._flushed_version = -1
+        self._last_flush = 0.0
+        self._timer = None
+        self._json = None
+        self._json_version = -1
+        self._live = self._live_fields()
+        self._patches = deque(maxlen=PATCH_HISTORY)  # (version, patch of LIVE_FIELDS)
+
+    def _live_fields(self) -> Dict[str, Any]:
+        return copy.deepcopy({k: self.data.get(k) for k in LIVE_FIELDS})
+
+    # -- mutation -----------------------------------------------------------
+    def update(self, **fields):
+        with self.edit() as data:
+            merge_fields(data, fields)
+
+    def set_metrics(self, key: str, value: Dict[str, Any]):
+        with self.edit() as data:
+            data.setdefault("metrics", {})[key] = value
+
+    @contextmanager
+    def edit(self):
+        """Mutate the document in place; flushes follow the rate limit."""
+        with self._lock:
+            yield self.data
+            self.version += 1
+            live = self._live_fields()
+            self._patches.append((self.version, diff_fields(self._live, live)))
+            self._live = live
+            self._changed.notify_all()
+            if self.data.get("done"):
+                self.flush()
+                _release(self)
+            else:
+                self._schedule()
+
+    # -- reading ------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self.data)
+
+    def fields(self, keys) -> Tuple[int, Dict[str, Any]]:
+        """``(version, copy of the selected top-level keys)`` taken atomically."""
+        with self._lock:
+            return self.version, copy.deepcopy({k: self.data.get(k) for k in keys})
+
+    def patch_since(self, since: int, until: int) -> Dict[str, Any] | None:
+        """Merged live-field patch from version ``since`` to ``until``.
+
+        ``None`` when versions after ``since`` are no longer in the buffer.
+        """
+        with self._lock:
+            if since > until or (since < until and (not self._patches or self._patches[0][0] > since + 1)):
+                return None
+            merged: Dict[str, Any] = {}
+            for version, patch in self._patches:
+                if since < version <= until:
+                    merge_patch(merged, patch)
+            return merged
+
+    def to_json(self) -> str:
+        """Serialized document, cached per version."""
+        with self._lock:
+            if self._json_version != self.version:
+                self._json = json.dumps(self.data, ensure_ascii=False)
+                self._json_version = self.version
+            return self._json
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Block until the document is newer than ``version`` or ``timeout``."""
+        with self._lock:
+            if self.version <= version:
+                self._changed.wait(timeout)
+            return self.version
+
+    # -- persistence --------------------------------------------------------
+    def _schedule(self):
+        elapsed = time.monotonic() - self._last_flush
+        if elapsed >= self.min_interval:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.min_interval - elapsed, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+            self.flush()
+
+    def flush(self):
+        """Write the current document to ``progress.json`` if it changed."""
+        with self._lock:
+            if self._flushed_version == self.version:
+                return
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(self.to_json())
+            os.replace(tmp, self.path)
+            self._flushed_version = self.version
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+_states: Dict[str, ProgressState] = {}
+_states_lock = threading.Lock()
+
+
+def _key(sess_dir: str) -> str:
+    return os.path.abspath(sess_dir)
+
+
+def _release(state: ProgressState):
+    with _states_lock:
+        for k, v in list(_states.items()):
+            if v is state:
+                del _states[k]
+
+
+def create(sess_dir: str, data: Dict[str, Any]) -> ProgressState:
+    """Register a new job's progress and write it to disk right away."""
+    state = ProgressState(sess_dir, data)
+    with _states_lock:
+        _states[_key(sess_dir)] = state
+    state.flush()
+    return state
+
+
+def get(sess_dir: str) -> ProgressState:
+    """Return the in-memory state for ``sess_dir``, loading it from disk if needed."""
+    key = _key(sess_dir)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            data = default_progress()
+            try:
+                with open(os.path.join(sess_dir, PROGRESS_FILE), "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except Exception:
+                pass
+            state = _states[key] = ProgressState(sess_dir, data)
+        return state
+
+
+def discard(sess_dir: str):
+    """Forget a job that never ran (e.g. rejected by the scheduler)."""
+    with _states_lock:
+        _states.pop(_key(sess_dir), None)
+
+
+def peek(sess_dir: str) -> ProgressState | None:
+    """The in-memory state if this process is running the job, else ``None``."""
+    with _states_lock:
+        return _states.get(_key(sess_dir))
+
+
+__all__ = [
+    "PROGRESS_FILE",
+    "ProgressState",
+    "default_progress",
+    "default_masters",
+    "merge_fields",
+    "create",
+    "get",
+    "peek",
+    "discard",
+]
@@ -0,0 +1,132 @@
+"""Content-addressed cache of finished masters.
+
+An entry holds every rendered master and preview of one job plus their
+metrics.  It is keyed by the source sha256, the full render specs (which carry
+the AI-adjusted targets), the renderer (``ffmpeg`` or the ``python`` fallback)
+and :data:`PIPELINE_VERSION`, so any change to the inputs or to the rendering
+code produces a new key.  Files are hardlinked into
+the cache and back out into sessions (copied when the cache is on another
+filesystem) and made read-only so a session can never modify a shared copy.
+Entries are evicted least recently used first once the cache outgrows
+``max_bytes``.
+"""
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+PIPELINE_VERSION = 1
+METRICS_FILE = "metrics.json"
+_VOLATILE = ("pct", "message")  # progress display only, does not affect output
+
+
+def render_key(sha256: str, targets: list[dict], renderer: str = "ffmpeg") -> str:
+    specs = [{k: v for k, v in sorted(t.items()) if k not in _VOLATILE} for t in targets]
+    blob = json.dumps(
+        {"sha256": sha256, "targets": specs, "renderer": renderer, "version": PIPELINE_VERSION}, sort_keys=True
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _files(targets: list[dict]) -> list[str]:
+    return [name for t in targets for name in (t["wav"], t["preview"])]
+
+
+def _link(src: Path, dst: Path):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class RenderCache:
+    def __init__(self, root: str | Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str, sess_dir: str | Path, targets: list[dict], optional=()) -> Dict[str, Any] | None:
+        """Link a cached entry into ``sess_dir``; returns metrics per target key.
+
+        ``optional`` names (e.g. compressed previews) are linked when cached.
+        """
+        entry = self._entry(key)
+        try:
+            metrics = json.loads((entry / METRICS_FILE).read_text())
+        except (OSError, ValueError):
+            return None
+        if any(t["key"] not in metrics for t in targets):
+            return None
+        sess = Path(sess_dir)
+        linked = []
+        try:
+            for name in _files(targets):
+                dst = sess / name
+                dst.unlink(missing_ok=True)
+                _link(entry / name, dst)
+                linked.append(dst)
+        except OSError:
+            for p in linked:
+                p.unlink(missing_ok=True)
+            return None
+        for name in optional:
+            if (entry / name).exists() and not (sess / name).exists():
+                try:
+                    _link(entry / name, sess / name)
+                except OSError:
+                    pass
+        try:
+            os.utime(entry / METRICS_FILE)
+        except OSError:
+            pass
+        return metrics
+
+    def put(self, key: str, sess_dir: str | Path, targets: list[dict], metrics: Dict[str, Any], optional=()):
+        """Store the session's masters/previews of ``targets`` (and any existing
+        ``optional`` files) under ``key``."""
+        entry = self._entry(key)
+        if entry.exists():
+            return
+        sess = Path(sess_dir)
+        tmp = entry.with_name(f"{entry.name}.{threading.get_ident()}.tmp")
+        try:
+            tmp.mkdir(parents=True, exist_ok=True)
+            extra = [name for name in optional if (sess / name).exists()]
+            for name in _files(targets) + extra:
+                src = sess / name
+                os.chmod(src, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                _link(src, tmp / name)
+            (tmp / METRICS_FILE).write_text(json.dumps({t["key"]: metrics[t["key"]] for t in targets}))
+            os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            entries = []
+            for marker in self.root.glob(f"*/*/{METRICS_FILE}"):
+                try:
+                    mtime = marker.stat().st_mtime
+                    size = sum(p.stat().st_size for p in marker.parent.iterdir())
+                except OSError:
+                    continue
+                entries.append((mtime, size, marker.parent))
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+
+__all__ = ["RenderCache", "render_key", "PIPELINE_VERSION"]
@@ -0,0 +1,64 @@
+"""HTTP validators for finalized session files.
+
+Once ``finalize_session`` has written ``manifest.json`` every listed file is
+immutable, so its manifest sha256 is a strong ETag and the response may be
+cached indefinitely.  Files without a manifest entry (previews still being
+written, ``.part`` files, sessions in progress) are served ``no-store``.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import request
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+NO_STORE = "no-store, no-cache, must-revalidate, max-age=0"
+
+
+class Validators:
+    def __init__(self, etag: str | None, last_modified: datetime | None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def cacheable(self) -> bool:
+        return self.etag is not None
+
+    def headers(self) -> dict:
+        if not self.cacheable:
+            return {"Cache-Control": NO_STORE}
+        return {
+            "ETag": f'"{self.etag}"',
+            "Last-Modified": self.last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+            "Cache-Control": IMMUTABLE,
+        }
+
+    def not_modified(self) -> bool:
+        """True when the request's conditional headers match this file."""
+        if not self.cacheable:
+            return False
+        if request.if_none_match:
+            return request.if_none_match.contains(self.etag) or request.if_none_match.star_tag
+        since = request.if_modified_since
+        return since is not None and self.last_modified <= since
+
+    def range_allowed(self) -> bool:
+        """Honour ``Range`` unless an ``If-Range`` validator no longer matches."""
+        if_range = request.if_range
+        if not (if_range.etag or if_range.date):
+            return True
+        if not self.cacheable:
+            return False
+        if if_range.etag:
+            return if_range.etag == self.etag
+        return if_range.date == self.last_modified
+
+
+def validators(path: Path, meta: dict | None) -> Validators:
+    """Validators for ``path`` given its manifest entry (if any)."""
+    if not meta or not meta.get("sha256") or meta.get("filename") != path.name or path.suffix == ".part":
+        return Validators(None, None)
+    st = path.stat()
+    if meta.get("bytes") is not None and meta["bytes"] != st.st_size:
+        return Validators(None, None)
+    mtime = datetime.fromtimestamp(int(st.st_mtime), tz=timezone.utc)
+    return Validators(meta["sha256"], mtime)
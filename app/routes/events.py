@@ -0,0 +1,85 @@
+"""Server-Sent Events feed of job progress.
+
+``/events/<session>`` sends a full ``snapshot`` on connect, then ``progress``
+events that carry only the live fields that changed (``masters`` and
+``metrics`` are diffed per entry), and a final ``snapshot`` once the job is
+done.  The event id is the :class:`~app.progress_bus.ProgressState` version;
+a reconnect with ``Last-Event-ID`` is replayed the changes since that version
+from the state's patch buffer, or a full snapshot if the id has aged out of
+it.  Jobs not running in this process get their on-disk snapshot and a
+``fallback`` event telling the client to poll ``/progress``.
+"""
+import json
+import os
+
+from flask import Blueprint, Response, abort, current_app, request
+from werkzeug.utils import secure_filename
+
+import settings
+from app import progress_bus
+from app.progress_bus import LIVE_FIELDS, diff_fields
+
+bp = Blueprint("events", __name__)
+
+RETRY_MS = 2000
+
+
+def _event(name: str, event_id: int | None, data: str) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {name}\ndata: {data}\n\n"
+
+
+def _live_stream(state: progress_bus.ProgressState, last_id: int | None, heartbeat: float):
+    yield f"retry: {RETRY_MS}\n\n"
+    version, prev = state.fields(LIVE_FIELDS)
+    replay = None if last_id is None else state.patch_since(last_id, version)
+    if replay is None:
+        # anything that changes after ``prev`` is re-sent as a patch, which is idempotent
+        yield _event("snapshot", version, state.to_json())
+    elif replay:
+        yield _event("progress", version, json.dumps(replay, ensure_ascii=False))
+    while not prev.get("done"):
+        if state.wait_for_change(version, heartbeat) == version:
+            yield ": keep-alive\n\n"
+            continue
+        version, cur = state.fields(LIVE_FIELDS)
+        patch = diff_fields(prev, cur)
+        prev = cur
+        if patch and not cur.get("done"):
+            yield _event("progress", version, json.dumps(patch, ensure_ascii=False))
+    yield _event("snapshot", version, state.to_json())
+
+
+def _file_stream(path: str):
+    with open(path, "r", encoding="utf-8") as fh:
+        text = fh.read()
+    yield _event("snapshot", None, text)
+    try:
+        done = json.loads(text).get("done")
+    except ValueError:
+        done = False
+    if not done:
+        yield _event("fallback", None, "{}")
+
+
+@bp.get("/events/<session>")
+def events(session):
+    sess_dir = os.path.join(current_app.config["UPLOAD_FOLDER"], secure_filename(session))
+    raw_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(raw_id) if raw_id else None
+    except ValueError:
+        last_id = None
+    state = progress_bus.peek(sess_dir)
+    if state is not None:
+        body = _live_stream(state, last_id, settings.SSE_HEARTBEAT_SECONDS)
+    else:
+        path = os.path.join(sess_dir, progress_bus.PROGRESS_FILE)
+        if not os.path.exists(path):
+            abort(404)
+        body = _file_stream(path)
+    headers = {
+        "Cache-Control": "no-store",
+        "X-Accel-Buffering": "no",  # keep nginx from buffering the stream
+    }
+    return Response(body, mimetype="text/event-stream", headers=headers)
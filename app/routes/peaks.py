@@ -0,0 +1,48 @@
+"""Waveform peak pyramids for the result players.
+
+``/peaks/<session>/<key>`` serves the binary pyramid written by the pipeline
+(see :mod:`app.engine.peaks`).  ``key`` is ``input``/``original``, a master
+key or its preview filename.  Pyramids missing on disk (renders reused from
+the cache, older sessions) are built once from the preview file.  Query
+parameters: ``bits`` (8 or 16, default 8) and ``max_buckets`` to drop levels
+finer than the client can draw.
+"""
+from flask import Blueprint, Response, abort, current_app, request
+from werkzeug.utils import secure_filename
+
+from app.engine import peaks
+from app.janitor import touch
+from app.pipeline import build_final_filenames, peaks_path
+from app.util_fs import session_root
+
+bp = Blueprint("peaks", __name__)
+
+PREVIEWS = {("input" if k == "original" else k): v for k, v in build_final_filenames("track")["preview"].items()}
+ALIASES = {"original": "input", **{v: k for k, v in PREVIEWS.items()}}
+
+
+@bp.get("/peaks/<session>/<key>")
+def waveform_peaks(session, key):
+    root = session_root(current_app.config["UPLOAD_FOLDER"], secure_filename(session))
+    key = ALIASES.get(key, key)
+    if key not in PREVIEWS:
+        abort(404)
+    path = peaks_path(str(root), key)
+    try:
+        pyramid = peaks.Peaks.load(path)
+    except (OSError, ValueError):
+        preview = root / PREVIEWS[key]
+        if not preview.is_file():
+            abort(404)
+        try:
+            pyramid = peaks.from_file(preview)
+        except Exception:
+            abort(404)
+        pyramid.save(path)
+    touch(root)
+    bits = 16 if request.args.get("bits") == "16" else 8
+    max_buckets = request.args.get("max_buckets", type=int)
+    resp = Response(pyramid.to_bytes(bits, max_buckets), mimetype="application/octet-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.add_etag()
+    return resp.make_conditional(request)
@@ -1,59 +1,215 @@
 from flask import Blueprint, current_app, request, Response, abort
+from datetime import datetime, timezone
 from pathlib import Path
-import os, json
+import mimetypes, uuid
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import wrap_file
 
-from app.util_fs import session_root
+from app.janitor import touch
+from app.pipeline import PREVIEW_FORMATS, compressed_preview_path, preview_codecs
+from app.routes.caching import Validators, validators
+from app.util_fs import manifest_index, session_root
+from app.zipstream import plan_from_manifest
 
 bp = Blueprint("stream", __name__)
 
+CHUNK_SIZE = 256 * 1024
+MAX_RANGES = 16
 
-def _open_range(path: Path, range_header: str):
-    size = path.stat().st_size
-    if not range_header or '=' not in range_header:
-        with path.open('rb') as f:
-            return 200, f.read(), 0, size - 1, size
-    _, rng = range_header.split('=', 1)
-    start_s, _, end_s = rng.partition('-')
-    start = int(start_s) if start_s else 0
-    end = int(end_s) if end_s else size - 1
-    start = max(0, start)
-    end = min(size - 1, end)
-    length = end - start + 1
-    f = path.open('rb')
-    f.seek(start)
-    return 206, f.read(length), start, end, size
+
+def parse_ranges(range_header: str, size: int):
+    """Parse a ``Range`` header into inclusive ``(start, end)`` pairs.
+
+    Returns ``None`` when the header is absent or malformed (serve the whole
+    file) and ``[]`` when no range is satisfiable (416).  Suffix ranges
+    (``bytes=-N``) and open ranges (``bytes=N-``) are supported.
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    ranges = []
+    for part in spec.split(","):
+        start_s, sep, end_s = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start_s:
+                n = int(end_s)
+                if n <= 0:
+                    continue
+                start, end = max(0, size - n), size - 1
+            else:
+                start = int(start_s)
+                end = int(end_s) if end_s else max(start, size - 1)
+        except ValueError:
+            return None
+        if start < 0 or end < start:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+
+def _iter_ranges(path: Path, ranges, chunk_size: int = CHUNK_SIZE, parts=None):
+    """Yield the bytes of ``ranges`` in fixed-size chunks; closes the file.
+
+    ``parts`` optionally holds a bytes prefix per range plus a trailer (used
+    for ``multipart/byteranges``).
+    """
+    with path.open("rb") as f:
+        for i, (start, end) in enumerate(ranges):
+            if parts:
+                yield parts[i]
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                buf = f.read(min(chunk_size, remaining))
+                if not buf:
+                    break
+                remaining -= len(buf)
+                yield buf
+        if parts:
+            yield parts[-1]
+
+
+def _multipart(path: Path, ranges, size: int, content_type: str):
+    boundary = uuid.uuid4().hex
+    heads = [
+        (f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+         f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n").encode("ascii")
+        for start, end in ranges
+    ]
+    trailer = f"\r\n--{boundary}--\r\n".encode("ascii")
+    length = sum(len(h) for h in heads) + len(trailer) + sum(e - s + 1 for s, e in ranges)
+    return _iter_ranges(path, ranges, parts=heads + [trailer]), length, f"multipart/byteranges; boundary={boundary}"
+
+
+def _content_type(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".wav":
+        return "audio/wav"
+    for fmt in PREVIEW_FORMATS.values():
+        if fmt["ext"] == suffix:
+            return fmt["mime"]
+    return mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+
+def _preview_variant(root: Path, wav: Path, meta):
+    """Pick the compressed sibling of a WAV preview the client accepts.
+
+    ``?codec=`` forces a choice (``wav`` for the original); otherwise the
+    ``Accept`` header decides, with configured codecs preferred on ties
+    (``*/*``).  Returns ``(path, manifest entry)``.
+    """
+    configured = preview_codecs()
+    order = configured + [c for c in PREVIEW_FORMATS if c not in configured]
+    available = {c: compressed_preview_path(wav, c) for c in order if compressed_preview_path(wav, c).exists()}
+    if not available:
+        return wav, meta
+    forced = request.args.get("codec")
+    if forced:
+        choice = forced if forced in available else None
+    elif request.accept_mimetypes:
+        mimes = [PREVIEW_FORMATS[c]["mime"] for c in available] + ["audio/wav"]
+        best = request.accept_mimetypes.best_match(mimes)
+        choice = next((c for c in available if PREVIEW_FORMATS[c]["mime"] == best), None)
+    else:
+        choice = next((c for c in configured if c in available), None)
+    if choice is None:
+        return wav, meta
+    path = available[choice]
+    return path, manifest_index.lookup(root, path.name)
 
 
 @bp.route("/stream/<session>/<key>", methods=["GET","HEAD"])
 def stream(session, key):
     root = session_root(current_app.config["UPLOAD_FOLDER"], secure_filename(session))
-    man_path = root / "manifest.json"
-    man = {}
-    if man_path.exists():
-        try:
-            man = json.loads(man_path.read_text())
-        except Exception:
-            man = {}
-    filename = man.get(key, {}).get("filename", key)
-    path = root / filename
-    if not path.exists():
-        for meta in man.values():
-            if meta.get("filename") == key:
-                path = root / meta["filename"]
-                break
+    meta = manifest_index.lookup(root, key)
+    path = root / (meta["filename"] if meta else secure_filename(key))
     if not path.exists() or path.is_dir():
         return ("Not found", 404) if request.method == "HEAD" else abort(404)
+    touch(root)
 
-    if request.method == "HEAD":
-        return ("", 200)
+    vary = path.name.endswith("_preview.wav")
+    if vary:
+        path, meta = _preview_variant(root, path, meta)
+    size = path.stat().st_size
+    content_type = _content_type(path)
+    valid = validators(path, meta)
+    headers = {"Accept-Ranges": "bytes", **valid.headers()}
+    if vary:
+        headers["Vary"] = "Accept"
+    if valid.not_modified():
+        return Response(status=304, headers=headers)
+    range_header = request.headers.get("Range") if valid.range_allowed() else None
+    ranges = parse_ranges(range_header, size)
+    if ranges is not None and not ranges:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(b"", status=416, headers=headers)
 
-    code, chunk, start, end, size = _open_range(path, request.headers.get("Range"))
+    head = request.method == "HEAD"
+    if ranges is None:
+        status, length = 200, size
+        # lets the server use sendfile(2) when it provides wsgi.file_wrapper
+        body = None if head else wrap_file(request.environ, path.open("rb"), CHUNK_SIZE)
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        status, length = 206, end - start + 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        body = None if head else _iter_ranges(path, ranges)
+    else:
+        status = 206
+        body, length, content_type = _multipart(path, ranges, size, content_type)
+        if head:
+            body = None
+
+    resp = Response(body if body is not None else b"", status=status, headers=headers,
+                    content_type=content_type, direct_passthrough=body is not None)
+    resp.content_length = length
+    return resp
+
+
+def send_zip(root: Path, entry, meta):
+    """Stream the virtual ZIP described by ``meta`` (a manifest bundle entry).
+
+    The archive is assembled from the member files on every request; its
+    layout is fixed by the manifest, so ``Range``/``If-Range`` and the ETag
+    behave exactly as for a file on disk.
+    """
+    manifest = {fn: entry.lookup(fn) for fn in meta["members"]}
+    for fn, m in manifest.items():
+        p = root / fn
+        if not m or not p.exists() or p.stat().st_size != m["bytes"]:
+            abort(404)
+    plan = plan_from_manifest(root, meta["members"], manifest, meta["ts"])
+    valid = Validators(meta["etag"], datetime.fromtimestamp(int(meta["ts"]), tz=timezone.utc))
     headers = {
         "Accept-Ranges": "bytes",
-        "Content-Type": "audio/wav",
-        "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+        "Content-Disposition": f'attachment; filename="{meta["filename"]}"',
+        **valid.headers(),
     }
-    if code == 206:
-        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
-    return Response(chunk, status=code, headers=headers)
+    if valid.not_modified():
+        return Response(status=304, headers=headers)
+    range_header = request.headers.get("Range") if valid.range_allowed() else None
+    ranges = parse_ranges(range_header, plan.size)
+    if ranges is not None and not ranges:
+        headers["Content-Range"] = f"bytes */{plan.size}"
+        return Response(b"", status=416, headers=headers)
+    # multiple ranges are answered with the whole archive (allowed by RFC 9110)
+    if ranges is not None and len(ranges) == 1:
+        start, end = ranges[0]
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{plan.size}"
+    else:
+        status, start, end = 200, 0, plan.size - 1
+    head = request.method == "HEAD"
+    body = b"" if head else plan.iter_bytes(start, end, CHUNK_SIZE)
+    resp = Response(body, status=status, headers=headers, content_type="application/zip",
+                    direct_passthrough=not head)
+    resp.content_length = end - start + 1
+    return resp
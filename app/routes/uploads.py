@@ -0,0 +1,98 @@
+"""Chunked, resumable upload API (see :mod:`app.uploads`).
+
+``POST /uploads`` (JSON ``filename``, optional ``size``) creates an upload,
+``PATCH /uploads/<id>`` appends the raw request body at ``Upload-Offset``,
+``HEAD``/``GET /uploads/<id>`` report the offset to resume from and
+``POST /uploads/<id>/commit`` (form fields as for ``/start``) starts the job.
+"""
+import os
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.utils import secure_filename
+
+import settings
+from app import jobs, uploads
+from app.uploads import UploadError
+
+bp = Blueprint("uploads", __name__)
+
+
+@bp.errorhandler(UploadError)
+def _upload_error(exc: UploadError):
+    resp = jsonify({"error": str(exc), **exc.extra})
+    resp.status_code = exc.status
+    if "offset" in exc.extra:
+        resp.headers["Upload-Offset"] = str(exc.extra["offset"])
+    return resp
+
+
+def _upload(upload_id: str) -> uploads.Upload:
+    upload = uploads.get(current_app.config["UPLOAD_FOLDER"], secure_filename(upload_id))
+    if upload is None:
+        raise UploadError("Unknown upload.", 404)
+    return upload
+
+
+def _status(upload: uploads.Upload, status: int = 200, **extra):
+    resp = jsonify({**upload.status(), **extra})
+    resp.status_code = status
+    resp.headers["Upload-Offset"] = str(upload.offset)
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@bp.post("/uploads")
+def create_upload():
+    body = request.get_json(silent=True) or request.form
+    size = body.get("size")
+    try:
+        size = int(size) if size not in (None, "") else None
+    except (TypeError, ValueError):
+        raise UploadError("Invalid size.")
+    if size is not None and (size <= 0 or size > settings.MAX_FILE_MB * 1024 * 1024):
+        raise UploadError(f"File too large (limit {settings.MAX_FILE_MB} MB).", 413)
+    sched = jobs.scheduler()
+    if sched.full():
+        raise jobs.QueueFull(sched.retry_after())
+    upload = uploads.create(current_app.config["UPLOAD_FOLDER"], body.get("filename") or "upload", size)
+    resp = _status(upload, 201, chunk_size=settings.UPLOAD_CHUNK_MB * 1024 * 1024)
+    resp.headers["Location"] = f"/uploads/{upload.id}"
+    return resp
+
+
+@bp.route("/uploads/<upload_id>", methods=["GET", "HEAD"])
+def upload_status(upload_id):
+    return _status(_upload(upload_id))
+
+
+@bp.patch("/uploads/<upload_id>")
+def append_chunk(upload_id):
+    upload = _upload(upload_id)
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        raise UploadError("Upload-Offset header required.")
+    try:
+        upload.append(offset, request.stream)
+    except UploadError as exc:
+        if exc.status == 422:
+            uploads.discard(upload)  # unusable audio: drop it before more is sent
+        raise
+    return _status(upload)
+
+
+@bp.post("/uploads/<upload_id>/commit")
+def commit_upload(upload_id):
+    upload = _upload(upload_id)
+    # hold the slot across the commit: once committed the job can no longer be refused
+    with jobs.scheduler().reserve() as slot:  # QueueFull keeps the data; commit again later
+        try:
+            upload_digests = upload.commit()
+        except UploadError as exc:
+            if exc.status == 422:
+                uploads.discard(upload)
+            raise
+        uploads.forget(upload)
+        src_path = os.path.join(upload.sess_dir, "upload")
+        return jsonify(uploads.start_session(upload.id, upload.sess_dir, src_path, upload.filename,
+                                             request.form.to_dict(flat=True), upload_digests, reservation=slot))
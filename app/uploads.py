@@ -0,0 +1,281 @@
+"""Chunked, resumable uploads and job start.
+
+An upload is created with ``POST /uploads``, filled with ``PATCH`` requests
+carrying an ``Upload-Offset`` header and committed with
+``POST /uploads/<id>/commit``.  The bytes go to ``upload.part`` in the
+session directory; the file's size is the authoritative offset, so a client
+that lost its connection asks for it (``HEAD``) and continues from there.
+
+Bytes are hashed as they are appended, and the container header is probed
+as soon as enough of it has arrived: a WAV's ``data`` chunk size (or the
+stream info of FLAC/OGG/AIFF) gives the duration long before the body is
+complete, so over-long or multichannel files are refused after a few KB.
+"""
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Dict
+
+import soundfile as sf
+from werkzeug.exceptions import ClientDisconnected
+
+import settings
+from . import digests, jobs, progress_bus
+from .pipeline import (
+    MAX_DURATION_S,
+    SUPPORTED_CHANNELS,
+    make_preview,
+    new_session_dir,
+    run_pipeline,
+    sanitize,
+)
+
+PART = "upload.part"
+META = "upload.json"
+PROBE_LIMIT = 1024 * 1024  # give up on early probing after this many bytes
+CHUNK_SIZE = 256 * 1024
+
+
+class UploadError(Exception):
+    """An upload request that cannot be honoured; ``status`` is the HTTP code."""
+
+    def __init__(self, message: str, status: int = 400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def _wav_header(head: bytes) -> Dict[str, Any] | None:
+    """Duration/channels from a RIFF/RF64 header, or ``None`` if incomplete."""
+    if len(head) < 12 or head[:4] not in (b"RIFF", b"RF64") or head[8:12] != b"WAVE":
+        return None
+    pos, fmt, data64 = 12, None, None
+    while pos + 8 <= len(head):
+        cid, n = head[pos:pos + 4], struct.unpack_from("<I", head, pos + 4)[0]
+        body = pos + 8
+        if cid == b"ds64" and len(head) >= body + 16:
+            data64 = struct.unpack_from("<Q", head, body + 8)[0]
+        elif cid == b"fmt " and len(head) >= body + 14:
+            fmt = struct.unpack_from("<HHIIH", head, body)
+        elif cid == b"data":
+            if fmt is None:
+                return None
+            _, channels, sr, _, align = fmt
+            size = data64 if n == 0xFFFFFFFF and data64 is not None else n
+            if not sr or not align:
+                return None
+            return {"duration": size / (align * sr), "channels": channels, "sr": sr}
+        pos = body + n + (n & 1)
+    return None
+
+
+def probe_header(path: str | Path) -> Dict[str, Any] | None:
+    """Best-effort ``{"duration", "channels", "sr"}`` of a partial upload.
+
+    WAV headers are parsed directly (libsndfile would report the truncated
+    length); other containers are asked through ``soundfile``, which reads
+    their stream info from the header.  ``None`` means "not known yet".
+    """
+    with open(path, "rb") as fh:
+        head = fh.read(64 * 1024)
+    if head[:4] in (b"RIFF", b"RF64"):
+        return _wav_header(head)
+    try:
+        info = sf.info(str(path))
+    except Exception:
+        return None
+    if not info.samplerate or not info.frames:
+        return None
+    return {"duration": info.frames / info.samplerate, "channels": info.channels, "sr": info.samplerate}
+
+
+def check_header(info: Dict[str, Any]):
+    """Reject what ``validate_upload`` would reject once the file is complete."""
+    if info["channels"] not in SUPPORTED_CHANNELS:
+        raise UploadError("Only mono or stereo supported.", 422)
+    if info["duration"] > MAX_DURATION_S:
+        raise UploadError("Audio must be 0–20 minutes.", 422)
+
+
+class Upload:
+    def __init__(self, upload_id: str, sess_dir: str, filename: str, size: int | None):
+        self.id = upload_id
+        self.sess_dir = sess_dir
+        self.filename = filename
+        self.size = size
+        self.path = os.path.join(sess_dir, PART)
+        self.probed = False
+        self.hasher: digests.Hasher | None = digests.Hasher()
+        self.lock = threading.Lock()
+
+    @property
+    def offset(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def status(self) -> Dict[str, Any]:
+        return {"upload_id": self.id, "offset": self.offset, "size": self.size, "filename": self.filename}
+
+    def append(self, offset: int, stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+        """Write ``stream`` at ``offset`` (which must equal the current size)."""
+        limit = self.size if self.size is not None else settings.MAX_FILE_MB * 1024 * 1024
+        with self.lock:
+            current = self.offset
+            if offset != current:
+                raise UploadError("Offset mismatch.", 409, offset=current)
+            if self.hasher is not None and self.hasher.size != current:
+                self.hasher = None  # resumed in another process: hash on commit
+            try:
+                with open(self.path, "ab") as fh:
+                    for chunk in iter(lambda: stream.read(chunk_size), b""):
+                        if current + len(chunk) > limit:
+                            raise UploadError("Upload exceeds the declared size.", 413, offset=current)
+                        fh.write(chunk)
+                        current += len(chunk)
+                        if self.hasher is not None:
+                            self.hasher.update(chunk)
+            except ClientDisconnected:
+                pass  # everything written so far is kept; the client resumes from it
+            if not self.probed:
+                self._probe(current)
+            return self.offset
+
+    def _probe(self, offset: int):
+        info = probe_header(self.path)
+        if info is not None:
+            self.probed = True
+            check_header(info)
+        elif offset >= PROBE_LIMIT or offset == self.size:
+            self.probed = True  # unknown container: the pipeline validates the full file
+
+    def commit(self) -> Dict[str, Any]:
+        """Move the data into place as ``upload`` and return its digests."""
+        with self.lock:
+            offset = self.offset
+            if self.size is not None and offset != self.size:
+                raise UploadError("Upload is incomplete.", 409, offset=offset)
+            if offset == 0:
+                raise UploadError("Upload is empty.", 400)
+            if not self.probed:
+                self._probe(offset)
+            dst = os.path.join(self.sess_dir, "upload")
+            os.replace(self.path, dst)
+            if self.hasher is not None and self.hasher.size == offset:
+                result = self.hasher.result()
+                digests.remember(dst, result)
+            else:
+                result = digests.file_digests(dst)
+            Path(self.sess_dir, META).unlink(missing_ok=True)
+            return result
+
+
+_uploads: Dict[str, Upload] = {}
+_uploads_lock = threading.Lock()
+
+
+def create(root: str, filename: str, size: int | None) -> Upload:
+    upload_id = uuid.uuid4().hex[:12]
+    sess_dir = new_session_dir(root, upload_id)
+    with open(os.path.join(sess_dir, META), "w", encoding="utf-8") as fh:
+        json.dump({"filename": filename, "size": size, "created": time.time()}, fh)
+    Path(sess_dir, PART).touch()
+    upload = Upload(upload_id, sess_dir, filename, size)
+    with _uploads_lock:
+        _uploads[upload_id] = upload
+    return upload
+
+
+def get(root: str, upload_id: str) -> Upload | None:
+    """The upload ``upload_id``, reloaded from disk if this process lost it."""
+    with _uploads_lock:
+        upload = _uploads.get(upload_id)
+        if upload is not None:
+            return upload
+        sess_dir = os.path.join(root, upload_id)
+        try:
+            with open(os.path.join(sess_dir, META), "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        upload = Upload(upload_id, sess_dir, meta.get("filename") or "upload", meta.get("size"))
+        upload.hasher = None
+        _uploads[upload_id] = upload
+        return upload
+
+
+def discard(upload: Upload):
+    """Forget ``upload`` and delete its session directory."""
+    with _uploads_lock:
+        _uploads.pop(upload.id, None)
+    shutil.rmtree(upload.sess_dir, ignore_errors=True)
+
+
+def forget(upload: Upload):
+    with _uploads_lock:
+        _uploads.pop(upload.id, None)
+
+
+def safe_stem(filename: str) -> str:
+    return sanitize(Path(filename).stem)
+
+
+def start_session(session: str, sess_dir: str, src_path: str, orig_name: str, params: Dict[str, Any],
+                  upload_digests: Dict[str, Any] | None = None,
+                  reservation: jobs.Reservation | None = None) -> Dict[str, Any]:
+    """Preview the input, create the job's progress and queue the pipeline.
+
+    The job takes ``reservation``'s slot when one is given; otherwise raises
+    :class:`jobs.QueueFull` (after removing the session) when the scheduler
+    refuses the job.
+    """
+    stem = safe_stem(orig_name)
+    preview = os.path.join(sess_dir, "input_preview.wav")
+    try:
+        make_preview(Path(src_path), Path(preview), sr=48000, stereo=True)
+    except Exception:
+        shutil.copyfile(src_path, preview)
+        if upload_digests:
+            digests.remember(preview, upload_digests)
+
+    seed = progress_bus.default_progress()
+    seed.update({"message": "Starting…", "original_stem": stem})
+    state = progress_bus.create(sess_dir, seed)
+
+    def on_queued(position, eta_s):
+        state.update(status="queued", queue_position=position, eta_s=eta_s,
+                     message=f"Queued (position {position}, about {eta_s} s)")
+
+    try:
+        jobs.scheduler().submit(
+            session,
+            run_pipeline,
+            session, sess_dir, src_path, params, {}, {}, orig_name, stem,
+            notify=on_queued,
+            reservation=reservation,
+        )
+    except jobs.QueueFull:
+        progress_bus.discard(sess_dir)
+        shutil.rmtree(sess_dir, ignore_errors=True)
+        raise
+    return {"session": session, "progress_url": f"/progress/{session}", "events_url": f"/events/{session}"}
+
+
+__all__ = [
+    "UploadError",
+    "Upload",
+    "probe_header",
+    "check_header",
+    "create",
+    "get",
+    "discard",
+    "forget",
+    "safe_stem",
+    "start_session",
+]
@@ -1,6 +1,12 @@
 from pathlib import Path
+from collections import OrderedDict
 import json
-import hashlib
+import os
+import threading
+
+from .digests import sha256_of
+
+MANIFEST = 'manifest.json'
 
 def session_root(upload_root, session):
     """Return the Path to a session directory under upload_root."""
@@ -8,21 +14,87 @@ def session_root(upload_root, session):
 
 def sha256sum(path):
     """Compute sha256 checksum of file at path."""
-    h = hashlib.sha256()
-    with open(path, 'rb') as fh:
-        for chunk in iter(lambda: fh.read(8192), b''):
-            h.update(chunk)
-    return h.hexdigest()
+    return sha256_of(path)
 
 def write_manifest(root: Path, manifest: dict):
     """Persist ``manifest`` to ``manifest.json``.
 
     The caller is expected to provide checksum and size information; this
     helper simply writes out the supplied mapping without recomputing hashes.
+    The file is replaced atomically so readers never see a partial manifest.
+    """
+    tmp = Path(root) / f'{MANIFEST}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp, Path(root) / MANIFEST)
+
+
+class ManifestEntry:
+    """A parsed manifest plus a filename -> entry table."""
+
+    def __init__(self, manifest: dict):
+        self.manifest = manifest
+        self.by_filename = {meta.get('filename'): meta for meta in manifest.values() if isinstance(meta, dict)}
+
+    def lookup(self, key: str):
+        """Entry for a manifest key or a filename, else ``None``."""
+        return self.manifest.get(key) or self.by_filename.get(key)
+
+
+class ManifestIndex:
+    """Per-process LRU of parsed manifests.
+
+    Entries are revalidated against the file's inode, size and mtime on every
+    access, so a rewritten manifest is picked up immediately while repeated
+    lookups (e.g. the range requests of a waveform view) skip the JSON parse.
     """
-    with open(root / 'manifest.json', 'w', encoding='utf-8') as fh:
-        json.dump(manifest, fh)
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, root: Path):
+        """The :class:`ManifestEntry` for ``root`` or ``None`` if it has no manifest."""
+        path = Path(root) / MANIFEST
+        key = str(path)
+        try:
+            st = path.stat()
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        sig = (st.st_ino, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == sig:
+                self._entries.move_to_end(key)
+                return cached[1]
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                entry = ManifestEntry(json.load(fh))
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._entries[key] = (sig, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return entry
+
+    def lookup(self, root: Path, key: str):
+        entry = self.get(root)
+        return entry.lookup(key) if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+manifest_index = ManifestIndex()
 
 def read_manifest(root: Path) -> dict:
-    with open(root / 'manifest.json', 'r', encoding='utf-8') as fh:
-        return json.load(fh)
+    entry = manifest_index.get(root)
+    if entry is None:
+        raise FileNotFoundError(Path(root) / MANIFEST)
+    return dict(entry.manifest)
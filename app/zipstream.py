@@ -0,0 +1,130 @@
+"""Streaming, uncompressed ZIP archives with a precomputed layout.
+
+Every member's CRC-32 and size are known up front (they are recorded in the
+session manifest), so headers carry final values, no data descriptors are
+needed and the archive's exact bytes – and total length – are fixed before
+anything is read.  That makes ``Content-Length``, ``Range`` and resumed
+downloads work without ever writing the archive to disk.  Zip64 records are
+emitted only where sizes, offsets or the entry count require them.
+"""
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+CHUNK_SIZE = 256 * 1024
+_MAX32 = 0xFFFFFFFF
+_MAX16 = 0xFFFF
+_UTF8_FLAG = 0x0800
+_VERSION = 45  # 4.5: zip64
+_MADE_BY = (3 << 8) | _VERSION  # unix
+_FILE_ATTR = (0o100644 << 16)
+
+
+class ZipMember(NamedTuple):
+    name: str
+    path: Path
+    size: int
+    crc32: int
+
+
+def crc32_file(path: str | Path) -> int:
+    crc = 0
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc & _MAX32
+
+
+def _dos_datetime(ts: float):
+    t = time.gmtime(ts)
+    year = max(1980, t.tm_year)
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class ZipPlan:
+    """Byte layout of a stored ZIP of ``members`` stamped with ``timestamp``."""
+
+    def __init__(self, members: list[ZipMember], timestamp: float, force_zip64: bool = False):
+        self.members = list(members)
+        dos_time, dos_date = _dos_datetime(timestamp)
+        self._segments = []  # (offset, bytes | ZipMember)
+        offset = 0
+        central = []
+        for m in self.members:
+            name = m.name.encode("utf-8")
+            big = force_zip64 or m.size >= _MAX32
+            extra = struct.pack("<HHQQ", 0x0001, 16, m.size, m.size) if big else b""
+            size32 = _MAX32 if big else m.size
+            local = struct.pack(
+                "<IHHHHHIIIHH", 0x04034B50, _VERSION, _UTF8_FLAG, 0, dos_time, dos_date,
+                m.crc32, size32, size32, len(name), len(extra),
+            ) + name + extra
+            self._add(offset, local)
+            offset += len(local)
+            self._add(offset, m)
+            header_offset = offset - len(local)
+            offset += m.size
+
+            fields = []
+            if big:
+                fields += [m.size, m.size]
+            far = force_zip64 or header_offset >= _MAX32
+            if far:
+                fields.append(header_offset)
+            cextra = struct.pack(f"<HH{len(fields)}Q", 0x0001, 8 * len(fields), *fields) if fields else b""
+            central.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, _MADE_BY, _VERSION, _UTF8_FLAG, 0, dos_time, dos_date,
+                m.crc32, size32, size32, len(name), len(cextra), 0, 0, 0, _FILE_ATTR,
+                _MAX32 if far else header_offset,
+            ) + name + cextra)
+
+        cd = b"".join(central)
+        cd_offset, cd_size, count = offset, len(cd), len(self.members)
+        tail = cd
+        zip64 = force_zip64 or count >= _MAX16 or cd_offset >= _MAX32 or cd_size >= _MAX32
+        if zip64:
+            eocd64_offset = cd_offset + cd_size
+            tail += struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, _MADE_BY, _VERSION, 0, 0, count, count, cd_size, cd_offset)
+            tail += struct.pack("<IIQI", 0x07064B50, 0, eocd64_offset, 1)
+        tail += struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, min(count, _MAX16), min(count, _MAX16),
+            min(cd_size, _MAX32), min(cd_offset, _MAX32), 0,
+        )
+        self._add(offset, tail)
+        self.size = offset + len(tail)
+
+    def _add(self, offset: int, payload):
+        self._segments.append((offset, payload))
+
+    def iter_bytes(self, start: int = 0, end: int | None = None, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield archive bytes ``start`` .. ``end`` (inclusive) in bounded chunks."""
+        end = self.size - 1 if end is None else min(end, self.size - 1)
+        for seg_offset, payload in self._segments:
+            length = payload.size if isinstance(payload, ZipMember) else len(payload)
+            lo, hi = max(start, seg_offset), min(end, seg_offset + length - 1)
+            if lo > hi:
+                continue
+            if not isinstance(payload, ZipMember):
+                yield payload[lo - seg_offset:hi - seg_offset + 1]
+                continue
+            with open(payload.path, "rb") as fh:
+                fh.seek(lo - seg_offset)
+                remaining = hi - lo + 1
+                while remaining > 0:
+                    buf = fh.read(min(chunk_size, remaining))
+                    if not buf:
+                        raise IOError(f"{payload.path} is shorter than recorded")
+                    remaining -= len(buf)
+                    yield buf
+
+
+def plan_from_manifest(root: str | Path, members: list[str], manifest: dict, timestamp: float) -> ZipPlan:
+    """Layout for ``members`` (filenames) using sizes/CRCs recorded in ``manifest``."""
+    root = Path(root)
+    entries = [ZipMember(fn, root / fn, int(manifest[fn]["bytes"]), int(manifest[fn]["crc32"])) for fn in members]
+    return ZipPlan(entries, timestamp)
+
+
+__all__ = ["ZipMember", "ZipPlan", "crc32_file", "plan_from_manifest"]
@@ -0,0 +1,270 @@
+"""Stage-level benchmarks on synthetic material.
+
+Usage::
+
+    python -m benchmarks.run                       # quick: 30 s, 48 kHz, stereo, all kinds
+    python -m benchmarks.run --durations 30s,5m,20m --rates 44100,48000,96000 --channels 1,2
+    python -m benchmarks.run --out bench.json --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.run --write-baseline benchmarks/baseline.json
+
+Every case (kind × duration × rate × channels) runs in a fresh upload root so
+the render, feature and loudnorm caches start cold.  Each stage reports wall
+time, x-realtime (audio seconds per wall second) and the peak RSS sampled
+while it ran; ``run_pipeline`` is timed end to end in its own session.  With
+``--baseline`` the run fails (exit status 1) when any stage is slower than the
+baseline by more than ``--threshold`` (relative) and ``--min-delta`` seconds.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import synth
+
+STAGES = (
+    "ffprobe_info",
+    "measure_loudnorm_json",
+    "ebur128_timeline",
+    "extract_features",
+    "loudnorm_two_pass_ffmpeg",
+    "loudnorm_two_pass_python",
+    "normalize_peak_to",
+    "finalize_session",
+    "run_pipeline",
+)
+
+
+class RssSampler:
+    """Peak resident set size of this process while a stage runs (MB).
+
+    Samples ``/proc/self/statm`` on a background thread; elsewhere falls back
+    to ``ru_maxrss``, which is the peak since process start.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._proc = Path("/proc/self/statm").exists()
+
+    def _rss(self) -> int:
+        if self._proc:
+            with open("/proc/self/statm") as fh:
+                return int(fh.read().split()[1]) * self._page
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    @contextmanager
+    def measure(self):
+        self.peak = self._rss()
+        self._stop.clear()
+        t = threading.Thread(target=self._run, daemon=True)
+        t.start()
+        try:
+            yield self
+        finally:
+            self._stop.set()
+            t.join()
+            self.peak = max(self.peak, self._rss())
+
+
+def parse_duration(text: str) -> float:
+    text = text.strip().lower()
+    if text.endswith("m"):
+        return float(text[:-1]) * 60
+    return float(text.rstrip("s"))
+
+
+def case_id(kind: str, seconds: float, sr: int, channels: int) -> str:
+    return f"{kind}-{seconds:g}s-{sr}-{channels}ch"
+
+
+def _timed(results: dict, name: str, seconds: float, sampler: RssSampler, fn, *args, **kwargs):
+    with sampler.measure():
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+    results[name] = {
+        "seconds": round(elapsed, 4),
+        "x_realtime": round(seconds / elapsed, 2) if elapsed > 0 else None,
+        "peak_rss_mb": round(sampler.peak / 2**20, 1),
+    }
+    return out
+
+
+def run_case(kind: str, seconds: float, sr: int, channels: int, stages=STAGES) -> dict:
+    """Run the selected stages on one synthetic file in a throwaway upload root."""
+    from app import ai_module, pipeline, progress_bus
+
+    ffmpeg = shutil.which("ffmpeg") is not None
+    sampler = RssSampler()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="peakpilot-bench-") as tmp:
+        root = Path(tmp)
+        sess = root / "stages"
+        sess.mkdir()
+        src = str(synth.write(sess / "upload", kind, seconds, sr, channels))
+
+        if "ffprobe_info" in stages:
+            _timed(results, "ffprobe_info", seconds, sampler, pipeline.ffprobe_info, src)
+        if "measure_loudnorm_json" in stages:
+            _timed(results, "measure_loudnorm_json", seconds, sampler, pipeline.measure_loudnorm_json, src)
+        timeline = None
+        if "ebur128_timeline" in stages or "extract_features" in stages:
+            timeline = _timed(results, "ebur128_timeline", seconds, sampler, pipeline.ebur128_timeline, src)
+        if "extract_features" in stages:
+            _timed(results, "extract_features", seconds, sampler, ai_module._extract_features, Path(src), timeline)
+
+        club = str(sess / "club_master.wav")
+        stream = str(sess / "stream_master.wav")
+        if "loudnorm_two_pass_ffmpeg" in stages:
+            if ffmpeg:
+                _timed(results, "loudnorm_two_pass_ffmpeg", seconds, sampler,
+                       pipeline.loudnorm_two_pass, src, club, -7.2, -0.8, 7, sr=48000)
+            else:
+                results["loudnorm_two_pass_ffmpeg"] = {"skipped": "ffmpeg not found"}
+        if "loudnorm_two_pass_python" in stages or "finalize_session" in stages:
+            _timed(results, "loudnorm_two_pass_python", seconds, sampler,
+                   pipeline._loudnorm_two_pass_py, src, stream, -9.5, -1.0, 9, sr=44100)
+        if "normalize_peak_to" in stages or "finalize_session" in stages:
+            _timed(results, "normalize_peak_to", seconds, sampler,
+                   pipeline.normalize_peak_to, src, str(sess / "premaster_unlimited.wav"), -6.0, sr=48000)
+        if "finalize_session" in stages:
+            if not os.path.exists(club):
+                shutil.copyfile(stream, club)
+            progress_bus.create(str(sess), progress_bus.default_progress())
+            _timed(results, "finalize_session", seconds, sampler,
+                   pipeline.finalize_session, str(sess), {"input": {}}, "bench.wav", "bench")
+            progress_bus.discard(str(sess))
+
+        if "run_pipeline" in stages:
+            job = root / "job"
+            job.mkdir()
+            upload = job / "upload"
+            os.replace(src, upload)
+            progress_bus.create(str(job), progress_bus.default_progress())
+            _timed(results, "run_pipeline", seconds, sampler, pipeline.run_pipeline,
+                   "bench", str(job), str(upload), {}, {}, {}, "bench.wav", "bench")
+            state = json.loads((job / progress_bus.PROGRESS_FILE).read_text())
+            if not state.get("done") or state.get("error"):
+                results["run_pipeline"]["error"] = state.get("error") or "did not finish"
+
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "kind": kind,
+        "duration_s": seconds,
+        "sr": sr,
+        "channels": channels,
+        "stages": results,
+        "child_peak_rss_mb": round(children / (2**20 if sys.platform == "darwin" else 2**10), 1),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta: float = 0.05) -> list:
+    """Stages slower than ``baseline`` by more than ``threshold`` and ``min_delta`` s."""
+    regressions = []
+    for cid, case in current.get("cases", {}).items():
+        base_case = baseline.get("cases", {}).get(cid)
+        if not base_case:
+            continue
+        for stage, res in case["stages"].items():
+            base = base_case["stages"].get(stage, {})
+            if "seconds" not in res or "seconds" not in base:
+                continue
+            delta = res["seconds"] - base["seconds"]
+            if delta > min_delta and res["seconds"] > base["seconds"] * (1 + threshold):
+                regressions.append({
+                    "case": cid,
+                    "stage": stage,
+                    "baseline_s": base["seconds"],
+                    "current_s": res["seconds"],
+                    "ratio": round(res["seconds"] / base["seconds"], 2) if base["seconds"] else None,
+                })
+    return regressions
+
+
+def _print_table(report: dict, out=sys.stdout):
+    out.write(f"{'case':<34}{'stage':<28}{'seconds':>10}{'x-rt':>9}{'rss MB':>9}\n")
+    for cid, case in report["cases"].items():
+        for stage, res in case["stages"].items():
+            if "skipped" in res:
+                out.write(f"{cid:<34}{stage:<28}{'skipped: ' + res['skipped']:>36}\n")
+                continue
+            xrt = "-" if res["x_realtime"] is None else f"{res['x_realtime']:.1f}"
+            out.write(f"{cid:<34}{stage:<28}{res['seconds']:>10.3f}{xrt:>9}{res['peak_rss_mb']:>9.1f}\n")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[0])
+    ap.add_argument("--kinds", default=",".join(synth.KINDS))
+    ap.add_argument("--durations", default="30s", help="comma list, e.g. 30s,5m,20m")
+    ap.add_argument("--rates", default="48000")
+    ap.add_argument("--channels", default="2")
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--out", help="write the JSON report here")
+    ap.add_argument("--baseline", help="compare against this JSON report")
+    ap.add_argument("--write-baseline", help="write the JSON report as the new baseline")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    ap.add_argument("--min-delta", type=float, default=0.05, help="ignore slowdowns smaller than this (s)")
+    args = ap.parse_args(argv)
+
+    stages = tuple(s for s in args.stages.split(",") if s)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    # every case starts cold; the shared caches would turn repeats into lookups
+    os.environ.setdefault("RENDER_CACHE", "false")
+    os.environ.setdefault("JANITOR", "false")
+
+    import numpy as np
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "ffmpeg": shutil.which("ffmpeg") is not None,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "cases": {},
+    }
+    for kind in args.kinds.split(","):
+        for seconds in map(parse_duration, args.durations.split(",")):
+            for sr in map(int, args.rates.split(",")):
+                for ch in map(int, args.channels.split(",")):
+                    cid = case_id(kind, seconds, sr, ch)
+                    sys.stderr.write(f"running {cid}…\n")
+                    report["cases"][cid] = run_case(kind, seconds, sr, ch, stages)
+
+    _print_table(report)
+    for path in (args.out, args.write_baseline):
+        if path:
+            Path(path).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(report, baseline, args.threshold, args.min_delta)
+        for r in regressions:
+            sys.stdout.write(
+                f"REGRESSION {r['case']} {r['stage']}: {r['baseline_s']:.3f}s -> {r['current_s']:.3f}s (x{r['ratio']})\n"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,3 +8,25 @@ DEFAULT_TARGETS = {
 MAX_FILE_MB = int(os.getenv("MAX_FILE_MB", "200"))
 CLEAN_JOBS_AFTER_HOURS = int(os.getenv("CLEAN_JOBS_AFTER_HOURS", "24"))
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+PARALLEL_RENDER = os.getenv("PARALLEL_RENDER", "true").lower() == "true"
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0"))  # 0 = one per target, capped at cpu_count
+MEASURE_CACHE = os.getenv("MEASURE_CACHE", "true").lower() == "true"
+MEASURE_CACHE_DIR = os.getenv("MEASURE_CACHE_DIR", "")  # default: <upload root>/cache/loudnorm
+RENDER_MODE = os.getenv("RENDER_MODE", "fused")  # "fused": one ffmpeg for all masters; "separate": one per target
+FEATURE_CACHE_MB = int(os.getenv("FEATURE_CACHE_MB", "64"))
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", "32"))
+MODEL_FLUSH_SECONDS = float(os.getenv("MODEL_FLUSH_SECONDS", "5"))
+MODEL_MAX_FILES = int(os.getenv("MODEL_MAX_FILES", "500"))
+MODEL_MAX_AGE_HOURS = int(os.getenv("MODEL_MAX_AGE_HOURS", "168"))
+PROGRESS_FLUSH_SECONDS = float(os.getenv("PROGRESS_FLUSH_SECONDS", "0.5"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # concurrent mastering jobs per process
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "16"))  # waiting jobs before /start answers 429
+RENDER_CACHE = os.getenv("RENDER_CACHE", "true").lower() == "true"
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", "")  # default: <upload root>/cache/renders
+RENDER_CACHE_MB = int(os.getenv("RENDER_CACHE_MB", "4096"))
+PREVIEW_CODEC = os.getenv("PREVIEW_CODEC", "opus")  # comma list of "opus" (WebM), "aac" (M4A); "wav" = WAV previews only
+UPLOAD_CHUNK_MB = int(os.getenv("UPLOAD_CHUNK_MB", "8"))  # chunk size advertised by POST /uploads
+JANITOR = os.getenv("JANITOR", "true").lower() == "true"  # background session reaper
+JANITOR_INTERVAL_SECONDS = float(os.getenv("JANITOR_INTERVAL_SECONDS", "600"))
+SESSION_QUOTA_MB = int(os.getenv("SESSION_QUOTA_MB", "20480"))  # total session bytes before LRU eviction
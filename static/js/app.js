@@ -139,10 +139,52 @@ function drawTimelineOverlay(tl){
   }
 }
 
+// Chunked upload: the server checks the header after the first chunk, and a
+// dropped connection resumes from the offset the server reports.
+async function uploadInChunks(file){
+  const init = await fetch('/uploads', {
+    method:'POST', headers:{'Content-Type':'application/json'},
+    body: JSON.stringify({ filename: file.name, size: file.size })
+  });
+  if (!init.ok) throw new Error(await init.text());
+  const { upload_id, chunk_size } = await init.json();
+  const url = `/uploads/${encodeURIComponent(upload_id)}`;
+  let offset = 0, failures = 0;
+  while (offset < file.size) {
+    try {
+      const r = await fetch(url, {
+        method:'PATCH', headers:{'Upload-Offset': String(offset)},
+        body: file.slice(offset, offset + chunk_size)
+      });
+      if (r.status === 409 || r.ok) {
+        offset = Number(r.headers.get('Upload-Offset'));
+        failures = 0;
+        continue;
+      }
+      throw new Error(await r.text());
+    } catch (err) {
+      if (err instanceof TypeError && ++failures <= 5) {
+        await new Promise(res=>setTimeout(res, 1000 * failures));
+        const h = await fetch(url, { method:'HEAD' }).catch(()=>null);
+        if (h && h.ok) offset = Number(h.headers.get('Upload-Offset'));
+        continue;
+      }
+      throw err;
+    }
+  }
+  return url;
+}
+
 async function startJob(file, blobUrl){
+  let uploadUrl;
+  try {
+    uploadUrl = await uploadInChunks(file);
+  } catch (err) {
+    alert('Upload failed: ' + err.message);
+    return;
+  }
   // send with options
   const fd = new FormData();
-  fd.append('audio', file);
   fd.append('preset', presetSel.value);
   fd.append('bits', bitsSel.value);
   fd.append('dither', ditherSel.value);
@@ -151,7 +193,7 @@ async function startJob(file, blobUrl){
   fd.append('smart_limiter', smartChk.checked ? 'true' : 'false');
   fd.append('do_trim_pad', 'true');
 
-  const r = await fetch('/start', { method:'POST', body: fd });
+  const r = await fetch(`${uploadUrl}/commit`, { method:'POST', body: fd });
   if (!r.ok) { alert('Failed to start: ' + (await r.text())); return; }
   const { session, progress_url } = await r.json();
   window.PeakPilot = window.PeakPilot || {};
@@ -159,7 +201,7 @@ async function startJob(file, blobUrl){
   if (typeof attachOriginalPlayer === 'function') {
     attachOriginalPlayer();
   }
-  poll(progress_url, blobUrl, session);
+  subscribe(session, progress_url, blobUrl);
 }
 
 function setABGains(j){
@@ -181,107 +223,146 @@ function setABGains(j){
   };
 }
 
+// Live progress: Server-Sent Events with /progress polling as the fallback.
+function subscribe(session, progressUrl, originalBlobUrl){
+  if (!window.EventSource) return poll(progressUrl, originalBlobUrl, session);
+  const es = new EventSource(`/events/${encodeURIComponent(session)}`);
+  let doc = {};
+  let finished = false;
+  const fallback = ()=>{
+    es.close();
+    if (!finished) poll(progressUrl, originalBlobUrl, session);
+  };
+  const apply = ()=>{
+    if (handleProgress(doc, originalBlobUrl, session)) { finished = true; es.close(); }
+  };
+  es.addEventListener('snapshot', ev=>{
+    doc = JSON.parse(ev.data);
+    apply();
+  });
+  es.addEventListener('progress', ev=>{
+    const patch = JSON.parse(ev.data);
+    for (const [k, v] of Object.entries(patch)) {
+      if ((k === 'masters' || k === 'metrics') && v && typeof v === 'object') {
+        doc[k] = Object.assign({}, doc[k] || {}, v);
+      } else {
+        doc[k] = v;
+      }
+    }
+    if ('pct' in patch) doc.percent = patch.pct;
+    if ('status' in patch) doc.phase = patch.status;
+    apply();
+  });
+  es.addEventListener('fallback', fallback);
+  es.onerror = ()=>{ if (es.readyState === EventSource.CLOSED) fallback(); };
+}
+
 async function poll(url, originalBlobUrl, session){
   clearInterval(polling);
   polling = setInterval(async ()=>{
     try{
       const r = await fetch(url, { cache: 'no-store' });
       const j = await r.json();
-      setAnalyzeProgress(j.percent);
-      if (j.phase || j.message) setAnalyzeState(j.phase || j.message);
-      updateMetrics(j);
-      if (typeof updateMasterCardsProgress === 'function') {
-        updateMasterCardsProgress(j);
-      }
+      if (handleProgress(j, originalBlobUrl, session)) clearInterval(polling);
+    }catch(e){ /* ignore transient errors */ }
+  }, 1000);
+}
 
-      if (j.done) {
-        clearInterval(polling);
-        showAnalyzingModal(false);
-        if (window.renderUploadedAudioCanvas) {
-          window.renderUploadedAudioCanvas(session);
-        }
-        
-        const s = window.PeakPilot.session;
-        const jData = j;
-        const baseStream = `/stream/${s}/`;
-        const baseDown   = `/download/${s}/`;
-        const names = jData?.filenames || null;
-        if (!names) {
-          console.warn('Missing filenames in progress; cannot wire downloads safely.');
-        }
-        function streamURL(name){ return baseStream + encodeURIComponent(name); }
-        function dlURL(name){ return baseDown + encodeURIComponent(name); }
-        const previewUrls = {
-          original:  streamURL('input_preview.wav'),
-          club:      streamURL('club_master_preview.wav'),
-          streaming: streamURL('stream_master_preview.wav'),
-          unlimited: streamURL('premaster_unlimited_preview.wav'),
-        };
-        const downloadsReady = !!jData?.downloads_ready;
-        const metrics = jData?.metrics || {};
-
-        if (typeof renderMasteringResultsInHero === 'function') {
-          renderMasteringResultsInHero(s, [
-            {
-              id: "club",
-              title: "Club (48k/24, target −7.2 LUFS, −0.8 dBTP)",
-              processedUrl: previewUrls.club,
-              downloadWav:  downloadsReady && names ? dlURL(names.wav.club) : null,
-              downloadInfo: downloadsReady && names ? dlURL(names.info.club) : null,
-              metrics: { input: metrics.input || {}, output: metrics.club || {} }
-            },
-            {
-              id: "streaming",
-              title: "Streaming (44.1k/24, target −9.5 LUFS, −1.0 dBTP)",
-              processedUrl: previewUrls.streaming,
-              downloadWav:  downloadsReady && names ? dlURL(names.wav.streaming) : null,
-              downloadInfo: downloadsReady && names ? dlURL(names.info.streaming) : null,
-              metrics: { input: metrics.input || {}, output: metrics.streaming || {} }
-            },
-            {
-              id: "unlimited",
-              title: "Unlimited Premaster (48k/24, peak −6 dBFS)",
-              processedUrl: previewUrls.unlimited,
-              downloadWav:  downloadsReady && names ? dlURL(names.wav.unlimited) : null,
-              downloadInfo: downloadsReady && names ? dlURL(names.info.unlimited) : null,
-              metrics: { input: metrics.input || {}, output: metrics.unlimited || {} }
-            }
-          ], { showCustom: false });
-          if (typeof updateMasterCardsProgress === 'function') {
-            updateMasterCardsProgress(jData);
-          }
-        }
+// Apply one progress document to the UI; returns true once the job is done.
+function handleProgress(j, originalBlobUrl, session){
+  setAnalyzeProgress(j.percent);
+  if (j.phase || j.message) setAnalyzeState(j.phase === 'queued' ? j.message : (j.phase || j.message));
+  updateMetrics(j);
+  if (typeof updateMasterCardsProgress === 'function') {
+    updateMasterCardsProgress(j);
+  }
 
-        const processedById = {
-          club: previewUrls.club,
-          streaming: previewUrls.streaming,
-          unlimited: previewUrls.unlimited,
-          original: previewUrls.original,
-        };
-
-        try {
-          const gains = setABGains(jData);
-          abOrig?.addEventListener('click', () => loadIntoWave(processedById.original,  'Original (gain-matched)', gains.original));
-          pvClub?.addEventListener('click', () => loadIntoWave(processedById.club,      'Club (gain-matched)',     gains.club));
-          pvStreaming?.addEventListener('click', () => loadIntoWave(processedById.streaming,'Streaming (gain-matched)', gains.streaming));
-          pvPremaster?.addEventListener('click', () => loadIntoWave(processedById.unlimited,'Unlimited (gain-matched)', gains.premaster));
-        } catch {}
-        if (window.drawPeakHighlightsOnOriginal){
-          const pv = processedById.original;
-          fetch(pv).then(r=>r.arrayBuffer()).then(ab=> window.PeakPilot.getAC().decodeAudioData(ab)).then(buf=> window.drawPeakHighlightsOnOriginal(loudCanvas, buf, -1.0)).catch(()=>{});
-        }
-const preTech = document.getElementById('preTech');
-        if(preTech){
-          const adv = j.metrics?.advisor || {};
-          if(adv.input_I!=null){
-            preTech.textContent = `LUFS-I: ${adv.input_I.toFixed(2)}\nTP: ${(adv.input_TP??0).toFixed(2)}\nLRA: ${(adv.input_LRA??0).toFixed(2)}`;
-          } else {
-            preTech.textContent = 'No technical data';
-          }
+  if (j.done) {
+    showAnalyzingModal(false);
+    if (window.renderUploadedAudioCanvas) {
+      window.renderUploadedAudioCanvas(session);
+    }
+
+    const s = window.PeakPilot.session;
+    const jData = j;
+    const baseStream = `/stream/${s}/`;
+    const baseDown   = `/download/${s}/`;
+    const names = jData?.filenames || null;
+    if (!names) {
+      console.warn('Missing filenames in progress; cannot wire downloads safely.');
+    }
+    function streamURL(name){ return baseStream + encodeURIComponent(name); }
+    function dlURL(name){ return baseDown + encodeURIComponent(name); }
+    const previewUrls = {
+      original:  streamURL('input_preview.wav'),
+      club:      streamURL('club_master_preview.wav'),
+      streaming: streamURL('stream_master_preview.wav'),
+      unlimited: streamURL('premaster_unlimited_preview.wav'),
+    };
+    const downloadsReady = !!jData?.downloads_ready;
+    const metrics = jData?.metrics || {};
+
+    if (typeof renderMasteringResultsInHero === 'function') {
+      renderMasteringResultsInHero(s, [
+        {
+          id: "club",
+          title: "Club (48k/24, target −7.2 LUFS, −0.8 dBTP)",
+          processedUrl: previewUrls.club,
+          downloadWav:  downloadsReady && names ? dlURL(names.wav.club) : null,
+          downloadInfo: downloadsReady && names ? dlURL(names.info.club) : null,
+          metrics: { input: metrics.input || {}, output: metrics.club || {} }
+        },
+        {
+          id: "streaming",
+          title: "Streaming (44.1k/24, target −9.5 LUFS, −1.0 dBTP)",
+          processedUrl: previewUrls.streaming,
+          downloadWav:  downloadsReady && names ? dlURL(names.wav.streaming) : null,
+          downloadInfo: downloadsReady && names ? dlURL(names.info.streaming) : null,
+          metrics: { input: metrics.input || {}, output: metrics.streaming || {} }
+        },
+        {
+          id: "unlimited",
+          title: "Unlimited Premaster (48k/24, peak −6 dBFS)",
+          processedUrl: previewUrls.unlimited,
+          downloadWav:  downloadsReady && names ? dlURL(names.wav.unlimited) : null,
+          downloadInfo: downloadsReady && names ? dlURL(names.info.unlimited) : null,
+          metrics: { input: metrics.input || {}, output: metrics.unlimited || {} }
         }
+      ], { showCustom: false });
+      if (typeof updateMasterCardsProgress === 'function') {
+        updateMasterCardsProgress(jData);
       }
-    }catch(e){ /* ignore transient errors */ }
-  }, 1000);
+    }
+
+    const processedById = {
+      club: previewUrls.club,
+      streaming: previewUrls.streaming,
+      unlimited: previewUrls.unlimited,
+      original: previewUrls.original,
+    };
+
+    try {
+      const gains = setABGains(jData);
+      abOrig?.addEventListener('click', () => loadIntoWave(processedById.original,  'Original (gain-matched)', gains.original));
+      pvClub?.addEventListener('click', () => loadIntoWave(processedById.club,      'Club (gain-matched)',     gains.club));
+      pvStreaming?.addEventListener('click', () => loadIntoWave(processedById.streaming,'Streaming (gain-matched)', gains.streaming));
+      pvPremaster?.addEventListener('click', () => loadIntoWave(processedById.unlimited,'Unlimited (gain-matched)', gains.premaster));
+    } catch {}
+    if (window.drawPeakHighlightsOnOriginal){
+      const pv = processedById.original;
+      fetch(pv).then(r=>r.arrayBuffer()).then(ab=> window.PeakPilot.getAC().decodeAudioData(ab)).then(buf=> window.drawPeakHighlightsOnOriginal(loudCanvas, buf, -1.0)).catch(()=>{});
+    }
+    const preTech = document.getElementById('preTech');
+    if(preTech){
+      const adv = j.metrics?.advisor || {};
+      if(adv.input_I!=null){
+        preTech.textContent = `LUFS-I: ${adv.input_I.toFixed(2)}\nTP: ${(adv.input_TP??0).toFixed(2)}\nLRA: ${(adv.input_LRA??0).toFixed(2)}`;
+      } else {
+        preTech.textContent = 'No technical data';
+      }
+    }
+  }
+  return !!j.done;
 }
 
 // UI wiring
@@ -0,0 +1,81 @@
+(() => {
+  // Waveform peak pyramids served by /peaks/<session>/<key> (see app/engine/peaks.py).
+  const Cache = new Map(); // url -> Promise<peaks>
+
+  function parse(ab){
+    const dv = new DataView(ab);
+    const magic = String.fromCharCode(dv.getUint8(0), dv.getUint8(1), dv.getUint8(2), dv.getUint8(3));
+    if (magic !== 'PPK1') throw new Error('bad peaks file');
+    const sr = dv.getUint32(4, true);
+    const frames = Number(dv.getBigUint64(8, true));
+    const bits = dv.getUint16(16, true), nLevels = dv.getUint16(18, true);
+    let off = 20;
+    const shapes = [];
+    for (let i = 0; i < nLevels; i++) { shapes.push([dv.getUint32(off, true), dv.getUint32(off + 4, true)]); off += 8; }
+    const scale = bits === 16 ? 32767 : 127, size = bits === 16 ? 2 : 1;
+    const levels = shapes.map(([spb, n]) => {
+      const min = new Float32Array(n), max = new Float32Array(n), rms = new Float32Array(n);
+      for (let i = 0; i < n; i++) {
+        const o = off + i * 3 * size;
+        const rd = k => (bits === 16 ? dv.getInt16(o + k * size, true) : dv.getInt8(o + k)) / scale;
+        min[i] = rd(0); max[i] = rd(1); rms[i] = rd(2);
+      }
+      off += n * 3 * size;
+      return { spb, n, min, max, rms };
+    });
+    return { sr, frames, duration: sr ? frames / sr : 0, levels };
+  }
+
+  // "/stream/<s>/<file>" -> "/peaks/<s>/<file>"
+  function urlFor(streamUrl, width){
+    const px = Math.max(256, Math.ceil((width || 2048) * 4));
+    return streamUrl.replace('/stream/', '/peaks/') + `?max_buckets=${px}`;
+  }
+
+  function load(url){
+    if (!Cache.has(url)) {
+      Cache.set(url, fetch(url).then(r => { if (!r.ok) throw new Error(`HTTP ${r.status}`); return r.arrayBuffer(); }).then(parse));
+    }
+    return Cache.get(url);
+  }
+
+  // Fallback when no pyramid is available: one level straight from an AudioBuffer.
+  function fromBuffer(buffer){
+    const L = buffer.getChannelData(0), R = buffer.numberOfChannels > 1 ? buffer.getChannelData(1) : null;
+    const n = L.length, min = new Float32Array(n), rms = new Float32Array(n);
+    for (let i = 0; i < n; i++) { const m = R ? (L[i] + R[i]) * .5 : L[i]; min[i] = m; rms[i] = Math.abs(m); }
+    return { sr: buffer.sampleRate, frames: n, duration: buffer.duration, levels: [{ spb: 1, n, min, max: min, rms }] };
+  }
+
+  // Reduce to exactly W columns of {min, max, rms, peak} using the coarsest sufficient level.
+  function columns(peaks, W){
+    const lv = peaks.levels.slice().reverse().find(l => l.n >= W) || peaks.levels[0];
+    const min = new Float32Array(W), max = new Float32Array(W), rms = new Float32Array(W), peak = new Float32Array(W);
+    for (let x = 0; x < W; x++) {
+      const a = Math.floor(x * lv.n / W), b = Math.max(a + 1, Math.floor((x + 1) * lv.n / W));
+      let mn = 1, mx = -1, sq = 0, c = 0;
+      for (let i = a; i < b && i < lv.n; i++) {
+        if (lv.min[i] < mn) mn = lv.min[i];
+        if (lv.max[i] > mx) mx = lv.max[i];
+        sq += lv.rms[i] * lv.rms[i]; c++;
+      }
+      if (!c) { mn = 0; mx = 0; }
+      min[x] = mn; max[x] = mx; rms[x] = Math.sqrt(sq / Math.max(1, c)); peak[x] = Math.max(Math.abs(mn), Math.abs(mx));
+    }
+    return { min, max, rms, peak };
+  }
+
+  // Accept header for preview audio: compressed encodings this browser can decode, WAV as fallback.
+  let accept = null;
+  function previewAccept(){
+    if (accept) return accept;
+    const a = document.createElement('audio');
+    const types = [];
+    if (a.canPlayType && a.canPlayType('audio/webm; codecs="opus"')) types.push('audio/webm');
+    if (a.canPlayType && a.canPlayType('audio/mp4; codecs="mp4a.40.2"')) types.push('audio/mp4');
+    accept = types.length ? `${types.join(', ')}, audio/wav;q=0.5` : 'audio/wav';
+    return accept;
+  }
+
+  window.PeakPilotPeaks = { load, urlFor, columns, fromBuffer, parse, previewAccept };
+})();
@@ -7,7 +7,7 @@
   const DecodeCache = new Map(); // url -> Promise<AudioBuffer>
   async function decodeUrl(url){
     if(!DecodeCache.has(url)){
-      const p=(async()=>{ const r=await fetch(url,{cache:"no-store"}); if(!r.ok) throw new Error(`HTTP ${r.status}`); const arr=await r.arrayBuffer(); return getAC().decodeAudioData(arr); })();
+      const p=(async()=>{ const r=await fetch(url,{headers:{Accept:window.PeakPilotPeaks.previewAccept()}}); if(!r.ok) throw new Error(`HTTP ${r.status}`); const arr=await r.arrayBuffer(); return getAC().decodeAudioData(arr); })();
       DecodeCache.set(url,p);
     }
     return DecodeCache.get(url);
@@ -47,50 +47,23 @@
   }
 
   // ---------- DRAW HELPERS ----------
-  function drawWave(ctx, buffer, W, H){
-    const ch=Math.min(2,buffer.numberOfChannels), L=buffer.getChannelData(0), R=ch>1?buffer.getChannelData(1):null;
-    const cols=W, step=Math.max(1,Math.floor(L.length/cols)), mid=H/2;
+  function drawWave(ctx, cols, W, H){
+    const mid=H/2;
 
     // RMS underlay
     ctx.beginPath();
-    for(let x=0;x<cols;x++){ const s=x*step; let sum=0,cnt=0;
-      for(let i=0;i<step && s+i<L.length;i++){ const l=L[s+i], r=R?R[s+i]:l, m=(l+r)*.5; sum+=m*m; cnt++; }
-      const rms=Math.sqrt(sum/Math.max(1,cnt)); const y=mid - rms*mid*.92; x?ctx.lineTo(x,y):ctx.moveTo(x,y);
-    }
-    for(let x=cols-1;x>=0;x--){ const s=x*step; let sum=0,cnt=0;
-      for(let i=0;i<step && s+i<L.length;i++){ const l=L[s+i], r=R?R[s+i]:l, m=(l+r)*.5; sum+=m*m; cnt++; }
-      const rms=Math.sqrt(sum/Math.max(1,cnt)); const y=mid + rms*mid*.92; ctx.lineTo(x,y);
-    }
+    for(let x=0;x<W;x++){ const y=mid - cols.rms[x]*mid*.92; x?ctx.lineTo(x,y):ctx.moveTo(x,y); }
+    for(let x=W-1;x>=0;x--){ ctx.lineTo(x, mid + cols.rms[x]*mid*.92); }
     ctx.closePath(); ctx.fillStyle="rgba(120,255,220,0.10)"; ctx.fill();
 
     // Peak outline neon
     const g=ctx.createLinearGradient(0,0,W,0); g.addColorStop(0,"rgba(80,180,255,0.98)"); g.addColorStop(1,"rgba(120,255,220,0.98)");
     ctx.beginPath();
-    for(let x=0;x<cols;x++){ const s=x*step; let minv=1,maxv=-1;
-      for(let i=0;i<step && s+i<L.length;i++){ const l=L[s+i], r=R?R[s+i]:l, v=(l+r)*.5; if(v<minv)minv=v; if(v>maxv)maxv=v; }
-      const yT=mid + minv*mid; x?ctx.lineTo(x,yT):ctx.moveTo(x,yT);
-    }
-    for(let x=cols-1;x>=0;x--){ const s=x*step; let minv=1,maxv=-1;
-      for(let i=0;i<step && s+i<L.length;i++){ const l=L[s+i], r=R?R[s+i]:l, v=(l+r)*.5; if(v<minv)minv=v; if(v>maxv)maxv=v; }
-      const yB=mid + maxv*mid; ctx.lineTo(x,yB);
-    }
+    for(let x=0;x<W;x++){ const yT=mid + cols.min[x]*mid; x?ctx.lineTo(x,yT):ctx.moveTo(x,yT); }
+    for(let x=W-1;x>=0;x--){ ctx.lineTo(x, mid + cols.max[x]*mid); }
     ctx.closePath(); ctx.lineWidth=1; ctx.strokeStyle=g; ctx.stroke();
   }
 
-  function precomputeColumns(buffer, W){
-    const L=buffer.getChannelData(0), R=buffer.numberOfChannels>1?buffer.getChannelData(1):null;
-    const step=Math.max(1,Math.floor(L.length/W)), cols=W;
-    const rms=new Float32Array(cols), peak=new Float32Array(cols);
-    for(let x=0;x<cols;x++){
-      const s=x*step; let sum=0,c=0, pk=0;
-      for(let i=0;i<step && s+i<L.length;i++){
-        const l=L[s+i], r=R?R[s+i]:l, m=(l+r)*.5; sum+=m*m; c++; const a=Math.abs(m); if(a>pk) pk=a;
-      }
-      rms[x]=Math.sqrt(sum/Math.max(1,c)); peak[x]=pk;
-    }
-    return {rms,peak};
-  }
-
   function drawLoudnessRibbon(ctx, cols, rms){
     const W=ctx.canvas.width, H=ctx.canvas.height;
     const step=Math.max(1,Math.floor(cols/W)); ctx.clearRect(0,0,W,H);
@@ -164,21 +137,22 @@
     _bindUI(){
       this.btn?.addEventListener("click", ()=>this.toggle());
       this.cv.addEventListener("pointerdown",(e)=>{
-        if(!this.buf) return;
-        const r=this.cv.getBoundingClientRect(); const p=Math.max(0,Math.min(1,(e.clientX-r.left)/r.width)); const t=p*this.buf.duration;
+        if(!this.peaks) return;
+        const r=this.cv.getBoundingClientRect(); const p=Math.max(0,Math.min(1,(e.clientX-r.left)/r.width)); const t=p*this.duration;
         (this.state==="playing") ? (this.offset=t, this._restartAtOffset()) : (this.offset=t, this._drawHead(p));
       }, {passive:true});
     }
     async load(){
       try{
         this.state="loading";
+        // waveform from the peak pyramid; the audio itself is decoded on first play
+        const P=window.PeakPilotPeaks;
         try{
-          this.buf=await decodeUrl(this.url);
+          this.peaks=await P.load(P.urlFor(this.url, (this.cv.parentElement.clientWidth||600)*(window.devicePixelRatio||1)));
         }catch{
-          const dl=this.url.replace("/stream/","/download/").replace(/_preview\.wav$/,".wav");
-          this.buf=await decodeUrl(dl);
-          this.url=dl;
+          this.peaks=P.fromBuffer(await this._decode());
         }
+        this.duration=this.peaks.duration;
         this.state="ready"; this.btn?.removeAttribute("disabled"); this.render();
       }catch(e){
         this.state="error"; this.btn?.setAttribute("disabled","disabled");
@@ -187,22 +161,33 @@
         if(this.spec)   this.spec.replaceWith(document.createTextNode(""));
       }
     }
+    async _decode(){
+      if(this.buf) return this.buf;
+      try{
+        this.buf=await decodeUrl(this.url);
+      }catch{
+        const dl=this.url.replace("/stream/","/download/").replace(/_preview\.wav$/,".wav");
+        this.buf=await decodeUrl(dl);
+        this.url=dl;
+      }
+      this.duration=this.buf.duration;
+      return this.buf;
+    }
     render(){
-      if(!this.buf||!this.cv) return;
+      if(!this.peaks||!this.cv) return;
       const dpr=Math.max(1,window.devicePixelRatio||1);
       const cssW=this.cv.parentElement.clientWidth||600, cssH=this.cv.parentElement.clientHeight||86;
       const W=Math.round(cssW*dpr), H=Math.round(cssH*dpr);
       this.cv.width=W; this.cv.height=H;
       const ctx=this.cv.getContext("2d",{alpha:true}); ctx.clearRect(0,0,W,H);
-      drawWave(ctx,this.buf,W,H); this.cv.classList.add("wave-neon");
+      this._cols = window.PeakPilotPeaks.columns(this.peaks, W);
+      drawWave(ctx,this._cols,W,H); this.cv.classList.add("wave-neon");
       this._ctx=ctx; this._W=W; this._H=H; this._lastX=null;
 
-      // Precompute for ribbon & TP ticks
-      this._cols = precomputeColumns(this.buf, W);
       // Draw overlay (TP hotspots)
       this.onDrawOverlay(this);
       // draw initial head
-      this._drawHead(this.offset/(this.buf.duration||1));
+      this._drawHead(this.offset/(this.duration||1));
 
       // Ribbon
       if(this.ribbon){
@@ -249,8 +234,8 @@
       cancelAnimationFrame(this._specRAF); this._specRAF=0;
       if(this.spec){ const ctx=this.spec.getContext("2d",{alpha:true}); ctx.clearRect(0,0,this.spec.width,this.spec.height); }
     }
-    play(){
-      if(!this.buf) return;
+    async play(){
+      if(!this.buf){ try{ await this._decode(); }catch{ return; } }
       const ac=getAC(); if(ac.state==="suspended") ac.resume();
       Bus.claim(this);
       const gen=++this._gen;
@@ -293,7 +278,7 @@
       this._node=null; this._gain=null;
       cancelAnimationFrame(this._raf); this._raf=0;
       this._killAnalyser();
-      if(this.buf) this._drawHead((this.offset||0)/(this.buf.duration||1));
+      if(this.peaks) this._drawHead((this.offset||0)/(this.duration||1));
     }
     _restartAtOffset(){ this._hardStop(); this.state="ready"; this.play(); }
     _setBtn(on){
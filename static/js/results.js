@@ -34,10 +34,13 @@
 
     async load() {
       try {
-        const res = await fetch(this.url, { cache: 'no-store' });
-        if (!res.ok) throw new Error(res.status);
-        const arr = await res.arrayBuffer();
-        this.buffer = await getAC().decodeAudioData(arr);
+        // waveform from the peak pyramid; the audio is decoded on first play
+        const P = window.PeakPilotPeaks;
+        try {
+          this.peaks = await P.load(P.urlFor(this.url, this.canvas.clientWidth * (window.devicePixelRatio || 1)));
+        } catch {
+          this.peaks = P.fromBuffer(await this.decode());
+        }
         this.render();
       } catch (e) {
         if (!this._retried) {
@@ -51,8 +54,16 @@
       }
     }
 
+    async decode() {
+      if (this.buffer) return this.buffer;
+      const res = await fetch(this.url, { headers: { Accept: window.PeakPilotPeaks.previewAccept() } });
+      if (!res.ok) throw new Error(res.status);
+      this.buffer = await getAC().decodeAudioData(await res.arrayBuffer());
+      return this.buffer;
+    }
+
     render() {
-      if (!this.buffer) return;
+      if (!this.peaks) return;
       const cssW = this.canvas.clientWidth;
       const cssH = this.canvas.clientHeight;
       const dpr = Math.max(1, window.devicePixelRatio || 1);
@@ -63,9 +74,7 @@
       const ctx = this.canvas.getContext('2d', { alpha: true });
       ctx.clearRect(0, 0, W, H);
 
-      const data = this.buffer.getChannelData(0);
-      const samples = data.length;
-      const step = Math.ceil(samples / W);
+      const cols = window.PeakPilotPeaks.columns(this.peaks, W);
       const amp = H / 2;
       const css = getComputedStyle(document.documentElement);
       const acc1 = css.getPropertyValue('--pp-accent').trim() || '#1ff1e9';
@@ -74,28 +83,11 @@
       // RMS underlay
       ctx.beginPath();
       for (let x = 0; x < W; x++) {
-        let sum = 0, count = 0;
-        const start = x * step;
-        for (let i = 0; i < step && start + i < samples; i++) {
-          const v = data[start + i];
-          sum += v * v;
-          count++;
-        }
-        const rms = Math.sqrt(sum / Math.max(1, count));
-        const y = amp - rms * amp * 0.9;
+        const y = amp - cols.rms[x] * amp * 0.9;
         if (x === 0) ctx.moveTo(x, y); else ctx.lineTo(x, y);
       }
       for (let x = W - 1; x >= 0; x--) {
-        let sum = 0, count = 0;
-        const start = x * step;
-        for (let i = 0; i < step && start + i < samples; i++) {
-          const v = data[start + i];
-          sum += v * v;
-          count++;
-        }
-        const rms = Math.sqrt(sum / Math.max(1, count));
-        const y = amp + rms * amp * 0.9;
-        ctx.lineTo(x, y);
+        ctx.lineTo(x, amp + cols.rms[x] * amp * 0.9);
       }
       ctx.closePath();
       ctx.fillStyle = hexToRgba(acc2, 0.12);
@@ -109,26 +101,11 @@
       ctx.lineWidth = Math.max(1, Math.floor(dpr));
       ctx.beginPath();
       for (let x = 0; x < W; x++) {
-        const start = x * step;
-        let min = 1, max = -1;
-        for (let i = 0; i < step && start + i < samples; i++) {
-          const v = data[start + i];
-          if (v < min) min = v;
-          if (v > max) max = v;
-        }
-        const y = amp + min * amp;
+        const y = amp + cols.min[x] * amp;
         if (x === 0) ctx.moveTo(x, y); else ctx.lineTo(x, y);
       }
       for (let x = W - 1; x >= 0; x--) {
-        const start = x * step;
-        let min = 1, max = -1;
-        for (let i = 0; i < step && start + i < samples; i++) {
-          const v = data[start + i];
-          if (v < min) min = v;
-          if (v > max) max = v;
-        }
-        const y = amp + max * amp;
-        ctx.lineTo(x, y);
+        ctx.lineTo(x, amp + cols.max[x] * amp);
       }
       ctx.stroke();
 
@@ -147,8 +124,10 @@
 
     toggle() { this.playing ? this.pause() : this.play(); }
 
-    play() {
-      if (!this.buffer) return;
+    async play() {
+      if (!this.buffer) {
+        try { await this.decode(); } catch { return; }
+      }
       const ac = getAC();
       if (ac.state === 'suspended') ac.resume();
       PlayerBus.claim(this);
@@ -0,0 +1,71 @@
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly, stft
+
+from app import ai_module
+
+
+def _reference_features(path, timeline):
+    """The original per-frame loop implementation, kept as an oracle."""
+    data, sr = sf.read(str(path))
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if sr != 48000:
+        data = resample_poly(data, 48000, sr)
+        sr = 48000
+    f, t, Z = stft(data, fs=sr, nperseg=4096, noverlap=4096-2048, padded=False)
+    mag = np.abs(Z) + 1e-9
+    rms = np.sqrt(np.mean(data**2))
+    peak = np.max(np.abs(data))
+    crest = peak / (rms + 1e-9)
+    centroid = (f[:, None] * mag).sum(axis=0) / mag.sum(axis=0)
+    rolloff, flat, bw, zcr = [], [], [], []
+    for i in range(mag.shape[1]):
+        spec = mag[:, i]
+        energy = spec**2
+        cumsum = np.cumsum(energy)
+        idx = np.searchsorted(cumsum, 0.95*cumsum[-1])
+        rolloff.append(f[min(idx, len(f)-1)])
+        c = centroid[i]
+        bw.append(np.sqrt(((f-c)**2 * energy).sum()/energy.sum()))
+        geo = np.exp(np.mean(np.log(spec)))
+        flat.append(geo/np.mean(spec))
+        start = i*2048
+        frame = data[start:start+4096]
+        if len(frame) > 1:
+            zcr.append(((frame[:-1]*frame[1:]) < 0).sum()/len(frame))
+    edges = np.linspace(0, mag.shape[0], 33, dtype=int)
+    band_means = [float(mag[edges[b]:edges[b+1], :].mean()) for b in range(32)]
+    tl_arr = np.array(timeline.get("short_term") or [0.0])
+    tl_stats = [float(np.mean(tl_arr)), float(np.percentile(tl_arr, 5)),
+                float(np.percentile(tl_arr, 50)), float(np.percentile(tl_arr, 95)), float(np.std(tl_arr))]
+    return np.array([rms, peak, crest, float(np.mean(centroid)), float(np.mean(rolloff)),
+                     float(np.mean(flat)), float(np.mean(bw)), float(np.mean(zcr)),
+                     np.mean(np.abs(np.diff(np.sqrt((Z**2).mean(axis=0)))))]
+                    + tl_stats + band_means, dtype=float)
+
+
+def _track(tmp_path, sr, seconds):
+    rng = np.random.default_rng(3)
+    n = int(sr * seconds)
+    t = np.arange(n) / sr
+    x = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 0.5 * t))
+    x = np.column_stack((x + 0.05 * rng.standard_normal(n), x - 0.05 * rng.standard_normal(n)))
+    path = tmp_path / f'track_{sr}.wav'
+    sf.write(path, x, sr, subtype='FLOAT')
+    return path
+
+
+def test_vectorized_features_match_reference(tmp_path):
+    timeline = {'short_term': [-20.0, -18.5, -17.0, -30.0]}
+    for sr in (48000, 44100):
+        path = _track(tmp_path, sr, 3.3)
+        ref = _reference_features(path, timeline)
+        feats, analysis = ai_module._extract_features(path, timeline)
+        assert feats.shape == ref.shape
+        assert np.allclose(feats, ref, rtol=1e-9, atol=1e-12)
+        assert analysis['rolloff95_mean'] == feats[4]
+
+        f32, _ = ai_module._extract_features(path, timeline, dtype=np.float32)
+        assert np.allclose(f32, ref, rtol=1e-3, atol=1e-6)
+
@@ -0,0 +1,27 @@
+import numpy as np
+
+from benchmarks import run, synth
+
+
+def test_synthetic_material_is_deterministic_and_bounded():
+    for kind in synth.KINDS:
+        a = np.concatenate(list(synth.blocks(kind, 1.5, 44100, 2)))
+        b = np.concatenate(list(synth.blocks(kind, 1.5, 44100, 2)))
+        assert a.shape == (66150, 2)
+        assert np.array_equal(a, b)
+        assert np.abs(a).max() <= 1.0
+    clipped = np.concatenate(list(synth.blocks('transients', 1.0, 48000, 1)))
+    assert (np.abs(clipped) == 1.0).any()
+
+
+def test_stage_report_and_regression_check():
+    case = run.run_case('sweep', 0.5, 44100, 1, stages=('measure_loudnorm_json', 'normalize_peak_to'))
+    stages = case['stages']
+    assert set(stages) == {'measure_loudnorm_json', 'normalize_peak_to'}
+    assert all(s['seconds'] > 0 and s['peak_rss_mb'] > 0 for s in stages.values())
+
+    base = {'cases': {'c': {'stages': {'x': {'seconds': 1.0}, 'y': {'seconds': 0.01}}}}}
+    cur = {'cases': {'c': {'stages': {'x': {'seconds': 1.5}, 'y': {'seconds': 0.05}}}}}
+    regressions = run.compare(cur, base, threshold=0.25)
+    assert [r['stage'] for r in regressions] == ['x']
+    assert run.compare(cur, base, threshold=0.6) == []
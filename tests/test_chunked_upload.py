@@ -0,0 +1,82 @@
+import os
+import struct
+import threading
+import time
+
+import pytest
+
+from app import jobs, uploads
+
+
+def _wav_header(channels, sr, seconds, bits=16):
+    align = channels * bits // 8
+    data = int(seconds * sr) * align
+    fmt = struct.pack('<HHIIHH', 1, channels, sr, sr * align, align, bits)
+    return b'RIFF' + struct.pack('<I', 36 + data) + b'WAVE' + b'fmt ' + struct.pack('<I', 16) + fmt \
+        + b'data' + struct.pack('<I', data)
+
+
+def test_chunked_upload_resumes_and_starts_job(client, sine_file):
+    data = sine_file.read_bytes()
+    r = client.post('/uploads', json={'filename': 'tone.wav', 'size': len(data)})
+    assert r.status_code == 201
+    uid = r.get_json()['upload_id']
+    url = f'/uploads/{uid}'
+
+    first = client.patch(url, data=data[:30000], headers={'Upload-Offset': '0'})
+    assert first.status_code == 200 and first.headers['Upload-Offset'] == '30000'
+    stale = client.patch(url, data=data[:30000], headers={'Upload-Offset': '0'})
+    assert stale.status_code == 409 and stale.get_json()['offset'] == 30000
+    assert client.head(url).headers['Upload-Offset'] == '30000'
+    assert client.post(f'{url}/commit').status_code == 409  # incomplete
+
+    client.patch(url, data=data[30000:], headers={'Upload-Offset': '30000'})
+    r = client.post(f'{url}/commit', data={'preset': 'club'})
+    assert r.status_code == 200
+    session = r.get_json()['session']
+    assert session == uid
+    for _ in range(60):
+        pj = client.get(f'/progress/{session}').get_json()
+        if pj.get('done'):
+            break
+        time.sleep(0.5)
+    assert pj['done'] and not pj.get('error')
+
+
+def test_header_probe_rejects_after_first_chunk(client):
+    root = client.application.config['UPLOAD_FOLDER']
+    for header in (_wav_header(2, 48000, 21 * 60), _wav_header(6, 48000, 60)):
+        r = client.post('/uploads', json={'filename': 'big.wav'})
+        uid = r.get_json()['upload_id']
+        r = client.patch(f'/uploads/{uid}', data=header + bytes(4096), headers={'Upload-Offset': '0'})
+        assert r.status_code == 422
+        assert not os.path.exists(os.path.join(root, uid))
+        assert client.head(f'/uploads/{uid}').status_code == 404
+
+
+def test_commit_holds_its_queue_slot(client, sine_file, monkeypatch):
+    busy = jobs.JobScheduler(workers=1, max_queue=1)
+    gate = threading.Event()
+    busy.submit('x', gate.wait, 5)
+    while busy.stats()['running'] == 0:
+        time.sleep(0.01)
+    monkeypatch.setattr(jobs, '_scheduler', busy)
+    data = sine_file.read_bytes()
+    uid = client.post('/uploads', json={'filename': 'tone.wav', 'size': len(data)}).get_json()['upload_id']
+    client.patch(f'/uploads/{uid}', data=data, headers={'Upload-Offset': '0'})
+
+    real_commit = uploads.Upload.commit
+
+    def racing_commit(self):
+        with pytest.raises(jobs.QueueFull):  # another request arrives mid-commit
+            busy.submit('intruder', lambda: None)
+        return real_commit(self)
+
+    monkeypatch.setattr(uploads.Upload, 'commit', racing_commit)
+    try:
+        r = client.post(f'/uploads/{uid}/commit')
+        assert r.status_code == 200 and r.get_json()['session'] == uid
+        assert busy.position(uid) == 1
+        assert busy.stats()['reserved'] == 0
+    finally:
+        gate.set()
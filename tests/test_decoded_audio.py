@@ -0,0 +1,35 @@
+import numpy as np
+import soundfile as sf
+
+from app import pipeline
+from app.engine.decoded import decode_audio
+
+
+def test_decode_once_shared_by_measurements(sine_file, tmp_path):
+    sess = tmp_path / 'sess'
+    sess.mkdir()
+    audio = decode_audio(sine_file, sess)
+    assert (sess / 'decoded.f32').exists()
+    assert audio.data.dtype == np.float32
+    assert audio.info() == pipeline.ffprobe_info(str(sine_file))
+    assert audio.sha256 == pipeline.sha256_file(sine_file)
+
+    ref, _ = sf.read(sine_file, dtype='float32')
+    assert np.allclose(audio.mono(), ref)
+    assert np.isclose(pipeline.measure_peak_dbfs(audio), pipeline.measure_peak_dbfs(str(sine_file)))
+
+    audio.release()
+    assert not (sess / 'decoded.f32').exists()
+
+
+def test_decode_stereo_mono_mix(tmp_path):
+    sr = 44100
+    left = np.full(sr, 0.5, dtype=np.float32)
+    right = np.full(sr, -0.25, dtype=np.float32)
+    path = tmp_path / 'st.wav'
+    sf.write(path, np.column_stack((left, right)), sr, subtype='FLOAT')
+    audio = decode_audio(path, tmp_path)
+    assert audio.channels == 2 and audio.frames == sr
+    assert np.allclose(audio.mono(), 0.125)
+    audio.release()
+    assert not list(tmp_path.glob('decoded*'))
@@ -0,0 +1,31 @@
+import hashlib
+import io
+import os
+import zlib
+
+from app import digests
+
+
+def test_upload_is_hashed_while_written(tmp_path, monkeypatch):
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    dst = tmp_path / 'upload'
+    d = digests.save_stream(io.BytesIO(data), dst, chunk_size=65536)
+    assert d == {'sha256': hashlib.sha256(data).hexdigest(), 'crc32': zlib.crc32(data), 'bytes': len(data)}
+
+    def no_read(*a, **k):
+        raise AssertionError('file was read back')
+
+    monkeypatch.setattr(digests.Hasher, 'update', no_read)
+    renamed = tmp_path / 'renamed'
+    dst.rename(renamed)
+    os.link(renamed, tmp_path / 'linked')
+    assert digests.file_digests(renamed) == d
+    assert digests.sha256_of(tmp_path / 'linked') == d['sha256']
+
+
+def test_rewritten_file_is_hashed_again(tmp_path):
+    p = tmp_path / 'f.bin'
+    p.write_bytes(b'a' * 10)
+    first = digests.file_digests(p)
+    p.write_bytes(b'b' * 11)
+    assert digests.file_digests(p)['sha256'] == hashlib.sha256(b'b' * 11).hexdigest() != first['sha256']
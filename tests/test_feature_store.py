@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+
+from app import ai_module
+from app.feature_store import FeatureStore
+
+
+def test_repeat_analysis_skips_feature_extraction(tmp_path, sine_file, monkeypatch):
+    sess = tmp_path / 'uploads' / 'sess'
+    sess.mkdir(parents=True)
+    src = sess / 'upload'
+    src.write_bytes(sine_file.read_bytes())
+    tl = {'sec': [0.0, 0.1], 'short_term': [-20.0, -20.0]}
+    first = ai_module.analyze_track(src, tl)
+
+    def boom(*a, **k):
+        raise AssertionError('features should come from the store')
+
+    monkeypatch.setattr(ai_module, '_extract_features', boom)
+    again = ai_module.analyze_track(src, tl)
+    assert np.allclose(first[0], again[0])
+    assert again[5] == first[5]
+    assert list((tmp_path / 'uploads' / 'features').glob('*.npz'))
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = FeatureStore(tmp_path, max_bytes=10**9)
+    for i, name in enumerate(('a', 'b', 'c')):
+        store.put(name, np.arange(50.0), {'n': i})
+        os.utime(store._path(name), (1000 + i, 1000 + i))
+    assert store.get('a')[1] == {'n': 0}  # refreshes a
+    one = store._path('a').stat().st_size
+    store.max_bytes = 2 * one
+    store.evict()
+    assert store.get('b') is None
+    assert store.get('a') is not None and store.get('c') is not None
+
+
+def test_repeat_upload_is_analysed_without_decoding(tmp_path, sine_file, monkeypatch):
+    from app import pipeline
+    import json
+    import shutil
+
+    def run(name):
+        sess = tmp_path / 'uploads' / name
+        sess.mkdir(parents=True)
+        shutil.copyfile(sine_file, sess / 'upload')
+        pipeline.write_json_atomic(pipeline.progress_path(str(sess)), {'metrics': {'advisor': {}}})
+        pipeline.run_pipeline(name, str(sess), str(sess / 'upload'), {}, {}, {}, 'tone.wav', 'tone')
+        return sess, json.loads((sess / 'progress.json').read_text())
+
+    _, first = run('one')
+
+    def no_decode(*a, **k):
+        raise AssertionError('input analysis should come from the store')
+
+    monkeypatch.setattr(pipeline, 'decode_audio', no_decode)
+    sess, again = run('two')
+    assert again['done'] and not again.get('error')
+    assert again['metrics']['input'] == first['metrics']['input']
+    assert again['timeline'] == first['timeline']
+    assert (sess / 'peaks' / 'input.peaks').exists()
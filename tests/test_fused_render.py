@@ -0,0 +1,77 @@
+from app import metrics, pipeline, progress_bus
+from app.engine import mastering
+
+ADJ = {'club': {'dI': 0.0, 'dTP': 0.0}, 'streaming': {'dI': 0.0, 'dTP': 0.0}}
+MEAS = {'input_i': '-20.0', 'input_lra': '4.0', 'input_tp': '-3.0', 'input_thresh': '-30.0'}
+
+
+def test_fused_cmd_decodes_once_and_writes_every_output(tmp_path):
+    targets = pipeline.master_targets(ADJ)
+    cmd = pipeline.fused_render_cmd(targets, 'in.wav', str(tmp_path), -4.0,
+                                    {'club': MEAS, 'streaming': MEAS})
+    assert cmd.count('-i') == 1
+    graph = cmd[cmd.index('-filter_complex') + 1]
+    assert graph.startswith('[0:a]asplit=3')
+    assert 'measured_I=-20.0' in graph and 'volume=-2.00dB' in graph
+    assert 'aresample=44100:resampler=soxr' in graph
+    outs = [a for a in cmd if a.endswith('.part') or a.endswith('.tmp.wav')]
+    assert len(outs) == 6
+    assert cmd.count('pcm_s24le') == 3 and cmd.count('pcm_s16le') == 3
+
+
+def test_fused_render_reports_failure_without_leftovers(tmp_path, sine_file, monkeypatch):
+    monkeypatch.setattr(pipeline, 'cached_loudnorm_measure', lambda *a, **k: MEAS)
+    monkeypatch.setattr(mastering, 'run_ffmpeg_with_progress',
+                        lambda cmd, dur, update: (_ for _ in ()).throw(RuntimeError('no ffmpeg')))
+    pipeline.write_json_atomic(pipeline.progress_path(str(tmp_path)), {})
+    targets = pipeline.master_targets(ADJ)
+    assert pipeline.fused_render(targets, str(sine_file), str(tmp_path), -20.0, 'sha') is False
+    assert not list(tmp_path.glob('*.part')) and not list(tmp_path.glob('*.tmp.wav'))
+
+
+def test_fused_render_reports_progress_per_master(tmp_path, sine_file, monkeypatch):
+    monkeypatch.setattr(pipeline, 'cached_loudnorm_measure', lambda *a, **k: MEAS)
+    seen = []
+
+    def fake_ffmpeg(cmd, duration_s, update):
+        assert duration_s == 1.0
+        update(50)
+        seen.append(progress_bus.get(str(tmp_path)).snapshot())
+        for out in cmd:
+            if out.endswith('.part') or out.endswith('.tmp.wav'):
+                open(out, 'wb').write(b'RIFF')
+
+    monkeypatch.setattr(mastering, 'run_ffmpeg_with_progress', fake_ffmpeg)
+    progress_bus.create(str(tmp_path), progress_bus.default_progress())
+    before = metrics.STAGE_SECONDS.count(stage='render', target='club')
+    try:
+        targets = pipeline.master_targets(ADJ)
+        assert pipeline.fused_render(targets, str(sine_file), str(tmp_path), -20.0, 'sha', duration_s=1.0)
+    finally:
+        progress_bus.discard(str(tmp_path))
+    assert seen[0]['pct'] == 55
+    assert all(seen[0]['masters'][t['key']]['pct'] == 50 for t in targets)
+    assert all(seen[0]['masters'][t['key']]['state'] == 'rendering' for t in targets)
+    assert all((tmp_path / t['wav']).exists() for t in targets)
+    assert metrics.STAGE_SECONDS.count(stage='render', target='club') == before + 1
+
+
+def test_pipeline_without_ffmpeg_skips_fused_graph_and_pass1(tmp_path, sine_file, monkeypatch):
+    import shutil
+
+    import settings
+
+    def never(*a, **k):
+        raise AssertionError('ffmpeg-only step attempted without ffmpeg')
+
+    monkeypatch.setattr(settings, 'RENDER_MODE', 'fused')
+    monkeypatch.setattr(pipeline, 'render_backend', lambda: 'python')
+    monkeypatch.setattr(pipeline, 'fused_render', never)
+    monkeypatch.setattr(pipeline, 'cached_loudnorm_measure', never)
+    sess = tmp_path / 'uploads' / 'nofm'
+    sess.mkdir(parents=True)
+    shutil.copyfile(sine_file, sess / 'upload')
+    progress_bus.create(str(sess), progress_bus.default_progress())
+    pipeline.run_pipeline('nofm', str(sess), str(sess / 'upload'), {}, {}, {}, 'tone.wav', 'tone')
+    pj = progress_bus.get(str(sess)).snapshot()
+    assert pj['done'] and not pj.get('error')
@@ -0,0 +1,51 @@
+import hashlib
+import json
+import os
+
+
+def _finalized(client, data=b'RIFF' + bytes(4000)):
+    root = os.path.join(client.application.config['UPLOAD_FOLDER'], 'cached')
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, 'club_master_preview.wav'), 'wb') as fh:
+        fh.write(data)
+    with open(os.path.join(root, 'in_progress.wav'), 'wb') as fh:
+        fh.write(data)
+    sha = hashlib.sha256(data).hexdigest()
+    with open(os.path.join(root, 'manifest.json'), 'w') as fh:
+        json.dump({'club_master_preview.wav': {'filename': 'club_master_preview.wav', 'sha256': sha,
+                                               'bytes': len(data)}}, fh)
+    return sha
+
+
+def test_stream_uses_manifest_sha_as_strong_etag(client):
+    sha = _finalized(client)
+    url = '/stream/cached/club_master_preview.wav'
+    r = client.get(url)
+    assert r.status_code == 200
+    assert r.headers['ETag'] == f'"{sha}"'
+    assert 'immutable' in r.headers['Cache-Control']
+    last_modified = r.headers['Last-Modified']
+    r.close()
+
+    assert client.get(url, headers={'If-None-Match': f'"{sha}"'}).status_code == 304
+    assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get(url, headers={'If-None-Match': '"other"'}).status_code == 200
+
+    r = client.get(url, headers={'Range': 'bytes=0-3', 'If-Range': f'"{sha}"'})
+    assert r.status_code == 206 and r.data == b'RIFF'
+    r = client.get(url, headers={'Range': 'bytes=0-3', 'If-Range': '"stale"'})
+    assert r.status_code == 200
+    r.close()
+
+    r = client.get('/stream/cached/in_progress.wav')
+    assert 'ETag' not in r.headers and 'no-store' in r.headers['Cache-Control']
+    r.close()
+
+
+def test_download_is_conditional(client):
+    sha = _finalized(client)
+    url = '/download/cached/club_master_preview.wav'
+    r = client.get(url)
+    assert r.status_code == 200 and r.headers['ETag'] == f'"{sha}"'
+    r.close()
+    assert client.get(url, headers={'If-None-Match': f'"{sha}"'}).status_code == 304
@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+import time
+
+from app import janitor, progress_bus
+
+
+def _session(root, name, size, age_h, done=True):
+    d = root / name
+    d.mkdir()
+    (d / 'master.wav').write_bytes(b'\0' * size)
+    (d / 'progress.json').write_text(json.dumps({'done': done}))
+    t = time.time() - age_h * 3600
+    for p in (d / 'master.wav', d / 'progress.json', d):
+        os.utime(p, (t, t))
+    return d
+
+
+def test_sweep_expires_evicts_lru_and_spares_running_jobs(tmp_path):
+    root = tmp_path / 'uploads'
+    root.mkdir()
+    (root / 'models').mkdir()
+    expired = _session(root, 'expired', 100, age_h=30)
+    stale_job = _session(root, 'stalejob', 100, age_h=30, done=False)
+    live_job = _session(root, 'livejob', 5000, age_h=3, done=False)
+    running = _session(root, 'running', 5000, age_h=40)
+    older = _session(root, 'older', 3000, age_h=5)
+    newer = _session(root, 'newer', 3000, age_h=2)
+    progress_bus.create(str(running), {'done': False})
+    try:
+        j = janitor.Janitor(root, max_age_s=24 * 3600, quota_bytes=14000)
+        assert j.sweep(dry_run=True)['removed'] and expired.exists()
+        report = j.sweep()
+    finally:
+        progress_bus.discard(str(running))
+    assert sorted(report['removed']) == ['expired', 'older', 'stalejob']
+    assert 3200 < report['reclaimed_bytes'] < 3300
+    assert live_job.exists() and running.exists() and newer.exists() and (root / 'models').exists()
+    assert not older.exists() and not stale_job.exists()
+    assert j.stats()['reclaimed_bytes'] == report['reclaimed_bytes']
+    assert j.stats()['sessions'] == 3
+
+
+def test_storage_stats_endpoint_reports_last_sweep(client, tmp_path):
+    r = client.get('/stats/storage')
+    assert r.status_code == 200
+    assert {'usage_bytes', 'quota_bytes', 'reclaimed_bytes', 'sessions'} <= set(r.get_json())
+    assert r.get_json()['usage_bytes'] is None  # nothing swept yet, nothing walked
+    assert not any(t.name == 'janitor' for t in threading.enumerate())  # off under tests
+
+    root = tmp_path / 'uploads'
+    _session(root, 'a', 1000, age_h=1)
+    janitor.janitor(root).sweep()
+    _session(root, 'b', 1000, age_h=1)
+    stats = client.get('/stats/storage').get_json()
+    assert stats['sessions'] == 1 and stats['usage_bytes'] > 1000
+
+
+def test_masters_shared_with_render_cache_are_not_counted(tmp_path):
+    root = tmp_path / 'uploads'
+    root.mkdir()
+    sess = _session(root, 'cached', 1000, age_h=30)
+    entry = root / 'cache' / 'renders' / 'ab' / 'abcd'
+    entry.mkdir(parents=True)
+    os.link(sess / 'master.wav', entry / 'master.wav')
+    report = janitor.Janitor(root, max_age_s=24 * 3600, quota_bytes=10**9).sweep()
+    assert report['removed'] == ['cached']
+    assert report['reclaimed_bytes'] < 1000  # only progress.json was freed
+    assert (entry / 'master.wav').stat().st_size == 1000
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+import settings
+from app import jobs
+
+
+def test_scheduler_caps_concurrency_and_reports_positions():
+    sched = jobs.JobScheduler(workers=1, max_queue=2)
+    gate = threading.Event()
+    ran = []
+    seen = {}
+
+    def job(name):
+        ran.append(name)
+        gate.wait(5)
+
+    assert sched.submit('a', job, 'a') == 0
+    assert sched.submit('b', job, 'b', notify=lambda pos, eta: seen.setdefault('b', []).append(pos)) == 1
+    assert sched.submit('c', job, 'c', notify=lambda pos, eta: seen.setdefault('c', []).append((pos, eta))) == 2
+    assert seen['c'][0] == (2, 2 * int(jobs.DEFAULT_JOB_SECONDS))
+    assert sched.full()
+    with pytest.raises(jobs.QueueFull) as exc:
+        sched.submit('d', job, 'd')
+    assert exc.value.retry_after >= 1
+
+    gate.set()
+    for _ in range(100):
+        if len(ran) == 3 and sched.stats()['running'] == 0:
+            break
+        threading.Event().wait(0.02)
+    assert ran == ['a', 'b', 'c']
+    assert seen['c'][-1][0] == 1  # moved up when 'b' started
+
+
+def test_start_rejects_oversize_and_busy(client, sine_file, monkeypatch):
+    monkeypatch.setattr(settings, 'MAX_FILE_MB', 0)
+    with open(sine_file, 'rb') as f:
+        r = client.post('/start', data={'audio': (f, 'test.wav')}, content_type='multipart/form-data')
+    assert r.status_code == 413
+    monkeypatch.setattr(settings, 'MAX_FILE_MB', 200)
+
+    busy = jobs.JobScheduler(workers=1, max_queue=0)
+    gate = threading.Event()
+    busy.submit('x', gate.wait, 5)
+    monkeypatch.setattr(jobs, '_scheduler', busy)
+    try:
+        with open(sine_file, 'rb') as f:
+            r = client.post('/start', data={'audio': (f, 'test.wav')}, content_type='multipart/form-data')
+        assert r.status_code == 429
+        assert int(r.headers['Retry-After']) >= 1
+    finally:
+        gate.set()
+
+
+def test_reserved_slot_is_held_until_used_or_released():
+    sched = jobs.JobScheduler(workers=1, max_queue=0)
+    slot = sched.reserve()
+    assert sched.full()
+    with pytest.raises(jobs.QueueFull):
+        sched.reserve()
+    with pytest.raises(jobs.QueueFull):
+        sched.submit('other', lambda: None)
+    assert sched.submit('mine', lambda: None, reservation=slot) == 0
+    slot.release()  # already used: no effect
+    assert sched.stats()['reserved'] == 0
+    while sched.stats()['queued'] or sched.stats()['running']:
+        threading.Event().wait(0.01)
+    with sched.reserve():
+        assert sched.full()
+    assert sched.stats()['reserved'] == 0
+
+
+def test_unsized_body_capped_at_file_limit(monkeypatch):
+    import io
+
+    from app import MULTIPART_OVERHEAD, create_app
+
+    monkeypatch.setattr(settings, 'MAX_FILE_MB', 1)
+    app = create_app()
+    app.config['TESTING'] = True
+    assert app.config['MAX_CONTENT_LENGTH'] == 2**20 + MULTIPART_OVERHEAD
+    boundary = 'x' * 16
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="audio"; filename="a.wav"\r\n'
+            'Content-Type: audio/wav\r\n\r\n').encode() + b'\0' * (2**20 + 2 * MULTIPART_OVERHEAD) \
+        + f'\r\n--{boundary}--\r\n'.encode()
+    r = app.test_client().post(
+        '/start', input_stream=io.BytesIO(body), content_type=f'multipart/form-data; boundary={boundary}',
+        headers={'Transfer-Encoding': 'chunked'}, environ_overrides={'wsgi.input_terminated': True},
+    )
+    assert r.status_code == 413
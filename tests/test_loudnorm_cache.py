@@ -0,0 +1,33 @@
+import threading
+
+from app.engine import loudnorm_cache
+from app.engine.loudnorm_cache import MeasurementCache, cache_key
+
+
+def test_pass1_measured_once_and_shared_across_sessions(tmp_path):
+    calls = []
+
+    def measure():
+        calls.append(1)
+        return {'input_i': '-14.2', 'input_lra': '5.1', 'input_tp': '-0.4', 'input_thresh': '-24.6'}
+
+    shared = tmp_path / 'cache'
+    s1 = tmp_path / 's1'
+    s1.mkdir()
+    key = cache_key('abc', 11)
+    cache = MeasurementCache(s1, shared)
+    threads = [threading.Thread(target=cache.get_or_measure, args=(key, measure)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert (s1 / 'loudnorm_cache.json').exists()
+    assert key not in loudnorm_cache._locks  # per-key locks do not accumulate
+
+    s2 = tmp_path / 's2'
+    s2.mkdir()
+    hit = MeasurementCache(s2, shared).get_or_measure(key, measure)
+    assert hit['input_i'] == '-14.2' and len(calls) == 1
+    assert MeasurementCache(s2).get(key) == hit
+    assert MeasurementCache(s2).get(cache_key('abc', 7)) is None
@@ -0,0 +1,27 @@
+from app import util_fs
+from app.util_fs import ManifestIndex, write_manifest
+
+
+def test_manifest_index_caches_and_revalidates(tmp_path, monkeypatch):
+    index = ManifestIndex(capacity=2)
+    write_manifest(tmp_path, {'club': {'filename': 'a__club_master.wav', 'sha256': 'x'}})
+    loads = []
+    real_load = util_fs.json.load
+    monkeypatch.setattr(util_fs.json, 'load', lambda fh: loads.append(1) or real_load(fh))
+
+    assert index.lookup(tmp_path, 'club')['sha256'] == 'x'
+    assert index.lookup(tmp_path, 'a__club_master.wav')['sha256'] == 'x'
+    assert index.lookup(tmp_path, 'missing') is None
+    assert len(loads) == 1
+
+    write_manifest(tmp_path, {'club': {'filename': 'a__club_master.wav', 'sha256': 'y'}})
+    assert index.lookup(tmp_path, 'club')['sha256'] == 'y'
+    assert len(loads) == 2
+
+    others = [tmp_path / 'o1', tmp_path / 'o2']
+    for d in others:
+        d.mkdir()
+        write_manifest(d, {})
+        index.get(d)
+    assert len(index._entries) == 2
+    assert index.get(tmp_path / 'nope') is None
@@ -0,0 +1,50 @@
+import os
+import time
+
+from app.model_registry import ModelRegistry
+
+
+def test_models_cached_in_memory_and_flushed_off_request_path(tmp_path):
+    reg = ModelRegistry(tmp_path, capacity=2, flush_interval=3600)
+    made = []
+
+    def factory():
+        made.append(1)
+        return {'w': len(made)}
+
+    a = reg.get('a', factory)
+    assert reg.get('a', factory) is a and len(made) == 1
+    assert not reg.path('a').exists()  # persisted by the flusher, not inline
+    reg.flush()
+    assert reg.path('a').exists()
+
+    reg.get('b', factory)
+    reg.get('c', factory)  # evicts 'a' from memory
+    assert reg.get('a', factory) == {'w': 1} and len(made) == 3  # reloaded from disk
+
+
+def test_gc_removes_old_and_excess_model_files(tmp_path):
+    reg = ModelRegistry(tmp_path, max_files=2, max_age_s=3600)
+    for i, name in enumerate('abcd'):
+        reg.path(name).write_bytes(b'x')
+        os.utime(reg.path(name), (time.time() - i * 10, time.time() - i * 10))
+    os.utime(reg.path('a'), (time.time() - 7200, time.time() - 7200))
+    reg.gc()
+    assert sorted(p.stem for p in tmp_path.glob('*.joblib')) == ['b', 'c']
+
+
+def test_gc_keeps_models_that_are_still_used(tmp_path):
+    reg = ModelRegistry(tmp_path, capacity=1, max_age_s=3600)
+    reg.get('hot', lambda: {'w': 0})
+    reg.flush()
+    old = time.time() - 7200
+    os.utime(reg.path('hot'), (old, old))
+    reg.get('hot', lambda: {'w': 1})  # served from memory: still counts as a use
+    reg.get('other', lambda: {'w': 2})  # evicts 'hot' from memory
+    reg.gc()
+    assert reg.path('hot').exists()
+    os.utime(reg.path('hot'), (old, old))
+    assert reg.get('hot', lambda: {'w': 3}) == {'w': 0}  # loaded from disk, refreshed again
+    reg.get('other', lambda: {'w': 2})
+    reg.gc()
+    assert reg.path('hot').exists()
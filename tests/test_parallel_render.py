@@ -0,0 +1,28 @@
+import json
+import shutil
+
+import pytest
+
+import settings
+from app import pipeline
+
+
+@pytest.mark.parametrize('parallel', [True, False])
+def test_render_targets_fan_in_before_finalize(tmp_path, sine_file, monkeypatch, parallel):
+    monkeypatch.setattr(settings, 'PARALLEL_RENDER', parallel)
+    sess = tmp_path / 'uploads' / 'sess'
+    sess.mkdir(parents=True)
+    src = sess / 'upload'
+    shutil.copyfile(sine_file, src)
+    pipeline.write_json_atomic(pipeline.progress_path(str(sess)), {
+        'metrics': {'advisor': {}},
+    })
+    pipeline.run_pipeline('sess', str(sess), str(src), {'custom_I': '-12', 'custom_TP': '-1'},
+                          {}, {}, 'tone.wav', 'tone')
+    pj = json.loads((sess / 'progress.json').read_text())
+    assert pj['done'] and not pj.get('error')
+    for key in ('club', 'streaming', 'unlimited', 'custom'):
+        assert pj['masters'][key]['state'] == 'done'
+        assert pj['metrics'][key]['sha256']
+    man = json.loads((sess / 'manifest.json').read_text())
+    assert 'tone__custom_master.wav' in man and 'custom_master_preview.wav' in man
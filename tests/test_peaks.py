@@ -0,0 +1,43 @@
+import numpy as np
+import soundfile as sf
+
+from app.engine import peaks
+
+
+def test_pyramid_matches_direct_reduction_and_roundtrips():
+    rng = np.random.default_rng(0)
+    x = (rng.standard_normal((48000 * 3 + 77, 2)) * 0.2).astype(np.float32)
+    b = peaks.PeakBuilder(48000)
+    for i in range(0, len(x), 1000):  # block size unrelated to the bucket size
+        b.feed(x[i:i + 1000])
+    p = b.finish()
+    mono = x.mean(axis=1)
+    n = len(mono) // peaks.BASE_BUCKET * peaks.BASE_BUCKET
+    ref = mono[:n].reshape(-1, peaks.BASE_BUCKET)
+    spb, mn, mx, rms = p.levels[0]
+    assert spb == peaks.BASE_BUCKET and len(mn) == len(ref) + 1
+    np.testing.assert_allclose(mn[:-1], ref.min(axis=1), atol=1e-6)
+    np.testing.assert_allclose(rms[:-1], np.sqrt((ref.astype(np.float64) ** 2).mean(axis=1)), rtol=1e-5)
+    assert len(p.levels[-1][1]) <= peaks.MIN_BUCKETS
+    assert p.levels[1][1][0] == min(mn[0], mn[1])
+
+    q = peaks.Peaks.from_bytes(p.to_bytes(16))
+    assert q.sr == 48000 and q.frames == len(x) and len(q.levels) == len(p.levels)
+    np.testing.assert_allclose(q.levels[0][2], mx, atol=1 / 32767)
+    coarse = peaks.Peaks.from_bytes(p.to_bytes(8, max_buckets=300))
+    assert all(len(lv[1]) <= 300 for lv in coarse.levels)
+
+
+def test_peaks_endpoint_builds_missing_pyramid_from_preview(client):
+    import os
+    root = os.path.join(client.application.config['UPLOAD_FOLDER'], 'pk')
+    os.makedirs(root)
+    sf.write(os.path.join(root, 'club_master_preview.wav'), np.full(4096, 0.5, dtype=np.float32), 48000)
+    r = client.get('/peaks/pk/club?bits=16')
+    assert r.status_code == 200
+    p = peaks.Peaks.from_bytes(r.data)
+    assert p.frames == 4096 and abs(p.levels[0][2][0] - 0.5) < 1e-3
+    assert os.path.exists(os.path.join(root, 'peaks', 'club.peaks'))
+    assert client.get('/peaks/pk/club?bits=16', headers={'If-None-Match': r.headers['ETag']}).status_code == 304
+    assert client.get('/peaks/pk/streaming').status_code == 404
+    assert client.get('/peaks/pk/bogus').status_code == 404
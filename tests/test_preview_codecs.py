@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+
+import settings
+from app import pipeline
+
+
+def test_encode_preview_writes_compressed_sibling(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'PREVIEW_CODEC', 'opus,aac')
+    wav = tmp_path / 'club_master_preview.wav'
+    wav.write_bytes(b'RIFF')
+    cmds = []
+
+    def fake_run(cmd, timeout=1200):
+        cmds.append(cmd)
+        Path(cmd[-1]).write_bytes(b'enc')
+
+    monkeypatch.setattr(pipeline, 'run', fake_run)
+    out = pipeline.encode_preview(wav)
+    assert [p.name for p in out] == ['club_master_preview.webm', 'club_master_preview.m4a']
+    assert 'libopus' in cmds[0] and 'aac' in cmds[1]
+    assert pipeline.encode_preview(wav) == out and len(cmds) == 2  # existing siblings are kept
+
+
+def test_stream_picks_preview_encoding_by_accept(client, monkeypatch):
+    monkeypatch.setattr(settings, 'PREVIEW_CODEC', 'opus')
+    root = os.path.join(client.application.config['UPLOAD_FOLDER'], 'pv')
+    os.makedirs(root)
+    Path(root, 'club_master_preview.wav').write_bytes(b'RIFF' + bytes(100))
+    Path(root, 'club_master_preview.webm').write_bytes(b'\x1aE\xdf\xa3' + bytes(10))
+    url = '/stream/pv/club_master_preview.wav'
+
+    r = client.get(url, headers={'Accept': 'audio/webm, audio/wav;q=0.5'})
+    assert r.headers['Content-Type'] == 'audio/webm' and len(r.data) == 14
+    assert r.headers['Vary'] == 'Accept'
+    r = client.get(url, headers={'Accept': 'audio/wav'})
+    assert r.headers['Content-Type'] == 'audio/wav' and len(r.data) == 104
+    r = client.get(url, headers={'Accept': '*/*'})
+    assert r.headers['Content-Type'] == 'audio/webm'
+    r = client.get(url + '?codec=wav', headers={'Accept': '*/*'})
+    assert r.headers['Content-Type'] == 'audio/wav'
+    r.close()
@@ -0,0 +1,39 @@
+import json
+import time
+
+from app import progress_bus
+
+
+def test_updates_are_coalesced_and_terminal_state_flushes(tmp_path, monkeypatch):
+    sess = str(tmp_path)
+    state = progress_bus.create(sess, progress_bus.default_progress())
+    state.min_interval = 60.0
+    writes = []
+    real_flush = state.flush
+
+    def counting_flush():
+        if state._flushed_version != state.version:
+            writes.append(state.version)
+        real_flush()
+
+    monkeypatch.setattr(state, 'flush', counting_flush)
+    for pct in range(100):
+        state.update(pct=pct, masters={'club': {'pct': pct}})
+    assert writes == []
+    assert progress_bus.peek(sess) is state
+    assert json.loads(state.to_json())['masters']['club']['pct'] == 99
+
+    state.update(status='error', error='boom', done=True)
+    assert len(writes) == 1
+    on_disk = json.loads((tmp_path / 'progress.json').read_text())
+    assert on_disk['phase'] == 'error' and on_disk['pct'] == 99 and on_disk['done']
+    assert progress_bus.peek(sess) is None
+
+
+def test_trailing_update_is_flushed_by_timer(tmp_path):
+    state = progress_bus.create(str(tmp_path), progress_bus.default_progress())
+    state.min_interval = 0.05
+    state.update(pct=10)
+    state.update(pct=20)
+    time.sleep(0.3)
+    assert json.loads((tmp_path / 'progress.json').read_text())['pct'] == 20
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+import time
+
+import settings
+from app import progress_bus
+
+
+def _parse(body):
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if line and not line.startswith(':') and ': ' in line)
+        if 'event' in fields:
+            events.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+    return events
+
+
+def test_events_push_changed_fields_then_final_snapshot(client, monkeypatch):
+    monkeypatch.setattr(settings, 'SSE_HEARTBEAT_SECONDS', 0.05)
+    sess_dir = os.path.join(client.application.config['UPLOAD_FOLDER'], 'evt')
+    os.makedirs(sess_dir)
+    state = progress_bus.create(sess_dir, progress_bus.default_progress())
+
+    def job():
+        time.sleep(0.2)
+        state.update(pct=40, status='rendering', masters={'club': {'state': 'rendering', 'pct': 50}})
+        time.sleep(0.2)
+        state.update(pct=100, status='done', done=True, filenames={'zip': 'x.zip'})
+
+    threading.Thread(target=job).start()
+    events = _parse(client.get('/events/evt').get_data(as_text=True))
+    names = [e[0] for e in events]
+    assert names[0] == 'snapshot' and names[-1] == 'snapshot'
+    patch = next(data for name, _, data in events if name == 'progress')
+    assert patch['pct'] == 40 and patch['status'] == 'rendering'
+    assert set(patch['masters']) == {'club'}
+    assert 'timeline' not in patch
+    assert events[-1][2]['done'] and events[-1][2]['filenames'] == {'zip': 'x.zip'}
+    assert int(events[-1][1]) == state.version
+
+
+def test_events_resume_and_fallback(client, monkeypatch):
+    monkeypatch.setattr(settings, 'SSE_HEARTBEAT_SECONDS', 0.05)
+    sess_dir = os.path.join(client.application.config['UPLOAD_FOLDER'], 'evt2')
+    os.makedirs(sess_dir)
+    state = progress_bus.create(sess_dir, progress_bus.default_progress())
+    state.update(pct=10)
+    threading.Timer(0.2, lambda: state.update(done=True)).start()
+    events = _parse(client.get('/events/evt2', headers={'Last-Event-ID': '0'}).get_data(as_text=True))
+    assert events[0][0] == 'progress' and events[0][2]['pct'] == 10
+
+    # a job that is not in this process's memory: file snapshot + fallback
+    other = os.path.join(client.application.config['UPLOAD_FOLDER'], 'evt3')
+    os.makedirs(other)
+    with open(os.path.join(other, 'progress.json'), 'w') as fh:
+        json.dump({'pct': 5, 'done': False}, fh)
+    events = _parse(client.get('/events/evt3').get_data(as_text=True))
+    assert [e[0] for e in events] == ['snapshot', 'fallback']
+    assert client.get('/events/missing').status_code == 404
+
+
+def test_resume_replays_only_changes_since_last_event(client, monkeypatch):
+    monkeypatch.setattr(settings, 'SSE_HEARTBEAT_SECONDS', 0.05)
+    sess_dir = os.path.join(client.application.config['UPLOAD_FOLDER'], 'evt4')
+    os.makedirs(sess_dir)
+    state = progress_bus.create(sess_dir, progress_bus.default_progress())
+    state.update(pct=10)
+    seen = state.version
+    state.update(message='Rendering', masters={'club': {'state': 'rendering'}})
+    state.update(masters={'streaming': {'state': 'rendering'}})
+    threading.Timer(0.2, lambda: state.update(done=True)).start()
+    events = _parse(client.get('/events/evt4', headers={'Last-Event-ID': str(seen)}).get_data(as_text=True))
+    name, event_id, patch = events[0]
+    assert name == 'progress' and int(event_id) == seen + 2
+    assert patch == {'message': 'Rendering', 'masters': {'club': patch['masters']['club'],
+                                                         'streaming': patch['masters']['streaming']}}
+    assert patch['masters']['club']['state'] == 'rendering'
+
+
+def test_resume_from_aged_out_id_sends_snapshot(client, monkeypatch):
+    monkeypatch.setattr(settings, 'SSE_HEARTBEAT_SECONDS', 0.05)
+    sess_dir = os.path.join(client.application.config['UPLOAD_FOLDER'], 'evt5')
+    os.makedirs(sess_dir)
+    state = progress_bus.create(sess_dir, progress_bus.default_progress())
+    for pct in range(progress_bus.PATCH_HISTORY + 5):
+        state.update(pct=pct)
+    threading.Timer(0.2, lambda: state.update(done=True)).start()
+    events = _parse(client.get('/events/evt5', headers={'Last-Event-ID': '1'}).get_data(as_text=True))
+    assert events[0][0] == 'snapshot' and events[0][2]['pct'] == progress_bus.PATCH_HISTORY + 4
@@ -0,0 +1,41 @@
+import re
+import time
+
+from app import metrics
+
+
+def test_histogram_and_counter_exposition():
+    reg = metrics.Registry()
+    h = reg.register(metrics.Histogram('t_seconds', 'T.', ('stage',), buckets=(0.1, 1.0)))
+    c = reg.register(metrics.Counter('t_total', 'C.', ('tool',)))
+    h.observe(0.05, stage='a')
+    h.observe(0.5, stage='a')
+    h.observe(3.0, stage='a')
+    c.inc(tool='ff"mpeg')
+    text = reg.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="a"} 3' in text
+    assert 't_total{tool="ff\\"mpeg"} 1' in text
+
+
+def test_metrics_endpoint_reports_stages_jobs_and_requests(client, sine_file):
+    with open(sine_file, 'rb') as f:
+        session = client.post('/start', data={'audio': (f, 'tone.wav')},
+                              content_type='multipart/form-data').get_json()['session']
+    for _ in range(60):
+        if client.get(f'/progress/{session}').get_json().get('done'):
+            break
+        time.sleep(0.5)
+    r = client.get('/metrics')
+    assert r.status_code == 200 and r.content_type.startswith('text/plain')
+    text = r.get_data(as_text=True)
+    for stage in ('analysis', 'advisor', 'verify', 'preview', 'finalize', 'job'):
+        assert re.search(rf'peakpilot_stage_seconds_count{{stage="{stage}",target="[^"]*"}} [1-9]', text), stage
+    assert 'peakpilot_stage_seconds_count{stage="render",target="club"}' in text
+    assert re.search(r'peakpilot_jobs_total\{outcome="done"\} [1-9]', text)
+    assert 'peakpilot_jobs_running ' in text
+    assert '# TYPE peakpilot_session_disk_bytes gauge' in text  # no sample until the janitor has swept
+    assert 'peakpilot_http_request_duration_seconds_count{endpoint="/progress/<session>",method="GET"}' in text
@@ -0,0 +1,66 @@
+import json
+import shutil
+
+from app import pipeline
+from app.render_cache import render_key
+
+
+def _run(root, name, sine_file):
+    sess = root / name
+    sess.mkdir(parents=True)
+    src = sess / 'upload'
+    shutil.copyfile(sine_file, src)
+    pipeline.write_json_atomic(pipeline.progress_path(str(sess)), {'metrics': {'advisor': {}}})
+    pipeline.run_pipeline(name, str(sess), str(src), {}, {}, {}, 'tone.wav', 'tone')
+    return sess, json.loads((sess / 'progress.json').read_text())
+
+
+def test_repeat_upload_reuses_cached_masters(tmp_path, sine_file, monkeypatch):
+    root = tmp_path / 'uploads'
+    first, pj1 = _run(root, 'one', sine_file)
+    assert pj1['done'] and not pj1.get('error')
+
+    def no_render(*a, **k):
+        raise AssertionError('render should have been skipped')
+
+    monkeypatch.setattr(pipeline, 'render_target', no_render)
+    monkeypatch.setattr(pipeline, 'fused_render', no_render)
+    second, pj2 = _run(root, 'two', sine_file)
+    assert pj2['done'] and not pj2.get('error')
+    for key in ('club', 'streaming', 'unlimited'):
+        assert pj2['masters'][key]['state'] == 'done'
+        assert pj2['metrics'][key] == pj1['metrics'][key]
+    wav = pj2['filenames']['wav']['club']
+    assert (second / wav).stat().st_ino == (first / wav).stat().st_ino
+    assert pj2['filenames']['zip'] in json.loads((second / 'manifest.json').read_text())
+
+
+def test_render_key_tracks_targets_not_progress_text():
+    adj = {'club': {'dI': 0.0, 'dTP': 0.0}, 'streaming': {'dI': 0.0, 'dTP': 0.0}}
+    targets = pipeline.master_targets(adj)
+    relabelled = [dict(t, message='x', pct=1) for t in targets]
+    assert render_key('a' * 64, targets) == render_key('a' * 64, relabelled)
+    adj['club']['dI'] = 0.1
+    assert render_key('a' * 64, pipeline.master_targets(adj)) != render_key('a' * 64, targets)
+    assert render_key('b' * 64, targets) != render_key('a' * 64, targets)
+
+
+def test_fallback_render_is_not_cached_under_ffmpeg_key(tmp_path, sine_file, monkeypatch):
+    # ffmpeg "installed" but failing: every render drops to the Python fallback
+    monkeypatch.setattr(pipeline, 'render_backend', lambda: 'ffmpeg')
+    root = tmp_path / 'uploads'
+    _, pj1 = _run(root, 'one', sine_file)
+    assert pj1['done'] and not pj1.get('error')
+    assert not list((root / 'cache').glob('*/*/metrics.json'))
+
+    calls = []
+    real = pipeline.render_target
+    monkeypatch.setattr(pipeline, 'render_target', lambda t, *a, **k: calls.append(t['key']) or real(t, *a, **k))
+    _, pj2 = _run(root, 'two', sine_file)
+    assert pj2['done'] and not pj2.get('error')
+    assert sorted(calls) == ['club', 'streaming', 'unlimited']
+
+
+def test_render_key_tracks_renderer():
+    targets = pipeline.master_targets({'club': {'dI': 0.0, 'dTP': 0.0}, 'streaming': {'dI': 0.0, 'dTP': 0.0}})
+    assert render_key('a' * 64, targets, 'python') != render_key('a' * 64, targets, 'ffmpeg')
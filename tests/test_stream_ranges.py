@@ -0,0 +1,56 @@
+import os
+
+from app.routes.stream import parse_ranges
+
+
+def _session_file(client, data):
+    root = os.path.join(client.application.config['UPLOAD_FOLDER'], 'rng')
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, 'take.wav'), 'wb') as fh:
+        fh.write(data)
+    return '/stream/rng/take.wav'
+
+
+def test_parse_ranges():
+    assert parse_ranges(None, 100) is None
+    assert parse_ranges('bytes=0-9', 100) == [(0, 9)]
+    assert parse_ranges('bytes=90-', 100) == [(90, 99)]
+    assert parse_ranges('bytes=-10', 100) == [(90, 99)]
+    assert parse_ranges('bytes=-500', 100) == [(0, 99)]
+    assert parse_ranges('bytes=0-1, 5-6', 100) == [(0, 1), (5, 6)]
+    assert parse_ranges('bytes=200-300', 100) == []
+    assert parse_ranges('bytes=9-2', 100) is None
+    assert parse_ranges('items=0-1', 100) is None
+
+
+def test_stream_ranges_suffix_multi_and_head(client):
+    data = bytes(range(256)) * 4096  # 1 MiB, several chunks
+    url = _session_file(client, data)
+
+    r = client.get(url)
+    assert r.status_code == 200 and r.data == data
+    r.close()
+
+    r = client.get(url, headers={'Range': 'bytes=-1000'})
+    assert r.status_code == 206
+    assert r.headers['Content-Range'] == f'bytes {len(data) - 1000}-{len(data) - 1}/{len(data)}'
+    assert r.data == data[-1000:]
+
+    r = client.get(url, headers={'Range': 'bytes=10-19,300000-300009'})
+    assert r.status_code == 206
+    ctype = r.headers['Content-Type']
+    assert ctype.startswith('multipart/byteranges; boundary=')
+    assert int(r.headers['Content-Length']) == len(r.data)
+    boundary = ctype.split('boundary=')[1].encode()
+    parts = [p for p in r.data.split(b'--' + boundary) if p.strip(b'\r\n-')]
+    bodies = [p.split(b'\r\n\r\n', 1)[1][:-2] for p in parts]
+    assert bodies == [data[10:20], data[300000:300010]]
+
+    r = client.get(url, headers={'Range': f'bytes={len(data)}-'})
+    assert r.status_code == 416
+    assert r.headers['Content-Range'] == f'bytes */{len(data)}'
+
+    r = client.head(url)
+    assert r.status_code == 200
+    assert r.headers['Content-Length'] == str(len(data))
+    assert r.data == b''
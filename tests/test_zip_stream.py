@@ -0,0 +1,47 @@
+import io
+import zipfile
+
+from app.zipstream import ZipMember, ZipPlan, crc32_file
+
+
+def _members(tmp_path):
+    out = []
+    for name, data in (('a.wav', b'RIFF' + bytes(range(256)) * 40), ('b_INFO.txt', 'ünïcode\n'.encode())):
+        p = tmp_path / name
+        p.write_bytes(data)
+        out.append(ZipMember(name, p, len(data), crc32_file(p)))
+    return out
+
+
+def test_plan_matches_zipfile_readback(tmp_path):
+    for force in (False, True):
+        plan = ZipPlan(_members(tmp_path), 1_700_000_000, force_zip64=force)
+        data = b''.join(plan.iter_bytes())
+        assert len(data) == plan.size
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.testzip() is None
+            assert zf.read('a.wav') == (tmp_path / 'a.wav').read_bytes()
+        assert b''.join(plan.iter_bytes(100, 5000, chunk_size=333)) == data[100:5001]
+
+
+def test_zip_download_streams_and_resumes(client, sine_file):
+    import time
+    with open(sine_file, 'rb') as f:
+        r = client.post('/start', data={'audio': (f, 'test.wav')}, content_type='multipart/form-data')
+    session = r.get_json()['session']
+    for _ in range(60):
+        pj = client.get(f'/progress/{session}').get_json()
+        if pj.get('done'):
+            break
+        time.sleep(0.5)
+    name = pj['filenames']['zip']
+    full = client.get(f'/download/{session}/{name}')
+    assert full.status_code == 200 and full.headers['Content-Type'] == 'application/zip'
+    assert int(full.headers['Content-Length']) == len(full.data)
+    with zipfile.ZipFile(io.BytesIO(full.data)) as zf:
+        assert zf.testzip() is None
+        assert 'test__club_master.wav' in zf.namelist()
+    part = client.get(f'/download/{session}/{name}', headers={'Range': 'bytes=1000-', 'If-Range': full.headers['ETag']})
+    assert part.status_code == 206 and part.data == full.data[1000:]
+    cached = client.get(f'/download/{session}/{name}', headers={'If-None-Match': full.headers['ETag']})
+    assert cached.status_code == 304